@@ -4,31 +4,170 @@ Agent IA LangChain pour la prise de décision d'irrigation
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage
-from typing import Dict
+from typing import Callable, Dict, List, Optional
+import asyncio
+import datetime
 import os
 import json
 import requests
 import time
 import logging
 import re
-from config import OPENAI_API_KEY, LLM_MODEL, TEMPERATURE, LLM_PROVIDER, OLLAMA_BASE_URL
+import threading
+from app.http_client import http_client
+from app.metrics import STAGE_SECONDS, LLM_FALLBACK_PARSES, LLM_SAFE_DEFAULTS, LLM_COLD_LOADS
+from app.tracing import DecisionTrace, activate, set_attributes, span
+from config import (OPENAI_API_KEY, LLM_MODEL, TEMPERATURE, LLM_PROVIDER, OLLAMA_BASE_URL,
+                    LLM_BATCH_MAX_CONCURRENCY, LLM_BATCH_ITEM_TIMEOUT_SECONDS, AUTO_DECISION_INTERVAL_HOURS,
+                    OLLAMA_KEEP_ALIVE, OLLAMA_KEEP_ALIVE_MARGIN_SECONDS, OLLAMA_PRELOAD_ON_STARTUP)
 
 logger = logging.getLogger(__name__)
 
+# Motifs des champs détectés au fil du flux de tokens
+# Temps de chargement au-delà duquel un appel est compté comme un démarrage à froid du modèle
+COLD_LOAD_THRESHOLD_SECONDS = 1.0
+# Délai maximal d'un préchauffage (le chargement depuis le disque peut être long)
+WARMUP_TIMEOUT_SECONDS = 300
+
+_STREAM_DECISION_PATTERN = re.compile(r'"decision"\s*:\s*"([^"]+)"')
+_STREAM_DURATION_PATTERN = re.compile(r'"duree_minutes"\s*:\s*(\d+)\s*[,}\s]')
+_STREAM_EXPLICATION_PATTERN = re.compile(r'"explication"\s*:\s*"')
+_JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f'}
+
+
+class _StreamingDecisionParser:
+    """
+    Analyse incrémentale de la réponse JSON du LLM pendant sa génération
+    
+    Détecte la fermeture de l'objet JSON (pour arrêter la génération), et émet
+    les champs decision / duree_minutes dès qu'ils sont complets ainsi que les
+    fragments de l'explication au fur et à mesure.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self.decision: Optional[str] = None
+        self.duree_minutes: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._explication_pos: Optional[int] = None
+        self._explication_done = False
+    
+    def feed(self, chunk: str) -> List[Dict]:
+        """Ajoute un fragment de réponse et retourne les événements nouvellement disponibles"""
+        self.text += chunk
+        self._scan_structure()
+        
+        events = []
+        if self.decision is None:
+            match = _STREAM_DECISION_PATTERN.search(self.text)
+            if match:
+                self.decision = match.group(1).strip().upper()
+                events.append({'type': 'decision', 'decision': self.decision})
+        if self.duree_minutes is None:
+            match = _STREAM_DURATION_PATTERN.search(self.text)
+            if match:
+                self.duree_minutes = int(match.group(1))
+                events.append({'type': 'duree_minutes', 'duree_minutes': self.duree_minutes})
+        
+        delta = self._explication_delta()
+        if delta:
+            events.append({'type': 'explication_delta', 'text': delta})
+        return events
+    
+    def _scan_structure(self) -> None:
+        """Suit la profondeur des accolades (hors chaînes) jusqu'à fermeture du premier objet"""
+        while self._pos < len(self.text) and not self.complete:
+            char = self.text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._started
+            elif char == '{':
+                self._depth += 1
+                self._started = True
+            elif char == '}' and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+    
+    def _explication_delta(self) -> str:
+        """Décode la portion de l'explication reçue depuis le dernier appel"""
+        if self._explication_done:
+            return ""
+        if self._explication_pos is None:
+            match = _STREAM_EXPLICATION_PATTERN.search(self.text)
+            if not match:
+                return ""
+            self._explication_pos = match.end()
+        
+        out = []
+        i = self._explication_pos
+        while i < len(self.text):
+            char = self.text[i]
+            if char == '\\':
+                # Séquence d'échappement incomplète : attendre le fragment suivant
+                if i + 1 >= len(self.text):
+                    break
+                escaped = self.text[i + 1]
+                if escaped == 'u':
+                    if i + 6 > len(self.text):
+                        break
+                    try:
+                        out.append(chr(int(self.text[i + 2:i + 6], 16)))
+                    except ValueError:
+                        pass
+                    i += 6
+                    continue
+                out.append(_JSON_ESCAPES.get(escaped, escaped))
+                i += 2
+                continue
+            if char == '"':
+                self._explication_done = True
+                i += 1
+                break
+            out.append(char)
+            i += 1
+        self._explication_pos = i
+        return "".join(out)
+
 
 class IrrigationAgent:
     """Agent IA utilisant LangChain pour prendre des décisions d'irrigation"""
     
     def __init__(self):
         """Initialise l'agent avec le modèle LLM"""
+        self.keep_alive = self._keep_alive_for_interval(AUTO_DECISION_INTERVAL_HOURS * 3600)
+        self._model_stats_lock = threading.Lock()
+        # Boucle asyncio des lots, créée au premier lot puis conservée (voir _batch_loop)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self.model_stats = {
+            'warmups': 0,
+            'warmup_failures': 0,
+            'cold_loads': 0,
+            'cold_load_seconds_total': 0.0,
+            'last_load_seconds': None,
+            'last_cold_load_at': None,
+            'last_warmup_at': None
+        }
         
         if LLM_PROVIDER == 'ollama':
             print(f"Utilisation de Ollama avec le modele {LLM_MODEL}")
             try:
                 # Vérifier la disponibilité d'Ollama et des modèles
-                import requests
                 try:
-                    response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+                    response = http_client.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
                     if response.status_code == 200:
                         models = response.json().get('models', [])
                         model_names = [m.get('name', '') for m in models]
@@ -59,9 +198,14 @@ class IrrigationAgent:
                 self.llm = ChatOllama(
                     model=LLM_MODEL,
                     temperature=TEMPERATURE,
-                    base_url=OLLAMA_BASE_URL
+                    base_url=OLLAMA_BASE_URL,
+                    keep_alive=self.keep_alive
                     # Pas de timeout : on laisse Ollama prendre le temps nécessaire pour une réponse correcte
                 )
+                if OLLAMA_PRELOAD_ON_STARTUP:
+                    # Chargement en arrière-plan : le démarrage n'attend pas la lecture du modèle
+                    threading.Thread(target=self.warm_up, args=("démarrage",), daemon=True,
+                                     name='ollama-preload').start()
             except Exception as e:
                 print(f"[ERROR] Erreur lors de l'initialisation d'Ollama : {e}")
                 raise
@@ -153,9 +297,100 @@ RÈGLES STRICTES :
 - Si decision = "IRRIGUER", alors duree_minutes DOIT être entre 10 et 60
 """
     
+    @staticmethod
+    def _keep_alive_for_interval(interval_seconds: float) -> str:
+        """Valeur keep_alive d'Ollama couvrant l'intervalle entre deux décisions planifiées"""
+        if OLLAMA_KEEP_ALIVE != 'auto':
+            return OLLAMA_KEEP_ALIVE
+        return f"{int(interval_seconds + OLLAMA_KEEP_ALIVE_MARGIN_SECONDS)}s"
+    
+    def set_schedule_interval(self, interval_seconds: float) -> None:
+        """Aligne le maintien en mémoire du modèle sur l'intervalle du scheduler"""
+        self.keep_alive = self._keep_alive_for_interval(interval_seconds)
+        if LLM_PROVIDER == 'ollama':
+            self.llm.keep_alive = self.keep_alive
+            logger.info(f"[AGENT] keep_alive Ollama fixé à {self.keep_alive}")
+    
+    def warm_up(self, reason: str = "planifié") -> bool:
+        """
+        Charge le modèle Ollama en mémoire sans générer de texte
+        
+        Une requête /api/generate sans prompt suffit à Ollama pour charger le
+        modèle et le garder keep_alive. Le temps de chargement mesuré est compté
+        dans les statistiques de démarrage à froid.
+        
+        Returns:
+            True si le modèle est chargé (toujours True hors Ollama)
+        """
+        if LLM_PROVIDER != 'ollama':
+            return True
+        start_time = time.time()
+        try:
+            response = http_client.post(
+                f"{OLLAMA_BASE_URL}/api/generate",
+                json={'model': LLM_MODEL, 'keep_alive': self.keep_alive, 'stream': False},
+                timeout=WARMUP_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            load_ns = response.json().get('load_duration')
+        except (requests.exceptions.RequestException, ValueError) as e:
+            with self._model_stats_lock:
+                self.model_stats['warmup_failures'] += 1
+            logger.warning(f"[AGENT] Préchauffage du modèle impossible ({reason}) : {e}")
+            return False
+        
+        load_seconds = load_ns / 1e9 if load_ns is not None else time.time() - start_time
+        with self._model_stats_lock:
+            self.model_stats['warmups'] += 1
+            self.model_stats['last_warmup_at'] = datetime.datetime.now().isoformat()
+        self._record_load_seconds(load_seconds)
+        logger.info(f"[AGENT] Modèle {LLM_MODEL} préchauffé ({reason}) en {time.time() - start_time:.2f}s, "
+                    f"chargement {load_seconds:.2f}s, keep_alive {self.keep_alive}")
+        return True
+    
+    def _record_load_duration(self, response) -> None:
+        """Relève le temps de chargement du modèle rapporté par Ollama pour un appel"""
+        load_ns = (getattr(response, 'response_metadata', None) or {}).get('load_duration')
+        if load_ns is not None:
+            self._record_load_seconds(load_ns / 1e9)
+            set_attributes(model_load_seconds=round(load_ns / 1e9, 3))
+    
+    @staticmethod
+    def _token_counts(message) -> Dict:
+        """Nombre de tokens du prompt et de la réponse rapportés par le provider (None si inconnus)"""
+        usage = getattr(message, 'usage_metadata', None) or {}
+        metadata = getattr(message, 'response_metadata', None) or {}
+        return {
+            'prompt_tokens': usage.get('input_tokens', metadata.get('prompt_eval_count')),
+            'response_tokens': usage.get('output_tokens', metadata.get('eval_count'))
+        }
+    
+    def _record_load_seconds(self, load_seconds: float) -> None:
+        """Met à jour les statistiques ; un chargement long compte comme démarrage à froid"""
+        STAGE_SECONDS.observe(load_seconds, stage='model_load')
+        with self._model_stats_lock:
+            self.model_stats['last_load_seconds'] = round(load_seconds, 3)
+            if load_seconds >= COLD_LOAD_THRESHOLD_SECONDS:
+                LLM_COLD_LOADS.inc()
+                self.model_stats['cold_loads'] += 1
+                self.model_stats['cold_load_seconds_total'] += load_seconds
+                self.model_stats['last_cold_load_at'] = datetime.datetime.now().isoformat()
+                logger.warning(f"[AGENT] Démarrage à froid du modèle : chargement en {load_seconds:.2f}s")
+    
+    def get_model_stats(self) -> Dict:
+        """Statistiques de chargement du modèle (démarrages à froid, préchauffages)"""
+        with self._model_stats_lock:
+            stats = dict(self.model_stats)
+        stats['cold_load_seconds_total'] = round(stats['cold_load_seconds_total'], 3)
+        stats.update(provider=LLM_PROVIDER, model=LLM_MODEL,
+                     keep_alive=self.keep_alive if LLM_PROVIDER == 'ollama' else None)
+        return stats
+    
     def make_decision(self, weather_summary: str, 
                      sensor_summary: str = "", sensor_alerts: list = None,
-                     reviews_summary: str = "") -> Dict:
+                     reviews_summary: str = "",
+                     history_summary: str = "",
+                     stream_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Prend une décision d'irrigation basée sur les données fournies
         
@@ -164,13 +399,170 @@ RÈGLES STRICTES :
             sensor_summary: Résumé des données de capteurs IoT
             sensor_alerts: Liste des alertes des capteurs
             reviews_summary: Résumé des retours d'experts (notes et commentaires)
+            history_summary: Situations passées les plus proches et leur issue
+            stream_callback: Si fourni, la réponse est générée en streaming et la
+                fonction reçoit les événements au fil de l'eau ('decision',
+                'duree_minutes', 'explication_delta'). La génération s'arrête dès
+                que l'objet JSON est fermé.
         
         Returns:
             Dictionnaire contenant la décision, la durée et l'explication
         """
         start_time = time.time()
         logger.info("[AGENT] Début de l'analyse par l'IA...")
+        response_text = ""
         
+        try:
+            # Construction du prompt
+            prompt_start = time.perf_counter()
+            with span('agent.prompt_build') as attributes:
+                messages = self._build_messages(weather_summary, sensor_summary, sensor_alerts,
+                                                reviews_summary, history_summary)
+                attributes['prompt_chars'] = sum(len(message.content) for message in messages)
+            prompt_duration = time.perf_counter() - prompt_start
+            STAGE_SECONDS.observe(prompt_duration, stage='prompt_build')
+            logger.info(f"[AGENT] Prompt construit en {prompt_duration:.3f}s")
+            
+            # Appel au LLM sans timeout forcé (priorité à la qualité)
+            logger.info(f"[AGENT] Appel au LLM ({LLM_PROVIDER}/{LLM_MODEL}) - Priorité: qualité de réponse...")
+            llm_start = time.perf_counter()
+            
+            with span('agent.llm_call', provider=LLM_PROVIDER, model=LLM_MODEL,
+                      streaming=stream_callback is not None) as attributes:
+                if stream_callback is None:
+                    # Appel direct sans timeout forcé
+                    response = self.llm.invoke(messages)
+                    response_text = response.content
+                    self._record_load_duration(response)
+                    attributes.update(self._token_counts(response))
+                else:
+                    response_text = self._stream_response(messages, stream_callback, llm_start)
+                attributes['response_chars'] = len(response_text)
+            
+            llm_duration = time.perf_counter() - llm_start
+            STAGE_SECONDS.observe(llm_duration, stage='llm_call')
+            logger.info(f"[AGENT] ✓ Réponse LLM reçue en {llm_duration:.2f}s")
+            
+            return self._parse_decision(response_text, start_time)
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"[AGENT] Erreur de parsing JSON : {e}")
+            logger.error(f"[AGENT] Réponse reçue : {response_text[:500]}")
+            # Fallback : essayer d'extraire la décision manuellement
+            logger.warning("[AGENT] Utilisation du fallback pour extraire la décision")
+            return self._extract_decision_fallback(response_text)
+        except Exception as e:
+            return self._safe_default_decision(e, start_time)
+    
+    def make_decisions_batch(self, decision_requests: List[Dict], max_concurrency: int = LLM_BATCH_MAX_CONCURRENCY,
+                             timeout: float = LLM_BATCH_ITEM_TIMEOUT_SECONDS,
+                             on_decision: Optional[Callable[[int, Dict], None]] = None,
+                             traces: Optional[List[DecisionTrace]] = None) -> List[Dict]:
+        """
+        Prend plusieurs décisions en parallèle (zones d'un cycle, rejeu, réévaluation d'un prompt)
+        
+        Les requêtes partent de façon asynchrone (ainvoke), au plus max_concurrency
+        à la fois. Chaque requête a son propre délai et son propre repli : une
+        réponse illisible passe par l'extraction de secours, une erreur ou un délai
+        dépassé donne la décision sécurisée, sans affecter les autres requêtes.
+        
+        Args:
+            decision_requests: Arguments de make_decision pour chaque décision (weather_summary,
+                sensor_summary, sensor_alerts, reviews_summary, history_summary)
+            max_concurrency: Nombre maximal d'appels simultanés au LLM
+            timeout: Délai maximal par requête en secondes (0 = aucun)
+            on_decision: Fonction appelée avec (index de la requête, décision) dès
+                qu'une décision est prise, sans attendre la fin du lot ; exécutée dans
+                un thread, ses erreurs sont journalisées sans interrompre le lot
+            traces: Trace de chaque requête (même ordre), qui reçoit ses étapes
+        
+        Returns:
+            Décisions dans l'ordre des requêtes (même format que make_decision)
+        """
+        if not decision_requests:
+            return []
+        start_time = time.time()
+        logger.info(f"[AGENT] Lot de {len(decision_requests)} décision(s), {max_concurrency} appel(s) simultané(s) au maximum")
+        future = asyncio.run_coroutine_threadsafe(
+            self._decide_batch(decision_requests, max(1, max_concurrency), timeout, on_decision, traces),
+            self._batch_loop()
+        )
+        decisions = future.result()
+        logger.info(f"[AGENT] ✓ Lot de {len(decision_requests)} décision(s) terminé en {time.time() - start_time:.2f}s")
+        return decisions
+    
+    def _batch_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Boucle asyncio unique des lots, exécutée dans un thread dédié
+        
+        Le client HTTP asynchrone du LLM est créé une fois et garde ses connexions
+        keep-alive ouvertes sur la boucle qui les a ouvertes : un asyncio.run() par
+        lot les rattacherait à une boucle fermée et ferait échouer le lot suivant.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True, name='llm-batch-loop').start()
+                self._loop = loop
+            return self._loop
+    
+    async def _decide_batch(self, decision_requests: List[Dict], max_concurrency: int, timeout: float,
+                            on_decision: Optional[Callable[[int, Dict], None]],
+                            traces: Optional[List[DecisionTrace]] = None) -> List[Dict]:
+        """Lance les requêtes du lot, limitées par un sémaphore, et rassemble les décisions dans l'ordre"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        loop = asyncio.get_running_loop()
+        
+        async def decide(index: int, request: Dict) -> Dict:
+            # Chaque tâche a son propre contexte : la trace activée ici ne concerne que cette requête
+            with activate(traces[index] if traces else None), \
+                    span('agent.batch_item', index=index, max_concurrency=max_concurrency) as attributes:
+                queued_start = time.perf_counter()
+                async with semaphore:
+                    attributes['queued_ms'] = round((time.perf_counter() - queued_start) * 1000, 1)
+                    decision = await ask(request)
+            if on_decision is not None:
+                # Hors de la boucle (écritures disque, pompe) : les autres requêtes du lot continuent
+                try:
+                    await loop.run_in_executor(None, on_decision, index, decision)
+                except Exception as e:
+                    logger.error(f"[AGENT] Échec du traitement de la décision {index} du lot : {e}", exc_info=True)
+            return decision
+        
+        async def ask(request: Dict) -> Dict:
+            start_time = time.time()
+            response_text = ""
+            try:
+                with span('agent.prompt_build') as attributes, STAGE_SECONDS.time(stage='prompt_build'):
+                    messages = self._build_messages(**request)
+                    attributes['prompt_chars'] = sum(len(message.content) for message in messages)
+                call = self.llm.ainvoke(messages)
+                llm_start = time.perf_counter()
+                with span('agent.llm_call', provider=LLM_PROVIDER, model=LLM_MODEL, streaming=False,
+                          timeout_seconds=timeout) as attributes:
+                    response = await (asyncio.wait_for(call, timeout) if timeout > 0 else call)
+                    response_text = response.content
+                    self._record_load_duration(response)
+                    attributes.update(self._token_counts(response))
+                    attributes['response_chars'] = len(response_text)
+                STAGE_SECONDS.observe(time.perf_counter() - llm_start, stage='llm_call')
+                return self._parse_decision(response_text, start_time)
+            except json.JSONDecodeError as e:
+                logger.error(f"[AGENT] Erreur de parsing JSON : {e}")
+                logger.warning("[AGENT] Utilisation du fallback pour extraire la décision")
+                return self._extract_decision_fallback(response_text)
+            except asyncio.TimeoutError:
+                return self._safe_default_decision(
+                    TimeoutError(f"pas de réponse du LLM après {timeout:.0f}s"), start_time
+                )
+            except Exception as e:
+                return self._safe_default_decision(e, start_time)
+        
+        return await asyncio.gather(*(decide(index, request) for index, request in enumerate(decision_requests)))
+    
+    def _build_messages(self, weather_summary: str, sensor_summary: str = "", sensor_alerts: list = None,
+                        reviews_summary: str = "", history_summary: str = "") -> list:
+        """Construit les messages (prompt système + données à analyser) d'une décision"""
         if sensor_alerts is None:
             sensor_alerts = []
         
@@ -179,12 +571,9 @@ RÈGLES STRICTES :
         if sensor_alerts:
             alerts_text = "\n🚨 ALERTES DES CAPTEURS :\n" + "\n".join(sensor_alerts) + "\n"
         
-        try:
-            # Construction du prompt
-            prompt_start = time.time()
-            # Construire le message sans f-string pour éviter les problèmes avec les accolades
-            # Prompt complet pour une réponse détaillée et correcte
-            prompt_content = f"""DONNÉES À ANALYSER :
+        # Construire le message sans f-string pour éviter les problèmes avec les accolades
+        # Prompt complet pour une réponse détaillée et correcte
+        prompt_content = f"""DONNÉES À ANALYSER :
 
 {weather_summary}
 
@@ -194,6 +583,8 @@ RÈGLES STRICTES :
 
 {reviews_summary}
 
+{history_summary}
+
 Prends maintenant ta décision en analysant ces informations. PRIORISE les données de capteurs, surtout l'humidité du sol. Prends en compte les retours d'experts (notes des reviews). 
 
 RÉPONDS UNIQUEMENT AVEC LE JSON, SANS TEXTE AVANT OU APRÈS, SANS MARKDOWN, SANS DOUBLES ACCOLADES. Format exact :
@@ -203,129 +594,167 @@ RÉPONDS UNIQUEMENT AVEC LE JSON, SANS TEXTE AVANT OU APRÈS, SANS MARKDOWN, SAN
     "duree_minutes": nombre entier,
     "explication": "Une explication claire et détaillée en 2-3 phrases expliquant pourquoi cette décision a été prise, en français, adaptée pour un agriculteur. Mentionne spécifiquement l'humidité du sol, le niveau du réservoir et les autres facteurs clés."
 }}"""
-            
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=prompt_content)
-            ]
-            prompt_duration = time.time() - prompt_start
-            logger.info(f"[AGENT] Prompt construit en {prompt_duration:.3f}s")
-            
-            # Appel au LLM sans timeout forcé (priorité à la qualité)
-            logger.info(f"[AGENT] Appel au LLM ({LLM_PROVIDER}/{LLM_MODEL}) - Priorité: qualité de réponse...")
-            llm_start = time.time()
-            
-            # Appel direct sans timeout forcé
-            response = self.llm.invoke(messages)
-            
-            llm_duration = time.time() - llm_start
-            logger.info(f"[AGENT] ✓ Réponse LLM reçue en {llm_duration:.2f}s")
-            
-            # Extraction de la réponse
-            response_text = response.content.strip()
-            logger.info(f"[AGENT] Réponse brute (premiers 300 chars): {response_text[:300]}...")
-            
-            # Nettoyage de la réponse (enlever les markdown code blocks si présents)
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            # Correction des doubles accolades (problème avec certains LLM)
-            response_text = response_text.replace('{{', '{').replace('}}', '}')
-            
-            # Essayer d'extraire le JSON si la réponse contient du texte avant/après
-            first_brace = response_text.find('{')
-            last_brace = response_text.rfind('}')
-            if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-                response_text = response_text[first_brace:last_brace+1]
-                logger.info(f"[AGENT] JSON extrait de la réponse (position {first_brace}-{last_brace})")
-            
-            # Parsing du JSON
-            parse_start = time.time()
-            try:
+        
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=prompt_content)
+        ]
+    
+    def _parse_decision(self, response_text: str, start_time: float) -> Dict:
+        """
+        Extrait et valide la décision de la réponse du LLM
+        
+        Raises:
+            json.JSONDecodeError: si la réponse n'est pas un JSON exploitable
+            ValueError: si la décision est invalide
+        """
+        # Extraction de la réponse
+        response_text = response_text.strip()
+        logger.info(f"[AGENT] Réponse brute (premiers 300 chars): {response_text[:300]}...")
+        
+        # Nettoyage de la réponse (enlever les markdown code blocks si présents)
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+        response_text = response_text.strip()
+        
+        # Correction des doubles accolades (problème avec certains LLM)
+        response_text = response_text.replace('{{', '{').replace('}}', '}')
+        
+        # Essayer d'extraire le JSON si la réponse contient du texte avant/après
+        first_brace = response_text.find('{')
+        last_brace = response_text.rfind('}')
+        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
+            response_text = response_text[first_brace:last_brace+1]
+            logger.info(f"[AGENT] JSON extrait de la réponse (position {first_brace}-{last_brace})")
+        
+        # Parsing du JSON
+        parse_start = time.perf_counter()
+        try:
+            with span('agent.json_parse', chars=len(response_text)):
                 decision_data = json.loads(response_text)
-            except json.JSONDecodeError as json_err:
-                logger.error(f"[AGENT] Erreur de parsing JSON après nettoyage: {json_err}")
-                logger.error(f"[AGENT] Texte nettoyé: {response_text[:500]}")
-                raise
-            parse_duration = time.time() - parse_start
-            logger.info(f"[AGENT] ✓ JSON parsé en {parse_duration:.3f}s")
-            
-            # Validation avec logging détaillé
-            missing_fields = []
+        except json.JSONDecodeError as json_err:
+            logger.error(f"[AGENT] Erreur de parsing JSON après nettoyage: {json_err}")
+            logger.error(f"[AGENT] Texte nettoyé: {response_text[:500]}")
+            raise
+        parse_duration = time.perf_counter() - parse_start
+        STAGE_SECONDS.observe(parse_duration, stage='json_parse')
+        logger.info(f"[AGENT] ✓ JSON parsé en {parse_duration:.3f}s")
+        
+        # Validation avec logging détaillé
+        missing_fields = []
+        if 'decision' not in decision_data:
+            missing_fields.append('decision')
+        if 'explication' not in decision_data:
+            missing_fields.append('explication')
+        if 'duree_minutes' not in decision_data:
+            missing_fields.append('duree_minutes')
+        
+        if missing_fields:
+            logger.error(f"[AGENT] Champs manquants dans la réponse: {missing_fields}")
+            logger.error(f"[AGENT] Réponse complète reçue: {json.dumps(decision_data, indent=2, ensure_ascii=False)}")
+            # Essayer de compléter avec des valeurs par défaut
             if 'decision' not in decision_data:
-                missing_fields.append('decision')
+                decision_data['decision'] = 'NE PAS IRRIGUER'
+                logger.warning("[AGENT] Décision manquante, utilisation de 'NE PAS IRRIGUER' par défaut")
             if 'explication' not in decision_data:
-                missing_fields.append('explication')
+                decision_data['explication'] = "Réponse incomplète du modèle IA"
+                logger.warning("[AGENT] Explication manquante, utilisation d'une valeur par défaut")
             if 'duree_minutes' not in decision_data:
-                missing_fields.append('duree_minutes')
-            
-            if missing_fields:
-                logger.error(f"[AGENT] Champs manquants dans la réponse: {missing_fields}")
-                logger.error(f"[AGENT] Réponse complète reçue: {json.dumps(decision_data, indent=2, ensure_ascii=False)}")
-                # Essayer de compléter avec des valeurs par défaut
-                if 'decision' not in decision_data:
-                    decision_data['decision'] = 'NE PAS IRRIGUER'
-                    logger.warning("[AGENT] Décision manquante, utilisation de 'NE PAS IRRIGUER' par défaut")
-                if 'explication' not in decision_data:
-                    decision_data['explication'] = "Réponse incomplète du modèle IA"
-                    logger.warning("[AGENT] Explication manquante, utilisation d'une valeur par défaut")
-                if 'duree_minutes' not in decision_data:
-                    decision_data['duree_minutes'] = 0
-                    logger.warning("[AGENT] Durée manquante, utilisation de 0 par défaut")
-            
-            if decision_data['decision'] not in ['IRRIGUER', 'NE PAS IRRIGUER']:
-                logger.error(f"[AGENT] Décision invalide reçue: '{decision_data['decision']}'")
-                raise ValueError(f"Décision invalide: '{decision_data['decision']}'")
-            
-            duree = int(decision_data.get('duree_minutes', 0) or 0)
-            logger.info(f"[AGENT] Durée brute du LLM: {duree} min")
-            
-            if duree < 0:
-                duree = 0
-                logger.info(f"[AGENT] Durée négative corrigée à 0")
-            
-            if decision_data['decision'] == 'NE PAS IRRIGUER':
-                duree = 0
-                logger.info(f"[AGENT] Durée mise à 0 car décision = NE PAS IRRIGUER")
-            else:
-                duree = max(10, min(60, duree)) if duree > 0 else 20
-                logger.info(f"[AGENT] Durée ajustée entre 10-60 min: {duree} min")
-            
-            decision_data['duree_minutes'] = duree
-            
-            total_duration = time.time() - start_time
-            logger.info(f"[AGENT] ✓ Décision finale: {decision_data['decision']}, Durée: {duree} min (total: {total_duration:.2f}s)")
-            
-            return decision_data
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"[AGENT] Erreur de parsing JSON : {e}")
-            logger.error(f"[AGENT] Réponse reçue : {response_text[:500]}")
-            # Fallback : essayer d'extraire la décision manuellement
-            logger.warning("[AGENT] Utilisation du fallback pour extraire la décision")
-            return self._extract_decision_fallback(response_text)
-        except Exception as e:
-            error_msg = str(e)
-            total_duration = time.time() - start_time
-            logger.error(f"[AGENT] Erreur après {total_duration:.2f}s : {error_msg}", exc_info=True)
-            
-            # Messages d'erreur plus explicites pour Ollama
-            if 'not found' in error_msg.lower() or '404' in error_msg:
-                error_msg = f"Modèle '{LLM_MODEL}' non trouvé dans Ollama. Vérifiez que le modèle est installé avec 'ollama pull {LLM_MODEL}'"
-            elif 'connection' in error_msg.lower() or 'refused' in error_msg.lower():
-                error_msg = f"Impossible de se connecter à Ollama sur {OLLAMA_BASE_URL}. Assurez-vous qu'Ollama est démarré."
-            
-            logger.warning(f"[AGENT] Retour d'une décision sécurisée: NE PAS IRRIGUER")
-            return {
-                'decision': 'NE PAS IRRIGUER',
-                'duree_minutes': 0,
-                'explication': f'Erreur lors de l\'analyse : {error_msg}. Par précaution, l\'irrigation n\'est pas activée.'
-            }
+                decision_data['duree_minutes'] = 0
+                logger.warning("[AGENT] Durée manquante, utilisation de 0 par défaut")
+        
+        if decision_data['decision'] not in ['IRRIGUER', 'NE PAS IRRIGUER']:
+            logger.error(f"[AGENT] Décision invalide reçue: '{decision_data['decision']}'")
+            raise ValueError(f"Décision invalide: '{decision_data['decision']}'")
+        
+        duree = int(decision_data.get('duree_minutes', 0) or 0)
+        logger.info(f"[AGENT] Durée brute du LLM: {duree} min")
+        
+        if duree < 0:
+            duree = 0
+            logger.info(f"[AGENT] Durée négative corrigée à 0")
+        
+        if decision_data['decision'] == 'NE PAS IRRIGUER':
+            duree = 0
+            logger.info(f"[AGENT] Durée mise à 0 car décision = NE PAS IRRIGUER")
+        else:
+            duree = max(10, min(60, duree)) if duree > 0 else 20
+            logger.info(f"[AGENT] Durée ajustée entre 10-60 min: {duree} min")
+        
+        decision_data['duree_minutes'] = duree
+        
+        total_duration = time.time() - start_time
+        logger.info(f"[AGENT] ✓ Décision finale: {decision_data['decision']}, Durée: {duree} min (total: {total_duration:.2f}s)")
+        
+        return decision_data
+    
+    def _safe_default_decision(self, error: Exception, start_time: float) -> Dict:
+        """Décision sécurisée (NE PAS IRRIGUER) retournée quand l'appel au LLM échoue"""
+        LLM_SAFE_DEFAULTS.inc()
+        error_msg = str(error)
+        set_attributes(safe_default=True, error=f"{type(error).__name__}: {error_msg}")
+        total_duration = time.time() - start_time
+        logger.error(f"[AGENT] Erreur après {total_duration:.2f}s : {error_msg}", exc_info=error)
+        
+        # Messages d'erreur plus explicites pour Ollama
+        if 'not found' in error_msg.lower() or '404' in error_msg:
+            error_msg = f"Modèle '{LLM_MODEL}' non trouvé dans Ollama. Vérifiez que le modèle est installé avec 'ollama pull {LLM_MODEL}'"
+        elif 'connection' in error_msg.lower() or 'refused' in error_msg.lower():
+            error_msg = f"Impossible de se connecter à Ollama sur {OLLAMA_BASE_URL}. Assurez-vous qu'Ollama est démarré."
+        
+        logger.warning(f"[AGENT] Retour d'une décision sécurisée: NE PAS IRRIGUER")
+        return {
+            'decision': 'NE PAS IRRIGUER',
+            'duree_minutes': 0,
+            'explication': f'Erreur lors de l\'analyse : {error_msg}. Par précaution, l\'irrigation n\'est pas activée.',
+            'safe_default': True
+        }
+    
+    def _stream_response(self, messages: list, stream_callback: Callable[[Dict], None],
+                         llm_start: float) -> str:
+        """
+        Génère la réponse en streaming en transmettant les champs dès qu'ils sont lisibles
+        
+        Le nombre de tokens n'est connu que si le provider l'envoie avant l'arrêt
+        anticipé ; le nombre de fragments reçus est relevé dans tous les cas.
+        
+        Returns:
+            Texte de la réponse reçue (jusqu'à la fermeture de l'objet JSON)
+        """
+        parser = _StreamingDecisionParser()
+        stream = self.llm.stream(messages)
+        first_token = True
+        chunks = 0
+        try:
+            for chunk in stream:
+                token_counts = self._token_counts(chunk)
+                if token_counts['prompt_tokens'] is not None or token_counts['response_tokens'] is not None:
+                    set_attributes(**token_counts)
+                content = chunk.content if isinstance(chunk.content, str) else ""
+                if not content:
+                    continue
+                chunks += 1
+                if first_token:
+                    first_token_seconds = time.perf_counter() - llm_start
+                    logger.info(f"[AGENT] Premier token reçu en {first_token_seconds:.2f}s")
+                    set_attributes(first_token_ms=round(first_token_seconds * 1000, 1))
+                    first_token = False
+                for event in parser.feed(content):
+                    stream_callback(event)
+                if parser.complete:
+                    logger.info("[AGENT] Objet JSON complet reçu, arrêt anticipé de la génération")
+                    break
+        finally:
+            # Fermer le flux interrompt la génération côté serveur
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+            set_attributes(response_chunks=chunks)
+        return parser.text
     
     def _extract_decision_fallback(self, response_text: str) -> Dict:
         """
@@ -337,6 +766,8 @@ RÉPONDS UNIQUEMENT AVEC LE JSON, SANS TEXTE AVANT OU APRÈS, SANS MARKDOWN, SAN
         Returns:
             Dictionnaire avec la décision extraite
         """
+        LLM_FALLBACK_PARSES.inc()
+        set_attributes(fallback_parse=True)
         logger.info("[AGENT] Extraction fallback de la décision...")
         decision = 'NE PAS IRRIGUER'  # Par défaut, sécurité
         explication = response_text
@@ -395,5 +826,6 @@ RÉPONDS UNIQUEMENT AVEC LE JSON, SANS TEXTE AVANT OU APRÈS, SANS MARKDOWN, SAN
         return {
             'decision': decision,
             'duree_minutes': duree,
-            'explication': explication
+            'explication': explication,
+            'fallback_parse': True
         }
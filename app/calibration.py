@@ -0,0 +1,250 @@
+"""
+Calage des constantes du modèle de sol du simulateur sur les lectures enregistrées
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import CSV_DATA_PATH, SENSOR_CSV_DATA_PATH, CALIBRATION_WORKERS
+from app.data_loader import HistoricalDataLoader
+from app.sensor_data_loader import SensorDataLoader
+
+logger = logging.getLogger(__name__)
+
+# Constantes de generate_new_sensor_reading (aléas remplacés par leur espérance)
+DEFAULT_PARAMETERS = {
+    'et_loss_factor': 0.5,        # perte d'humidité (points) par mm d'ET
+    'rain_gain': 1.0,             # gain d'humidité par mm de pluie
+    'irrigation_gain': 16.0,      # gain d'humidité pour 30 min d'irrigation (uniforme 12-20)
+    'reservoir_use': 6.0,         # consommation du réservoir pour 30 min (uniforme 4-8)
+    'reservoir_rain_fill': 0.5,   # recharge du réservoir par mm de pluie
+}
+PARAMETER_NAMES = list(DEFAULT_PARAMETERS)
+
+# Durée supposée d'une irrigation détectée (la durée n'est pas enregistrée avec les lectures)
+ASSUMED_IRRIGATION_MINUTES = 30.0
+
+# Champs des transitions, dans l'ordre des lignes du bloc de mémoire partagée
+FIELDS = ('soil_prev', 'soil_next', 'reservoir_prev', 'reservoir_next', 'evapotranspiration', 'rainfall', 'irrigated')
+# Taille maximale (en éléments) des tableaux (transitions, candidats) calculés d'un coup
+BLOCK_ELEMENTS = 2_000_000
+
+# Vues du processus de travail sur la mémoire partagée (fixées par _attach_shared)
+_shared_block: Optional[shared_memory.SharedMemory] = None
+_shared_arrays: Optional[Dict[str, np.ndarray]] = None
+
+
+def prepare_transitions(sensors: pd.DataFrame, historical: Optional[pd.DataFrame] = None) -> Dict[str, np.ndarray]:
+    """
+    Construit les transitions entre lectures consécutives
+
+    Une transition relie deux lectures séparées d'au plus un jour. Une baisse du
+    réservoir signale une irrigation (le modèle ne le vide qu'en irriguant). La
+    pluie est celle de l'historique météo du jour de la lecture, 0 si inconnue.
+
+    Returns:
+        Dictionnaire champ -> tableau (transitions,), voir FIELDS
+    """
+    readings = sensors.copy()
+    readings['_date'] = pd.to_datetime(readings['date'], errors='coerce')
+    for col in ('humidite_sol', 'niveau_reservoir', 'evapotranspiration'):
+        readings[col] = pd.to_numeric(readings[col], errors='coerce')
+    readings = readings.dropna(subset=['_date', 'humidite_sol', 'niveau_reservoir', 'evapotranspiration'])
+    readings = readings.sort_values('_date', kind='stable').reset_index(drop=True)
+
+    rain_by_day = {}
+    if historical is not None and len(historical):
+        days = pd.to_datetime(historical['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+        rain_by_day = pd.to_numeric(historical['pluviometrie'], errors='coerce').groupby(days).mean().dropna().to_dict()
+
+    soil = readings['humidite_sol'].to_numpy(float)
+    reservoir = readings['niveau_reservoir'].to_numpy(float)
+    gap_days = readings['_date'].diff().dt.total_seconds().to_numpy()[1:] / 86400
+    valid = gap_days <= 1
+    next_days = readings['_date'].dt.strftime('%Y-%m-%d').to_numpy()[1:]
+
+    transitions = {
+        'soil_prev': soil[:-1],
+        'soil_next': soil[1:],
+        'reservoir_prev': reservoir[:-1],
+        'reservoir_next': reservoir[1:],
+        # L'ET de la nouvelle lecture est celle qui fait baisser l'humidité
+        'evapotranspiration': readings['evapotranspiration'].to_numpy(float)[1:],
+        'rainfall': np.array([rain_by_day.get(day, 0.0) for day in next_days], dtype=float),
+        'irrigated': (reservoir[1:] < reservoir[:-1]).astype(float),
+    }
+    return {name: values[valid] for name, values in transitions.items()}
+
+
+def evaluate_candidates(data: Dict[str, np.ndarray], candidates: np.ndarray) -> np.ndarray:
+    """
+    Erreur de prédiction à un pas de chaque jeu de constantes
+
+    Args:
+        data: Transitions (voir prepare_transitions)
+        candidates: Tableau (candidats, len(PARAMETER_NAMES))
+
+    Returns:
+        Tableau (candidats, 2) : RMSE de l'humidité du sol et du réservoir (points de %)
+    """
+    n_transitions = len(data['soil_prev'])
+    errors = np.full((len(candidates), 2), np.nan)
+    if n_transitions == 0:
+        return errors
+
+    soil_prev, soil_next = data['soil_prev'][:, None], data['soil_next'][:, None]
+    reservoir_prev, reservoir_next = data['reservoir_prev'][:, None], data['reservoir_next'][:, None]
+    et, rain = data['evapotranspiration'][:, None], data['rainfall'][:, None]
+    irrigated = data['irrigated'][:, None] > 0
+    gain_factor = min(max(ASSUMED_IRRIGATION_MINUTES / 30.0, 0.3), 2.0)
+    use_factor = min(ASSUMED_IRRIGATION_MINUTES / 30.0, 2.0)
+
+    batch = max(1, BLOCK_ELEMENTS // n_transitions)
+    for start in range(0, len(candidates), batch):
+        params = {name: candidates[start:start + batch, i][None, :] for i, name in enumerate(PARAMETER_NAMES)}
+        soil = np.clip(soil_prev - params['et_loss_factor'] * et + params['rain_gain'] * rain
+                       + np.where(irrigated, params['irrigation_gain'] * gain_factor, 0.0), 0.0, 100.0)
+        reservoir = np.clip(np.where(irrigated, reservoir_prev - params['reservoir_use'] * use_factor,
+                                     reservoir_prev + params['reservoir_rain_fill'] * rain), 0.0, 100.0)
+        errors[start:start + batch, 0] = np.sqrt(((soil - soil_next) ** 2).mean(axis=0))
+        errors[start:start + batch, 1] = np.sqrt(((reservoir - reservoir_next) ** 2).mean(axis=0))
+    return errors
+
+
+def _attach_shared(name: str, n_transitions: int) -> None:
+    """Initialisation d'un processus de travail : vues sur les transitions partagées"""
+    global _shared_block, _shared_arrays
+    _shared_block = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(FIELDS), n_transitions), dtype=np.float64, buffer=_shared_block.buf)
+    _shared_arrays = {field: block[i] for i, field in enumerate(FIELDS)}
+
+
+def _evaluate_shared(candidates: np.ndarray) -> np.ndarray:
+    """Tâche d'un processus de travail : seuls les candidats transitent par pickle"""
+    return evaluate_candidates(_shared_arrays, candidates)
+
+
+class SimulatorCalibrator:
+    """
+    Cale les constantes du bilan hydrique sur les trajectoires de sensor_data.csv
+
+    Les candidats sont répartis par lots sur un ProcessPoolExecutor. Les
+    transitions sont copiées une seule fois dans un bloc de mémoire partagée
+    que chaque processus mappe à son démarrage : une tâche ne transporte que
+    ses candidats, et les lots étant indépendants le temps décroît avec le
+    nombre de cœurs.
+    """
+
+    def __init__(self, sensors: pd.DataFrame, historical: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            sensors: Lectures de capteurs enregistrées (colonnes de SENSOR_COLUMNS)
+            historical: Historique météo (date, pluviometrie) pour la pluie du jour
+        """
+        self.transitions = prepare_transitions(sensors, historical)
+        if len(self.transitions['soil_prev']) == 0:
+            raise ValueError("Aucune paire de lectures consécutives pour le calage")
+
+    @classmethod
+    def from_files(cls, sensor_csv: str = SENSOR_CSV_DATA_PATH, historical_csv: str = CSV_DATA_PATH) -> 'SimulatorCalibrator':
+        """
+        Construit le calage depuis les fichiers de données configurés
+
+        Les lectures passent par SensorDataLoader : en mode tampon circulaire
+        (SENSOR_RING_BUFFER_CAPACITY > 0), ce sont celles du tampon et non du CSV.
+        """
+        sensors = SensorDataLoader(sensor_csv).get_history()
+        if sensors is None:
+            raise FileNotFoundError(f"Données de capteurs introuvables : {sensor_csv}")
+        historical = HistoricalDataLoader(historical_csv).data if os.path.exists(historical_csv) else None
+        return cls(sensors, historical)
+
+    def __len__(self) -> int:
+        return len(self.transitions['soil_prev'])
+
+    @staticmethod
+    def grid(ranges: Dict[str, Sequence[float]]) -> np.ndarray:
+        """
+        Candidats de toutes les combinaisons d'une grille
+
+        Args:
+            ranges: Constante -> valeurs à essayer ; les constantes absentes gardent leur défaut
+        """
+        unknown = set(ranges) - set(DEFAULT_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Constantes inconnues : {', '.join(sorted(unknown))}")
+        axes = [list(ranges.get(name, [DEFAULT_PARAMETERS[name]])) for name in PARAMETER_NAMES]
+        return np.array(list(product(*axes)), dtype=float)
+
+    def calibrate(self, candidates: np.ndarray, workers: int = CALIBRATION_WORKERS,
+                  chunk_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Évalue les candidats et les classe par erreur croissante
+
+        Args:
+            candidates: Tableau (candidats, len(PARAMETER_NAMES)), ex. grid(...)
+            workers: Nombre de processus (0 = nombre de cœurs, 1 = dans le processus courant)
+            chunk_size: Candidats par tâche (par défaut, quatre tâches par processus)
+
+        Returns:
+            DataFrame des constantes avec soil_rmse, reservoir_rmse et loss (somme des deux)
+        """
+        candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+        if candidates.shape[1] != len(PARAMETER_NAMES):
+            raise ValueError(f"Candidats attendus avec {len(PARAMETER_NAMES)} colonnes ({', '.join(PARAMETER_NAMES)})")
+        workers = workers or os.cpu_count() or 1
+        started = time.time()
+
+        if workers <= 1:
+            errors = evaluate_candidates(self.transitions, candidates)
+        else:
+            errors = self._calibrate_parallel(candidates, workers, chunk_size)
+
+        result = pd.DataFrame(candidates, columns=PARAMETER_NAMES)
+        result['soil_rmse'] = errors[:, 0]
+        result['reservoir_rmse'] = errors[:, 1]
+        result['loss'] = result['soil_rmse'] + result['reservoir_rmse']
+        logger.info(f"[CALIBRATION] {len(candidates)} candidats évalués sur {len(self)} transitions "
+                    f"en {time.time() - started:.2f}s ({workers} processus)")
+        return result.sort_values('loss', kind='stable').reset_index(drop=True)
+
+    def _calibrate_parallel(self, candidates: np.ndarray, workers: int, chunk_size: Optional[int]) -> np.ndarray:
+        """Répartit les candidats par lots sur un pool de processus partageant les transitions"""
+        n_transitions = len(self)
+        block = shared_memory.SharedMemory(create=True, size=len(FIELDS) * n_transitions * 8)
+        shared = np.ndarray((len(FIELDS), n_transitions), dtype=np.float64, buffer=block.buf)
+        try:
+            for i, field in enumerate(FIELDS):
+                shared[i] = self.transitions[field]
+
+            chunk_size = chunk_size or max(1, -(-len(candidates) // (workers * 4)))
+            chunks = [candidates[start:start + chunk_size] for start in range(0, len(candidates), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                     initargs=(block.name, n_transitions)) as pool:
+                return np.concatenate(list(pool.map(_evaluate_shared, chunks)))
+        finally:
+            del shared
+            block.close()
+            block.unlink()
+
+
+if __name__ == '__main__':
+    calibrator = SimulatorCalibrator.from_files()
+    ranges = {
+        'et_loss_factor': np.linspace(0.1, 1.5, 15),
+        'rain_gain': np.linspace(0.2, 2.0, 10),
+        'irrigation_gain': np.linspace(4.0, 30.0, 14),
+        'reservoir_use': np.linspace(1.0, 12.0, 12),
+        'reservoir_rain_fill': np.linspace(0.0, 1.5, 7),
+    }
+    ranking = calibrator.calibrate(SimulatorCalibrator.grid(ranges))
+    baseline = calibrator.calibrate(SimulatorCalibrator.grid({}), workers=1)
+    print(f"Transitions : {len(calibrator)}")
+    print(f"Constantes actuelles : erreur {baseline.loc[0, 'loss']:.2f}")
+    print("Meilleurs candidats :")
+    print(ranking.head(5).to_string(index=False))
@@ -5,28 +5,51 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 from pathlib import Path
+from app.similarity_index import SimilarConditionsIndex
+from app.storage import create_storage
+
+# Types des colonnes (fixent le schéma du jeu Parquet, voir app/storage.py)
+HISTORICAL_SCHEMA = {
+    'date': 'string',
+    'temperature': 'float',
+    'humidite_air': 'float',
+    'pluviometrie': 'float',
+    'irrigation': 'int',
+    'type_culture': 'string'
+}
 
 
 class HistoricalDataLoader:
     """Charge et analyse les données historiques d'irrigation"""
     
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, columns: Optional[List[str]] = None,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None):
         """
         Initialise le chargeur de données
         
         Args:
             csv_path: Chemin vers le fichier CSV contenant les données historiques
+            columns: Colonnes à charger (toutes par défaut)
+            start_date: Date ISO de début (incluse) des enregistrements à charger
+            end_date: Date ISO de fin (incluse) des enregistrements à charger
         """
         self.csv_path = Path(csv_path)
+        # Fichier CSV ou jeu Parquet selon STORAGE_BACKEND
+        self._storage = create_storage(csv_path, date_column='date', schema=HISTORICAL_SCHEMA)
+        self.columns = columns
+        self.start_date = start_date
+        self.end_date = end_date
         self.data: Optional[pd.DataFrame] = None
+        self._similarity_index: Optional[SimilarConditionsIndex] = None
         self.load_data()
     
     def load_data(self) -> None:
-        """Charge les données depuis le fichier CSV"""
-        if not self.csv_path.exists():
+        """Charge les données depuis le stockage (colonnes et période demandées uniquement)"""
+        if not self._storage.exists():
             raise FileNotFoundError(f"Le fichier CSV n'existe pas : {self.csv_path}")
         
-        self.data = pd.read_csv(self.csv_path)
+        self.data = self._storage.read(columns=self.columns, start=self.start_date, end=self.end_date)
+        self._similarity_index = None
         
         # Vérification des colonnes requises
         required_columns = ['temperature', 'humidite_air', 'pluviometrie', 'irrigation']
@@ -135,6 +158,69 @@ class HistoricalDataLoader:
         
         return similar
     
+    def build_similarity_index(self, reviews: Optional[pd.DataFrame] = None) -> SimilarConditionsIndex:
+        """
+        Construit l'index des conditions historiques (recherche des plus proches voisins)
+        
+        Args:
+            reviews: Revues d'experts dont la note est associée aux situations du même jour
+        
+        Returns:
+            L'index construit, réutilisé jusqu'au prochain chargement des données
+        """
+        self._similarity_index = SimilarConditionsIndex(self.data, reviews=reviews)
+        return self._similarity_index
+    
+    def get_nearest_conditions(self, temperature: float, humidity: float, rainfall: float,
+                               humidite_sol: Optional[float] = None, k: int = 5) -> List[Dict]:
+        """
+        Trouve les k situations historiques les plus proches des conditions actuelles
+        
+        Contrairement à get_similar_conditions, la recherche passe par un index
+        (arbre k-d sur les grandeurs normalisées) construit une seule fois.
+        
+        Args:
+            temperature: Température actuelle
+            humidity: Humidité de l'air actuelle
+            rainfall: Pluviométrie actuelle
+            humidite_sol: Humidité du sol actuelle (utilisée si l'historique la contient)
+            k: Nombre de voisins
+        
+        Returns:
+            Liste de voisins (conditions, date, irrigation, note des revues, distance)
+        """
+        if self._similarity_index is None:
+            self.build_similarity_index()
+        return self._similarity_index.nearest(temperature, humidity, rainfall, humidite_sol=humidite_sol, k=k)
+    
+    def get_similar_situations_for_llm(self, temperature: float, humidity: float, rainfall: float,
+                                       humidite_sol: Optional[float] = None, k: int = 5) -> str:
+        """
+        Génère un résumé des situations passées les plus proches pour l'agent LLM
+        
+        Returns:
+            Chaîne de caractères listant les voisins et leur issue
+        """
+        neighbours = self.get_nearest_conditions(temperature, humidity, rainfall, humidite_sol=humidite_sol, k=k)
+        if not neighbours:
+            return ""
+        
+        lines = [
+            "SITUATIONS PASSÉES SIMILAIRES",
+            "=============================",
+        ]
+        for neighbour in neighbours:
+            outcome = {1: "IRRIGUER", 0: "NE PAS IRRIGUER"}.get(neighbour['irrigation'], "inconnue")
+            conditions = (
+                f"{neighbour.get('temperature', 0):.1f}°C, humidité air {neighbour.get('humidite_air', 0):.0f}%, "
+                f"pluie {neighbour.get('pluviometrie', 0):.1f}mm"
+            )
+            if 'humidite_sol' in neighbour:
+                conditions += f", humidité sol {neighbour['humidite_sol']:.1f}%"
+            review = f", note des experts {neighbour['review_score']:.1f}/5" if neighbour['review_score'] is not None else ""
+            lines.append(f"- {neighbour['date'] or 'date inconnue'} : {conditions} → décision {outcome}{review}")
+        return "\n".join(lines)
+    
     def get_summary_for_llm(self) -> str:
         """
         Génère un résumé textuel des données historiques pour l'agent LLM
@@ -0,0 +1,147 @@
+"""
+Cache des décisions de l'agent IA, indexé par une empreinte quantifiée des conditions
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from config import DECISION_CACHE_PATH, DECISION_CACHE_MAX_ENTRIES, DECISION_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Pas de quantification par grandeur : deux états dans le même seau partagent la décision
+SENSOR_BUCKETS = {
+    'humidite_sol': 1.0,
+    'niveau_reservoir': 1.0,
+    'temperature_sol': 1.0,
+    'evapotranspiration': 0.5,
+}
+WEATHER_BUCKETS = {
+    'temperature': 1.0,
+    'humidity': 5.0,
+    'rainfall': 0.5,
+    'rainfall_3h': 0.5,
+}
+
+
+def _bucket(value, step: float) -> Optional[int]:
+    """Index du seau de largeur `step` contenant la valeur"""
+    try:
+        return int(float(value) // step)
+    except (TypeError, ValueError):
+        return None
+
+
+class DecisionCache:
+    """Cache LRU avec expiration, persisté dans un fichier JSON"""
+
+    def __init__(self, path: str = DECISION_CACHE_PATH, max_entries: int = DECISION_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = DECISION_CACHE_TTL_SECONDS):
+        """
+        Args:
+            path: Fichier JSON de persistance
+            max_entries: Nombre maximal d'entrées (les moins récemment utilisées sont évincées)
+            ttl_seconds: Durée de validité d'une entrée
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def fingerprint(sensor_data: Dict, weather: Dict, reviews_summary: str, context: str = '') -> str:
+        """
+        Empreinte de l'état courant
+
+        Les grandeurs de capteurs et météo sont quantifiées (ex. humidité du sol
+        au pourcent près) ; le résumé des revues et le contexte (ex. culture de
+        la zone) sont pris tels quels.
+        """
+        state = {
+            'context': context,
+            'sensors': {key: _bucket(sensor_data.get(key), step) for key, step in SENSOR_BUCKETS.items()},
+            'weather': {key: _bucket(weather.get(key), step) for key, step in WEATHER_BUCKETS.items()},
+            'reviews': hashlib.sha1(reviews_summary.encode('utf-8')).hexdigest(),
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retourne une copie de la décision en cache, ou None (absente ou expirée)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['created_at'] >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry['decision'])
+
+    def put(self, key: str, decision: Dict) -> None:
+        """Enregistre une décision et persiste le cache"""
+        with self._lock:
+            self._entries[key] = {
+                'created_at': time.time(),
+                'decision': {
+                    'decision': decision['decision'],
+                    'duree_minutes': decision.get('duree_minutes', 0),
+                    'explication': decision.get('explication', '')
+                }
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def get_stats(self) -> Dict:
+        """Compteurs de succès/échecs et taille du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+    def _load(self) -> None:
+        """Charge les entrées non expirées depuis le disque"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CACHE] Cache de décisions illisible, ignoré : {e}")
+            return
+        now = time.time()
+        # Les entrées sont stockées de la moins à la plus récemment utilisée
+        for key, entry in stored.get('entries', []):
+            if now - entry.get('created_at', 0) < self.ttl_seconds:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        """Écrit le cache de façon atomique (appelé sous verrou)"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"[CACHE] Impossible de persister le cache de décisions : {e}")
@@ -0,0 +1,136 @@
+"""
+Coordination des décisions : au plus une décision en cours par zone, demandes concurrentes regroupées
+"""
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Set
+import threading
+import logging
+from app.metrics import DECISION_TRIGGERS
+
+logger = logging.getLogger(__name__)
+
+# Fonction de décision : zones -> résultat par zone (même format que make_cycle_decisions)
+DecideFunc = Callable[[List[str]], Dict[str, Dict]]
+
+
+class DecisionCoordinator:
+    """
+    Sérialise les décisions par zone (planifiées, manuelles, cycles)
+
+    Une demande pour une zone libre démarre aussitôt. Une demande pour une zone
+    dont la décision est en cours est reportée : toutes les demandes reçues
+    pendant cette décision sont fusionnées en une seule décision suivante, lancée
+    dès la fin de la décision en cours. Une zone a donc au plus une décision en
+    cours et une en attente, quelle que soit la lenteur du LLM.
+
+    Chaque demande est comptée par zone selon son issue : 'started' (exécutée),
+    'skipped' (zone occupée, reportée à la décision suivante) ou 'merged'
+    (décision suivante déjà prévue, la demande s'y ajoute).
+    """
+
+    def __init__(self, follow_up: DecideFunc):
+        """
+        Args:
+            follow_up: Décision lancée pour les zones ayant des demandes reportées
+                (ex. cycle de décision sur ces zones, pompe comprise)
+        """
+        self._follow_up = follow_up
+        self._lock = threading.Lock()
+        self._running: Set[str] = set()
+        # Zone -> résultat de la décision suivante, attendu par les demandes reportées
+        self._pending: Dict[str, Future] = {}
+        self._stats = {'started': 0, 'skipped': 0, 'merged': 0, 'follow_up_runs': 0}
+        self._last_outcomes: Dict[str, Dict] = {}
+
+    def run(self, zone_ids: List[str], decide: DecideFunc, trigger: str = 'manual', wait: bool = True,
+            on_deferred: Optional[Callable[[str, str], None]] = None) -> Dict[str, Dict]:
+        """
+        Décide pour des zones en respectant une décision à la fois par zone
+
+        Args:
+            zone_ids: Zones concernées
+            decide: Fonction de décision appelée avec les zones libres
+            trigger: Origine de la demande ('scheduled', 'manual', 'cycle'...), pour le suivi
+            wait: Attendre le résultat de la décision suivante pour les zones reportées ;
+                sinon leur résultat est {'zone_id', 'deferred': 'skipped' | 'merged'}
+            on_deferred: Fonction appelée avec (zone_id, issue) pour chaque zone reportée
+
+        Returns:
+            Dictionnaire zone_id -> résultat de décision, dans l'ordre de zone_ids
+        """
+        started: List[str] = []
+        deferred: Dict[str, Future] = {}
+        outcomes: Dict[str, str] = {}
+        with self._lock:
+            for zone_id in zone_ids:
+                if zone_id not in self._running:
+                    self._running.add(zone_id)
+                    started.append(zone_id)
+                    outcome = 'started'
+                elif zone_id in self._pending:
+                    deferred[zone_id] = self._pending[zone_id]
+                    outcome = 'merged'
+                else:
+                    deferred[zone_id] = self._pending[zone_id] = Future()
+                    outcome = 'skipped'
+                outcomes[zone_id] = outcome
+                self._count(zone_id, outcome, trigger)
+
+        for zone_id in deferred:
+            logger.info(f"[COORDINATOR] Décision en cours pour la zone {zone_id} : demande '{trigger}' "
+                        f"{'reportée' if outcomes[zone_id] == 'skipped' else 'fusionnée avec la décision suivante'}")
+            if on_deferred is not None:
+                on_deferred(zone_id, outcomes[zone_id])
+
+        results: Dict[str, Dict] = {}
+        if started:
+            try:
+                results.update(decide(started))
+            finally:
+                self._release(started)
+
+        for zone_id, future in deferred.items():
+            results[zone_id] = future.result() if wait else {'zone_id': zone_id, 'deferred': outcomes[zone_id]}
+        return {zone_id: results[zone_id] for zone_id in zone_ids}
+
+    def _count(self, zone_id: str, outcome: str, trigger: str) -> None:
+        """Compte l'issue d'une demande (appelé sous verrou)"""
+        self._stats[outcome] += 1
+        self._last_outcomes[zone_id] = {'outcome': outcome, 'trigger': trigger}
+        DECISION_TRIGGERS.inc(zone=zone_id, outcome=outcome)
+
+    def _release(self, zone_ids: List[str]) -> None:
+        """Libère les zones décidées, ou lance leur décision suivante si des demandes ont été reportées"""
+        with self._lock:
+            follow_ups = {zone_id: self._pending.pop(zone_id) for zone_id in zone_ids if zone_id in self._pending}
+            for zone_id in zone_ids:
+                if zone_id not in follow_ups:
+                    self._running.discard(zone_id)
+            if follow_ups:
+                self._stats['follow_up_runs'] += 1
+        if follow_ups:
+            # Les zones restent réservées : la décision suivante s'exécute hors du thread appelant
+            threading.Thread(target=self._run_follow_up, args=(follow_ups,),
+                             name='decision-follow-up', daemon=True).start()
+
+    def _run_follow_up(self, follow_ups: Dict[str, Future]) -> None:
+        zone_ids = list(follow_ups)
+        logger.info(f"[COORDINATOR] Décision suivante pour {len(zone_ids)} zone(s) : {', '.join(zone_ids)}")
+        try:
+            results = self._follow_up(zone_ids)
+        except Exception as e:
+            logger.error(f"[COORDINATOR] Échec de la décision suivante : {e}", exc_info=True)
+            results = {zone_id: {'zone_id': zone_id, 'error': str(e)} for zone_id in zone_ids}
+        for zone_id, future in follow_ups.items():
+            future.set_result(results.get(zone_id, {'zone_id': zone_id, 'error': 'Aucun résultat'}))
+        self._release(zone_ids)
+
+    def get_stats(self) -> Dict:
+        """Compteurs des demandes (exécutées, reportées, fusionnées) et zones occupées"""
+        with self._lock:
+            return {
+                **self._stats,
+                'running_zones': sorted(self._running),
+                'pending_zones': sorted(self._pending),
+                'last_outcomes': {zone_id: dict(outcome) for zone_id, outcome in self._last_outcomes.items()}
+            }
@@ -1,12 +1,23 @@
 """
 Moteur de décision principal qui orchestre l'ensemble du processus
 """
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
 from app.sensor_data_loader import SensorDataLoader
+from app.data_loader import HistoricalDataLoader
 from app.review_manager import ReviewManager
 from app.weather_api import WeatherAPI
 from app.agent import IrrigationAgent
-from config import SENSOR_CSV_DATA_PATH, REVIEWS_CSV_DATA_PATH
+from app.rule_engine import RuleEngine
+from app.decision_cache import DecisionCache
+from app.metrics import STAGE_SECONDS, DECISIONS
+from app.tracing import DecisionTrace, TraceStore, activate, span
+from app.decision_history import DecisionHistory
+from app.pump_controller import interlock_refusal
+from app.zones import Zone, ZoneRegistry
+from config import (REVIEWS_CSV_DATA_PATH, CSV_DATA_PATH, RULE_ENGINE_ENABLED, DECISION_CACHE_ENABLED,
+                    ZONE_MAX_CONCURRENT_DECISIONS, SIMILAR_SITUATIONS_K, DECISION_TRACE_ENABLED,
+                    DECISION_HISTORY_ENABLED)
 import uuid
 import datetime
 import time
@@ -18,41 +29,124 @@ logger = logging.getLogger(__name__)
 class DecisionEngine:
     """Moteur principal de prise de décision d'irrigation"""
     
-    def __init__(self):
-        """Initialise le moteur de décision avec tous ses composants"""
-        self.sensor_loader = SensorDataLoader(SENSOR_CSV_DATA_PATH)
+    def __init__(self, zone_registry: Optional[ZoneRegistry] = None):
+        """
+        Initialise le moteur de décision avec tous ses composants
+        
+        Args:
+            zone_registry: Zones à piloter (par défaut chargées depuis ZONES_CONFIG_PATH)
+        """
+        self.zone_registry = zone_registry or ZoneRegistry.load()
+        # Un chargeur par zone (le registre garantit un fichier de capteurs distinct par zone) :
+        # les décisions de zones différentes ne partagent jamais un chargeur
+        self.sensor_loaders: Dict[str, SensorDataLoader] = {
+            zone.id: SensorDataLoader(zone.sensor_csv_path) for zone in self.zone_registry
+        }
+        # Compatibilité : chargeur de la zone par défaut
+        self.sensor_loader = self.sensor_loaders[self.zone_registry.default_zone_id]
         self.weather_api = WeatherAPI()
         self.review_manager = ReviewManager(REVIEWS_CSV_DATA_PATH)
         self.agent = IrrigationAgent()
+        self.rule_engine = RuleEngine() if RULE_ENGINE_ENABLED else None
+        self.decision_cache = DecisionCache() if DECISION_CACHE_ENABLED else None
+        self.historical_loader = self._load_historical_index() if SIMILAR_SITUATIONS_K > 0 else None
+        self.trace_store = TraceStore() if DECISION_TRACE_ENABLED else None
+        self.decision_history = DecisionHistory() if DECISION_HISTORY_ENABLED else None
     
-    def make_irrigation_decision(self) -> Dict:
+    def _load_historical_index(self) -> Optional[HistoricalDataLoader]:
+        """Charge l'historique et indexe ses conditions (None si indisponible)"""
+        try:
+            loader = HistoricalDataLoader(CSV_DATA_PATH)
+            loader.build_similarity_index(reviews=self.review_manager.data)
+            return loader
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"[DECISION_ENGINE] Historique indisponible, situations similaires ignorées : {e}")
+            return None
+    
+    def make_irrigation_decision(self, zone_id: Optional[str] = None,
+                                 progress_callback: Optional[Callable[[str, int], None]] = None,
+                                 stream_callback: Optional[Callable[[Dict], None]] = None,
+                                 weather: Optional[Dict] = None) -> Dict:
         """
-        Prend une décision d'irrigation complète
+        Prend une décision d'irrigation complète pour une zone
+        
+        Args:
+            zone_id: Zone concernée (zone par défaut si None)
+            progress_callback: Fonction appelée à chaque étape avec (étape, pourcentage)
+            stream_callback: Si fourni, la réponse de l'agent IA est générée en
+                streaming et ses événements sont transmis à cette fonction
+            weather: Données météo déjà récupérées pour la position de la zone
+        
+        Raises:
+            KeyError: si la zone est inconnue
         
         Returns:
             Dictionnaire contenant :
+            - zone_id: Zone concernée
             - decision: "IRRIGUER" ou "NE PAS IRRIGUER"
             - explication: Explication de la décision
             - metadata: Informations supplémentaires (météo, stats, etc.)
         """
+        zone = self.zone_registry.get(zone_id)
         total_start = time.time()
-        logger.info("[DECISION_ENGINE] ===== Début de la prise de décision =====")
+        logger.info(f"[DECISION_ENGINE] ===== Début de la prise de décision (zone {zone.id}) =====")
+        progress = progress_callback or (lambda step, percent: None)
+        trace = self._new_trace(zone)
+        
+        with activate(trace):
+            context = self._prepare_decision(zone, progress, weather, trace)
+            
+            if context['decision'] is None:
+                logger.info("[DECISION_ENGINE] Étape 4/4: Appel à l'agent IA...")
+                progress("Analyse par l'agent IA", 40)
+                step_start = time.time()
+                with span('decision_engine.agent'):
+                    decision_result = self.agent.make_decision(**self._agent_request(context),
+                                                               stream_callback=stream_callback)
+                step_duration = time.time() - step_start
+                logger.info(f"[DECISION_ENGINE] ✓ Décision IA obtenue en {step_duration:.2f}s")
+                self._record_llm_decision(context, decision_result)
+            
+            result = self._finalize_decision(context, progress)
+        
+        total_duration = time.time() - total_start
+        logger.info(f"[DECISION_ENGINE] ===== Décision complète terminée en {total_duration:.2f}s =====")
+        logger.info(f"[DECISION_ENGINE] Résultat final: decision={result['decision']}, duration={result['duration_minutes']} min")
+        
+        return result
+    
+    def _prepare_decision(self, zone: Zone, progress: Callable[[str, int], None],
+                          weather: Optional[Dict] = None, trace: Optional[DecisionTrace] = None) -> Dict:
+        """
+        Rassemble les données d'une zone et tranche la décision sans LLM si possible
+        
+        Returns:
+            Contexte de décision ; 'decision' vaut None si l'agent IA doit être sollicité
+        """
+        sensor_loader = self.sensor_loaders[zone.id]
+        started = time.perf_counter()
         
         # 1. Récupérer les données météo actuelles
         logger.info("[DECISION_ENGINE] Étape 1/4: Récupération des données météo...")
-        step_start = time.time()
-        current_weather = self.weather_api.get_current_weather()
-        weather_summary = self.weather_api.get_weather_summary_for_llm()
-        step_duration = time.time() - step_start
+        progress("Récupération des données météo", 5)
+        step_start = time.perf_counter()
+        with span('decision_engine.weather', prefetched=weather is not None):
+            current_weather = weather if weather is not None else self._fetch_weather(zone.latitude, zone.longitude)
+            weather_summary = self.weather_api.get_weather_summary_for_llm(current_weather)
+        step_duration = time.perf_counter() - step_start
         logger.info(f"[DECISION_ENGINE] ✓ Données météo récupérées en {step_duration:.2f}s")
         
         # 2. Récupérer les données de capteurs IoT
         logger.info("[DECISION_ENGINE] Étape 2/4: Récupération des données de capteurs...")
-        step_start = time.time()
-        current_sensor_data = self.sensor_loader.get_current_sensor_data()
-        sensor_summary = self.sensor_loader.get_summary_for_llm()
-        sensor_alerts = self.sensor_loader.get_sensor_alerts()
-        step_duration = time.time() - step_start
+        progress("Récupération des données de capteurs", 20)
+        step_start = time.perf_counter()
+        with span('decision_engine.sensors') as attributes:
+            current_sensor_data = sensor_loader.get_current_sensor_data()
+            sensor_summary = self._zone_header(zone) + sensor_loader.get_summary_for_llm()
+            sensor_alerts = sensor_loader.get_sensor_alerts()
+            attributes['alerts'] = len(sensor_alerts)
+        step_duration = time.perf_counter() - step_start
+        STAGE_SECONDS.observe(step_duration, stage='sensor_load')
         logger.info(f"[DECISION_ENGINE] ✓ Données capteurs récupérées en {step_duration:.2f}s")
         logger.info(f"[DECISION_ENGINE]   - Humidité sol: {current_sensor_data.get('humidite_sol', 'N/A')}%")
         logger.info(f"[DECISION_ENGINE]   - Niveau réservoir: {current_sensor_data.get('niveau_reservoir', 'N/A')}%")
@@ -60,23 +154,171 @@ class DecisionEngine:
         
         # 3. Récupérer le résumé des revues d'expert
         logger.info("[DECISION_ENGINE] Étape 3/4: Récupération des reviews...")
-        step_start = time.time()
-        reviews_summary = self.review_manager.get_summary_for_llm()
-        recent_reviews = self.review_manager.get_recent_reviews(limit=10)
-        step_duration = time.time() - step_start
+        progress("Récupération des revues d'experts", 30)
+        step_start = time.perf_counter()
+        with span('decision_engine.reviews'):
+            reviews_summary = self.review_manager.get_summary_for_llm()
+            recent_reviews = self.review_manager.get_recent_reviews(limit=10)
+        step_duration = time.perf_counter() - step_start
+        STAGE_SECONDS.observe(step_duration, stage='review_summary')
         logger.info(f"[DECISION_ENGINE] ✓ Reviews récupérés en {step_duration:.2f}s")
         
-        # 4. Demander à l'agent IA de prendre une décision
-        logger.info("[DECISION_ENGINE] Étape 4/4: Appel à l'agent IA...")
-        step_start = time.time()
-        decision_result = self.agent.make_decision(
-            weather_summary=weather_summary,
-            sensor_summary=sensor_summary,
-            sensor_alerts=sensor_alerts,
-            reviews_summary=reviews_summary
-        )
-        step_duration = time.time() - step_start
-        logger.info(f"[DECISION_ENGINE] ✓ Décision IA obtenue en {step_duration:.2f}s")
+        context = {
+            'zone': zone,
+            'sensor_loader': sensor_loader,
+            'weather': current_weather,
+            'weather_summary': weather_summary,
+            'sensor_data': current_sensor_data,
+            'sensor_summary': sensor_summary,
+            'sensor_alerts': sensor_alerts,
+            'reviews_summary': reviews_summary,
+            'recent_reviews': recent_reviews,
+            'decision': None,
+            'source': 'llm',
+            'cache_key': None,
+            'trace': trace,
+            'started': started
+        }
+        
+        # 4. Les cas sans ambiguïté (réservoir vide, sol saturé, sol critique) sont
+        # tranchés par les règles ; seuls les cas limites sont soumis au LLM
+        if self.rule_engine is not None:
+            with span('decision_engine.rules') as attributes:
+                decision_result = self.rule_engine.evaluate(current_sensor_data, current_weather)
+                attributes['rule'] = decision_result['rule'] if decision_result is not None else None
+            if decision_result is not None:
+                context.update(decision=decision_result, source='rules')
+                logger.info(f"[DECISION_ENGINE] Étape 4/4: Cas tranché par la règle '{decision_result['rule']}', agent IA non sollicité")
+                return context
+        
+        # Conditions quasi identiques à une décision récente : on la réutilise
+        if self.decision_cache is not None:
+            context['cache_key'] = DecisionCache.fingerprint(current_sensor_data, current_weather, reviews_summary,
+                                                             context=zone.crop or '')
+            with span('decision_engine.cache') as attributes:
+                decision_result = self.decision_cache.get(context['cache_key'])
+                attributes['hit'] = decision_result is not None
+            if decision_result is not None:
+                context.update(decision=decision_result, source='cache')
+                logger.info("[DECISION_ENGINE] Étape 4/4: Décision réutilisée depuis le cache, agent IA non sollicité")
+        
+        return context
+    
+    def _fetch_weather(self, latitude: str, longitude: str) -> Dict:
+        """Récupère la météo d'une position en mesurant la durée de l'appel"""
+        with STAGE_SECONDS.time(stage='weather_fetch'):
+            return self.weather_api.get_current_weather(latitude, longitude)
+    
+    def _new_trace(self, zone: Zone, **attributes) -> Optional[DecisionTrace]:
+        """Nouvelle trace de décision pour une zone (None si les traces sont désactivées)"""
+        if self.trace_store is None:
+            return None
+        return DecisionTrace('decision', zone_id=zone.id, **attributes)
+    
+    def _save_trace(self, context: Dict, decision_id: str, duration_minutes: int) -> Optional[Dict]:
+        """Clôt la trace du contexte et la conserve sous l'identifiant de la décision"""
+        trace = context.get('trace')
+        if trace is None:
+            return None
+        decision_result = context['decision']
+        trace.finish(decision_id, source=context['source'], decision=decision_result['decision'],
+                     duration_minutes=duration_minutes,
+                     safe_default=bool(decision_result.get('safe_default')),
+                     fallback_parse=bool(decision_result.get('fallback_parse')))
+        trace_data = trace.to_dict()
+        self.trace_store.save(trace_data)
+        return trace_data
+    
+    def _record_history(self, context: Dict, result: Dict, trace_data: Optional[Dict]) -> None:
+        """Met en file l'enregistrement de la décision (entrées, résultat, durées des étapes)"""
+        if self.decision_history is None:
+            return
+        if trace_data is not None:
+            timings = {'total_ms': trace_data['root']['duration_ms']}
+            for step in trace_data['root'].get('children', []):
+                timings[step['name']] = round(timings.get(step['name'], 0.0) + (step['duration_ms'] or 0.0), 1)
+        else:
+            timings = {'total_ms': round((time.perf_counter() - context['started']) * 1000, 1)}
+        decision_result = context['decision']
+        inputs = {
+            'weather': context['weather'],
+            'sensors': context['sensor_data'],
+            'sensor_alerts': context['sensor_alerts'],
+            'reviews_summary': context['reviews_summary'],
+            'cache_key': context['cache_key']
+        }
+        self.decision_history.record_decision(result, inputs, timings,
+                                              safe_default=bool(decision_result.get('safe_default')),
+                                              fallback_parse=bool(decision_result.get('fallback_parse')))
+    
+    def record_pump_action(self, zone_id: str, action: str, decision_id: Optional[str] = None,
+                           duration_minutes: Optional[int] = None, reason: Optional[str] = None) -> None:
+        """Enregistre dans l'historique un démarrage ou un arrêt de pompe"""
+        if self.decision_history is not None:
+            self.decision_history.record_pump_action(zone_id, action, decision_id, duration_minutes, reason)
+    
+    def get_decision_history(self, **filters) -> Optional[Dict]:
+        """Page de l'historique des décisions (voir DecisionHistory.query), None si désactivé"""
+        if self.decision_history is None:
+            return None
+        return self.decision_history.query(**filters)
+    
+    def get_decision(self, decision_id: str) -> Optional[Dict]:
+        """Décision enregistrée avec ses entrées, ses actions de pompe et les revues qui la notent"""
+        if self.decision_history is None:
+            return None
+        record = self.decision_history.get(decision_id)
+        if record is not None:
+            record['reviews'] = self.review_manager.get_reviews_for_decision(decision_id)
+        return record
+    
+    def get_last_decision(self, zone_id: str) -> Optional[Dict]:
+        """Dernière décision enregistrée d'une zone (None si aucune ou historique désactivé)"""
+        if self.decision_history is None:
+            return None
+        return self.decision_history.latest(zone_id)
+    
+    def get_decision_trace(self, decision_id: str) -> Optional[Dict]:
+        """Trace d'une décision (None si inconnue ou si les traces sont désactivées)"""
+        if self.trace_store is None:
+            return None
+        return self.trace_store.get(decision_id)
+    
+    def _agent_request(self, context: Dict) -> Dict:
+        """Arguments de l'agent IA (make_decision / make_decisions_batch) pour un contexte"""
+        history_summary = ""
+        if self.historical_loader is not None:
+            history_summary = self.historical_loader.get_similar_situations_for_llm(
+                temperature=context['weather'].get('temperature', 20.0),
+                humidity=context['weather'].get('humidity', 50.0),
+                rainfall=context['weather'].get('rainfall', 0.0),
+                humidite_sol=context['sensor_data'].get('humidite_sol'),
+                k=SIMILAR_SITUATIONS_K
+            )
+        return {
+            'weather_summary': context['weather_summary'],
+            'sensor_summary': context['sensor_summary'],
+            'sensor_alerts': context['sensor_alerts'],
+            'reviews_summary': context['reviews_summary'],
+            'history_summary': history_summary
+        }
+    
+    def _record_llm_decision(self, context: Dict, decision_result: Dict) -> None:
+        """Attache la décision de l'agent IA au contexte et la met en cache"""
+        context['decision'] = decision_result
+        # Ne pas mettre en cache les décisions de repli (erreur ou JSON invalide)
+        if (context['cache_key'] is not None and not decision_result.get('safe_default')
+                and not decision_result.get('fallback_parse')):
+            self.decision_cache.put(context['cache_key'], decision_result)
+    
+    def _finalize_decision(self, context: Dict, progress: Callable[[str, int], None]) -> Dict:
+        """Valide la durée, fait évoluer les capteurs et construit le résultat de la décision"""
+        zone = context['zone']
+        sensor_loader = context['sensor_loader']
+        decision_result = context['decision']
+        decision_source = context['source']
+        DECISIONS.inc(zone=zone.id, source=decision_source)
+        
         logger.info(f"[DECISION_ENGINE]   - Décision: {decision_result.get('decision', 'N/A')}")
         logger.info(f"[DECISION_ENGINE]   - Durée proposée: {decision_result.get('duree_minutes', 0)} min")
         
@@ -90,69 +332,198 @@ class DecisionEngine:
         
         logger.info(f"[DECISION_ENGINE] Durée finale validée: {duration_minutes} min")
 
+        # Verrouillage de la pompe vérifié sur les capteurs d'avant la décision : un
+        # démarrage refusé ne doit pas apparaître comme une irrigation dans les lectures
+        irrigated_minutes = duration_minutes
+        interlock = None
+        if decision_result['decision'] == 'IRRIGUER':
+            interlock = interlock_refusal(duration_minutes, context['sensor_data'].get('niveau_reservoir'))
+            if interlock is not None:
+                irrigated_minutes = 0
+                logger.warning(f"[DECISION_ENGINE] Irrigation impossible pour la zone {zone.id} : {interlock}")
+
         # 5. Générer et ajouter une nouvelle lecture de capteurs
         logger.info("[DECISION_ENGINE] Génération nouvelle lecture de capteurs...")
-        step_start = time.time()
-        new_sensor_reading = self.sensor_loader.generate_new_sensor_reading(
-            current_weather=current_weather,
-            irrigation_decision=decision_result['decision'],
-            irrigation_duration_minutes=duration_minutes
-        )
-        self.sensor_loader.add_sensor_reading(new_sensor_reading)
-        step_duration = time.time() - step_start
+        progress("Mise à jour des capteurs", 90)
+        step_start = time.perf_counter()
+        with span('decision_engine.sensor_update'):
+            new_sensor_reading = sensor_loader.generate_new_sensor_reading(
+                current_weather=context['weather'],
+                irrigation_decision=decision_result['decision'] if interlock is None else 'NE PAS IRRIGUER',
+                irrigation_duration_minutes=irrigated_minutes
+            )
+            sensor_loader.add_sensor_reading(new_sensor_reading)
+        step_duration = time.perf_counter() - step_start
         logger.info(f"[DECISION_ENGINE] ✓ Nouvelle lecture générée en {step_duration:.2f}s")
         
         # 6. Récupérer les données de capteurs mises à jour
-        updated_sensor_data = self.sensor_loader.get_current_sensor_data()
+        updated_sensor_data = sensor_loader.get_current_sensor_data()
+        trace_data = self._save_trace(context, decision_id, duration_minutes)
         
         # 7. Construire la réponse complète
         result = {
             'id': decision_id,
+            'zone_id': zone.id,
             'decision': decision_result['decision'],
             'duration_minutes': duration_minutes,
             'explication': decision_result['explication'],
+            'source': decision_source,
+            'explication_reused': decision_source == 'cache',
             'timestamp': datetime.datetime.now().isoformat(),
             'metadata': {
-                'weather': current_weather,
+                'decision_rule': decision_result.get('rule'),
+                'weather': context['weather'],
                 'sensors': updated_sensor_data,
-                'sensor_alerts': self.sensor_loader.get_sensor_alerts(),
+                # Lecture sur laquelle la décision a été prise (avant la simulation de l'irrigation)
+                'sensors_before': context['sensor_data'],
+                'pump_interlock': interlock,
+                'sensor_alerts': sensor_loader.get_sensor_alerts(),
                 'reviews': {
-                    'recent': recent_reviews,
-                    'summary_text': reviews_summary
+                    'recent': context['recent_reviews'],
+                    'summary_text': context['reviews_summary']
                 },
                 'duration_minutes': duration_minutes
             }
         }
+        self._record_history(context, result, trace_data)
+        return result
+    
+    def make_cycle_decisions(self, zone_ids: Optional[List[str]] = None,
+                             on_zone_decision: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+        """
+        Prend les décisions de plusieurs zones en un seul cycle
         
-        total_duration = time.time() - total_start
-        logger.info(f"[DECISION_ENGINE] ===== Décision complète terminée en {total_duration:.2f}s =====")
-        logger.info(f"[DECISION_ENGINE] Résultat final: decision={result['decision']}, duration={result['duration_minutes']} min")
+        La météo est récupérée une seule fois par position distincte (en parallèle).
+        Les zones tranchées par les règles ou le cache sont décidées aussitôt ; les
+        autres sont soumises ensemble à l'agent IA (make_decisions_batch) avec au
+        plus ZONE_MAX_CONCURRENT_DECISIONS appels simultanés.
         
-        return result
+        Args:
+            zone_ids: Zones à traiter (toutes par défaut)
+            on_zone_decision: Fonction appelée avec (zone_id, résultat) dès qu'une zone est décidée
+        
+        Raises:
+            KeyError: si une zone est inconnue
+        
+        Returns:
+            Dictionnaire zone_id -> résultat de décision, ou {'zone_id', 'error'} en cas d'échec
+        """
+        cycle_start = time.time()
+        locations = self.zone_registry.locations(zone_ids)
+        zones: List[Zone] = [zone for group in locations.values() for zone in group]
+        logger.info(f"[DECISION_ENGINE] ===== Cycle de décision : {len(zones)} zone(s), {len(locations)} position(s) =====")
+        
+        traces = {zone.id: self._new_trace(zone, cycle=True) for zone in zones}
+        
+        def fetch_weather(lat: str, lon: str):
+            # Trace propre à la position, greffée ensuite dans la trace de chaque zone qui la partage
+            location_trace = DecisionTrace('weather') if self.trace_store is not None else None
+            with activate(location_trace), span('decision_engine.weather_fetch', shared_by_zones=len(locations[(lat, lon)])):
+                weather = self._fetch_weather(lat, lon)
+            return weather, (location_trace.root['children'] if location_trace is not None else [])
+        
+        max_workers = max(1, min(ZONE_MAX_CONCURRENT_DECISIONS, len(locations)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='zone-weather') as executor:
+            weather_futures = {
+                executor.submit(fetch_weather, lat, lon): (lat, lon)
+                for lat, lon in locations
+            }
+            weather_by_location = {weather_futures[f]: f.result() for f in as_completed(weather_futures)}
+        
+        results: Dict[str, Dict] = {}
+        
+        def finalize(context: Dict) -> None:
+            zone_id = context['zone'].id
+            try:
+                with activate(context['trace']):
+                    result = self._finalize_decision(context, lambda step, percent: None)
+            except Exception as e:
+                logger.error(f"[DECISION_ENGINE] Échec de la décision pour la zone {zone_id}: {e}", exc_info=True)
+                results[zone_id] = {'zone_id': zone_id, 'error': str(e)}
+                return
+            results[zone_id] = result
+            if on_zone_decision is not None:
+                try:
+                    on_zone_decision(zone_id, result)
+                except Exception as e:
+                    # Une zone dont la décision n'a pu être appliquée n'interrompt pas le cycle
+                    logger.error(f"[DECISION_ENGINE] Décision {result['id']} de la zone {zone_id} non appliquée : {e}",
+                                 exc_info=True)
+                    results[zone_id] = {'zone_id': zone_id, 'decision_id': result['id'],
+                                        'error': f"Décision prise mais non appliquée : {e}"}
+        
+        pending: List[Dict] = []
+        for zone in zones:
+            weather, weather_spans = weather_by_location[zone.location]
+            trace = traces[zone.id]
+            if trace is not None:
+                trace.graft(weather_spans)
+            try:
+                with activate(trace):
+                    context = self._prepare_decision(zone, lambda step, percent: None, weather, trace)
+            except Exception as e:
+                logger.error(f"[DECISION_ENGINE] Échec de la décision pour la zone {zone.id}: {e}", exc_info=True)
+                results[zone.id] = {'zone_id': zone.id, 'error': str(e)}
+                continue
+            if context['decision'] is None:
+                pending.append(context)
+            else:
+                finalize(context)
+        
+        if pending:
+            logger.info(f"[DECISION_ENGINE] Appel à l'agent IA pour {len(pending)} zone(s) en un lot...")
+            
+            def on_decision(index: int, decision_result: Dict) -> None:
+                self._record_llm_decision(pending[index], decision_result)
+                finalize(pending[index])
+            
+            self.agent.make_decisions_batch([self._agent_request(context) for context in pending],
+                                            max_concurrency=ZONE_MAX_CONCURRENT_DECISIONS,
+                                            on_decision=on_decision,
+                                            traces=[context['trace'] for context in pending])
+        
+        logger.info(f"[DECISION_ENGINE] ===== Cycle terminé en {time.time() - cycle_start:.2f}s =====")
+        return {zone.id: results[zone.id] for zone in zones}
     
-    def get_system_status(self) -> Dict:
+    @staticmethod
+    def _zone_header(zone: Zone) -> str:
+        """En-tête du résumé capteurs identifiant la zone et sa culture"""
+        header = f"\nZONE : {zone.name} ({zone.id})"
+        if zone.crop:
+            header += f"\nCULTURE : {zone.crop}"
+        return header + "\n"
+    
+    def get_system_status(self, zone_id: Optional[str] = None) -> Dict:
         """
-        Retourne le statut actuel du système
+        Retourne le statut actuel du système pour une zone
+        
+        Args:
+            zone_id: Zone concernée (zone par défaut si None)
         
         Returns:
             Dictionnaire contenant les informations de statut
         """
         try:
-            weather = self.weather_api.get_current_weather()
-            sensor_data = self.sensor_loader.get_current_sensor_data()
-            sensor_stats = self.sensor_loader.get_sensor_statistics()
+            zone = self.zone_registry.get(zone_id)
+            sensor_loader = self.sensor_loaders[zone.id]
+            weather = self.weather_api.get_current_weather(zone.latitude, zone.longitude)
+            sensor_data = sensor_loader.get_current_sensor_data()
+            sensor_stats = sensor_loader.get_sensor_statistics()
             review_stats = self.review_manager.get_statistics()
             recent_reviews = self.review_manager.get_recent_reviews(limit=5)
             
             return {
                 'status': 'operational',
+                'zone': zone.to_dict(),
                 'weather_available': weather['description'] != 'Données non disponibles',
                 'sensor_data_available': sensor_data.get('available', False),
                 'current_weather': weather,
                 'current_sensors': sensor_data,
                 'sensor_summary': sensor_stats,
                 'review_summary': review_stats,
-                'recent_reviews': recent_reviews
+                'recent_reviews': recent_reviews,
+                'decision_cache': self.decision_cache.get_stats() if self.decision_cache is not None else None,
+                'llm': self.agent.get_model_stats()
             }
         except Exception as e:
             return {
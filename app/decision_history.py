@@ -0,0 +1,240 @@
+"""
+Historique des décisions (entrées, résultat, durées, actions de pompe) dans une base SQLite en mode WAL
+"""
+from pathlib import Path
+from typing import Dict, Optional
+import datetime
+import json
+import queue
+import sqlite3
+import threading
+import logging
+from config import DECISION_HISTORY_PATH
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id TEXT PRIMARY KEY,
+    zone_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    decision TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    source TEXT,
+    explication TEXT,
+    safe_default INTEGER NOT NULL DEFAULT 0,
+    fallback_parse INTEGER NOT NULL DEFAULT 0,
+    total_ms REAL,
+    inputs TEXT,
+    timings TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_timestamp ON decisions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_decisions_zone_timestamp ON decisions (zone_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_decisions_decision_timestamp ON decisions (decision, timestamp);
+
+CREATE TABLE IF NOT EXISTS pump_actions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision_id TEXT,
+    zone_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    action TEXT NOT NULL,
+    duration_minutes INTEGER,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pump_actions_decision ON pump_actions (decision_id);
+CREATE INDEX IF NOT EXISTS idx_pump_actions_zone_timestamp ON pump_actions (zone_id, timestamp);
+"""
+
+# Colonnes retournées par les listes (sans les documents JSON, lus seulement par get)
+SUMMARY_COLUMNS = ('id', 'zone_id', 'timestamp', 'decision', 'duration_minutes', 'source',
+                   'explication', 'safe_default', 'fallback_parse', 'total_ms')
+MAX_PAGE_SIZE = 500
+
+
+def _end_bound(end: str) -> str:
+    """Borne de fin inclusive : une date seule couvre toute la journée"""
+    return end + 'T23:59:59.999999' if len(end) == 10 else end
+
+
+class DecisionHistory:
+    """
+    Historique des décisions interrogeable par période, zone et décision
+
+    Les écritures sont mises en file et appliquées par un thread dédié, par lots
+    dans une seule transaction : la prise de décision n'attend jamais le disque.
+    Le mode WAL permet aux lectures (API) de se faire pendant les écritures ; les
+    horodatages ISO sont indexés et se comparent comme des chaînes.
+    """
+
+    def __init__(self, path: str = DECISION_HISTORY_PATH):
+        """
+        Args:
+            path: Fichier de la base SQLite (créé au besoin)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        conn.close()
+        # Une connexion de lecture par thread (les connexions SQLite ne se partagent pas)
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='decision-history', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        # En WAL, NORMAL ne synchronise qu'aux checkpoints : une écriture ne coûte pas un fsync
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record_decision(self, result: Dict, inputs: Optional[Dict] = None, timings: Optional[Dict] = None,
+                        safe_default: bool = False, fallback_parse: bool = False) -> None:
+        """
+        Met en file l'enregistrement d'une décision (retour immédiat)
+
+        Args:
+            result: Résultat de DecisionEngine (id, zone_id, decision, duration_minutes...)
+            inputs: Données soumises à la décision (météo, capteurs, alertes, résumé des revues)
+            timings: Durées des étapes en millisecondes (dont 'total_ms')
+            safe_default: Décision sécurisée après une erreur du LLM
+            fallback_parse: Décision extraite d'une réponse LLM non JSON
+        """
+        timings = timings or {}
+        row = (
+            result['id'], result['zone_id'], result['timestamp'], result['decision'],
+            int(result.get('duration_minutes', 0) or 0), result.get('source'), result.get('explication'),
+            int(safe_default), int(fallback_parse),
+            timings.get('total_ms'),
+            json.dumps(inputs or {}, ensure_ascii=False, default=str),
+            json.dumps(timings, ensure_ascii=False, default=str),
+            json.dumps(result, ensure_ascii=False, default=str),
+        )
+        self._queue.put(('decision', row))
+
+    def record_pump_action(self, zone_id: str, action: str, decision_id: Optional[str] = None,
+                           duration_minutes: Optional[int] = None, reason: Optional[str] = None) -> None:
+        """Met en file une action de pompe ('start' ou 'stop') liée à une décision"""
+        row = (decision_id, zone_id, datetime.datetime.now().isoformat(), action, duration_minutes, reason)
+        self._queue.put(('pump', row))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            # Tout ce qui est en attente part dans la même transaction
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            decisions = [entry[1] for entry in batch if entry is not None and entry[0] == 'decision']
+            pumps = [entry[1] for entry in batch if entry is not None and entry[0] == 'pump']
+            try:
+                with conn:
+                    if decisions:
+                        conn.executemany(
+                            'INSERT OR REPLACE INTO decisions (id, zone_id, timestamp, decision, duration_minutes, source, '
+                            'explication, safe_default, fallback_parse, total_ms, inputs, timings, result) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', decisions)
+                    if pumps:
+                        conn.executemany(
+                            'INSERT INTO pump_actions (decision_id, zone_id, timestamp, action, duration_minutes, reason) '
+                            'VALUES (?, ?, ?, ?, ?, ?)', pumps)
+            except sqlite3.Error as e:
+                logger.error(f"[HISTORY] Échec de l'écriture de {len(decisions)} décision(s) et "
+                             f"{len(pumps)} action(s) de pompe : {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def flush(self) -> None:
+        """Attend que toutes les écritures en file soient appliquées"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Applique les écritures en attente puis arrête le thread d'écriture"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def query(self, zone_id: Optional[str] = None, decision: Optional[str] = None, source: Optional[str] = None,
+              start: Optional[str] = None, end: Optional[str] = None,
+              limit: int = 50, offset: int = 0) -> Dict:
+        """
+        Décisions filtrées, de la plus récente à la plus ancienne
+
+        Args:
+            start, end: Bornes ISO incluses (une date seule couvre toute la journée de fin)
+            limit: Taille de la page (au plus MAX_PAGE_SIZE)
+            offset: Nombre de décisions à sauter
+
+        Returns:
+            {'items': [...], 'total': nombre de décisions filtrées, 'limit', 'offset'}
+        """
+        conditions, params = [], []
+        for column, value in (('zone_id', zone_id), ('decision', decision), ('source', source)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if start:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end:
+            conditions.append('timestamp <= ?')
+            params.append(_end_bound(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        limit = max(1, min(MAX_PAGE_SIZE, int(limit)))
+        offset = max(0, int(offset))
+
+        conn = self._reader()
+        total = conn.execute(f'SELECT COUNT(*) FROM decisions {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM decisions {where} ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        items = []
+        for row in rows:
+            item = dict(row)
+            item['safe_default'] = bool(item['safe_default'])
+            item['fallback_parse'] = bool(item['fallback_parse'])
+            items.append(item)
+        return {'items': items, 'total': total, 'limit': limit, 'offset': offset}
+
+    def get(self, decision_id: str) -> Optional[Dict]:
+        """Décision complète (résultat, entrées, durées) avec ses actions de pompe, ou None"""
+        conn = self._reader()
+        row = conn.execute('SELECT result, inputs, timings FROM decisions WHERE id = ?', (decision_id,)).fetchone()
+        if row is None:
+            return None
+        record = json.loads(row['result'])
+        record['inputs'] = json.loads(row['inputs']) if row['inputs'] else {}
+        record['timings'] = json.loads(row['timings']) if row['timings'] else {}
+        record['pump_actions'] = [
+            dict(action) for action in conn.execute(
+                'SELECT timestamp, action, duration_minutes, reason FROM pump_actions '
+                'WHERE decision_id = ? ORDER BY id', (decision_id,)
+            )
+        ]
+        return record
+
+    def latest(self, zone_id: str) -> Optional[Dict]:
+        """Dernière décision enregistrée pour une zone (résultat tel que retourné par le moteur)"""
+        row = self._reader().execute(
+            'SELECT result FROM decisions WHERE zone_id = ? ORDER BY timestamp DESC LIMIT 1', (zone_id,)
+        ).fetchone()
+        return json.loads(row['result']) if row is not None else None
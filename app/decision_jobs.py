@@ -0,0 +1,152 @@
+"""
+Exécution asynchrone des décisions d'irrigation (jobs avec suivi de progression)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import datetime
+import threading
+import uuid
+import logging
+from config import DECISION_JOB_WORKERS, DECISION_JOB_MAX_PENDING, DECISION_JOB_HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgress:
+    """Rappel de progression transmis à la fonction d'un job"""
+
+    def __init__(self, manager: 'DecisionJobManager', job_id: str):
+        self._manager = manager
+        self.job_id = job_id
+
+    def __call__(self, step: str, percent: int) -> None:
+        """Met à jour l'étape courante et le pourcentage d'avancement"""
+        self._manager._update(self.job_id, step=step, progress=percent)
+
+    def update_partial(self, **fields) -> None:
+        """Enregistre des résultats partiels (ex. décision connue avant la fin)"""
+        self._manager._update_partial(self.job_id, fields)
+
+
+class JobQueueFullError(Exception):
+    """Levée quand trop de décisions sont déjà en attente ou en cours"""
+
+
+class DecisionJobManager:
+    """
+    Exécute les décisions sur un pool de threads borné
+
+    Les demandes identiques (même clé) soumises pendant qu'un job est en attente
+    ou en cours sont regroupées sur ce même job.
+    """
+
+    def __init__(self, max_workers: int = DECISION_JOB_WORKERS,
+                 max_pending: int = DECISION_JOB_MAX_PENDING,
+                 history_size: int = DECISION_JOB_HISTORY_SIZE):
+        """
+        Args:
+            max_workers: Nombre de décisions exécutées simultanément
+            max_pending: Nombre maximal de jobs en attente ou en cours
+            history_size: Nombre de jobs conservés pour consultation
+        """
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='decision-job')
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        # Clé de demande -> id du job actif (en attente ou en cours)
+        self._in_flight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[[JobProgress], Dict], key: str = 'default') -> Dict:
+        """
+        Soumet une décision, ou rejoint le job identique déjà actif
+
+        Args:
+            func: Fonction exécutant la décision, recevant un rappel de progression
+            key: Clé d'identité de la demande (demandes identiques = même clé)
+
+        Returns:
+            Copie de l'état du job (avec 'deduplicated' à True si job existant)
+
+        Raises:
+            JobQueueFullError: si la limite de jobs actifs est atteinte
+        """
+        with self._lock:
+            existing_id = self._in_flight.get(key)
+            if existing_id is not None:
+                job = {**self._jobs[existing_id], 'partial': dict(self._jobs[existing_id]['partial'])}
+                job['deduplicated'] = True
+                return job
+
+            if len(self._in_flight) >= self.max_pending:
+                raise JobQueueFullError(
+                    f"Trop de décisions en cours ({len(self._in_flight)}), réessayez plus tard"
+                )
+
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'step': 'En attente',
+                'progress': 0,
+                'created_at': datetime.datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'partial': {},
+                'result': None,
+                'error': None
+            }
+            self._in_flight[key] = job_id
+            self._trim_history()
+            job = {**self._jobs[job_id], 'partial': {}}
+
+        self._executor.submit(self._run, job_id, key, func)
+        job['deduplicated'] = False
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Retourne une copie de l'état du job, ou None s'il est inconnu"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, 'partial': dict(job['partial'])}
+
+    def _update_partial(self, job_id: str, fields: Dict) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job['partial'].update(fields)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _run(self, job_id: str, key: str, func: Callable[[JobProgress], Dict]) -> None:
+        """Exécute le job dans un thread du pool"""
+        self._update(job_id, status='running', step='Démarrage',
+                     started_at=datetime.datetime.now().isoformat())
+
+        try:
+            result = func(JobProgress(self, job_id))
+            self._update(job_id, status='done', step='Terminé', progress=100, result=result)
+        except Exception as e:
+            logger.error(f"[JOBS] Échec du job {job_id} : {e}", exc_info=True)
+            self._update(job_id, status='error', step='Erreur', error=str(e))
+        finally:
+            with self._lock:
+                self._jobs[job_id]['finished_at'] = datetime.datetime.now().isoformat()
+                if self._in_flight.get(key) == job_id:
+                    del self._in_flight[key]
+
+    def _trim_history(self) -> None:
+        """Supprime les jobs terminés les plus anciens au-delà de history_size (appelé sous verrou)"""
+        active_ids = set(self._in_flight.values())
+        for job_id in list(self._jobs.keys()):
+            if len(self._jobs) <= self.history_size:
+                break
+            if job_id not in active_ids:
+                del self._jobs[job_id]
@@ -0,0 +1,67 @@
+"""
+Verrou de fichier inter-processus (POSIX et Windows)
+"""
+import os
+from pathlib import Path
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Verrou exclusif basé sur un fichier `.lock` voisin du fichier protégé
+
+    Utilisable comme gestionnaire de contexte :
+
+        with FileLock(csv_path):
+            ...  # écriture exclusive
+    """
+
+    def __init__(self, target_path):
+        """
+        Args:
+            target_path: Chemin du fichier à protéger (le verrou est `<fichier>.lock`)
+        """
+        target_path = Path(target_path)
+        self.lock_path = target_path.with_name(target_path.name + '.lock')
+        self._fd = None
+
+    def acquire(self) -> None:
+        """Bloque jusqu'à obtention du verrou"""
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.name == 'nt':
+            # msvcrt.LK_LOCK réessaie pendant ~10s, on boucle pour un blocage illimité
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        """Libère le verrou"""
+        if self._fd is None:
+            return
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
@@ -0,0 +1,201 @@
+"""
+Client HTTP partagé : connexions persistantes, reprises avec backoff et disjoncteur par hôte
+"""
+import random
+import threading
+import time
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE_SECONDS,
+                    HTTP_BACKOFF_MAX_SECONDS, HTTP_CIRCUIT_FAILURE_THRESHOLD,
+                    HTTP_CIRCUIT_RESET_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+# Codes HTTP transitoires pour lesquels une nouvelle tentative a du sens
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Levée quand le disjoncteur d'un hôte est ouvert (appel non tenté)"""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un hôte : fermé → ouvert après N échecs consécutifs → semi-ouvert après délai
+
+    Un échec est un appel logique en échec (toutes tentatives épuisées), pas
+    une tentative.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> Optional[str]:
+        """
+        Indique si un appel peut être tenté (un seul appel d'essai en semi-ouvert)
+
+        Returns:
+            'closed' (appel normal), 'trial' (appel d'essai, sans nouvelle tentative)
+            ou None si l'appel est refusé
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return None
+            if self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return 'trial'
+
+    def release(self) -> None:
+        """Termine un appel sans verdict sur l'hôte (erreur non transitoire, ex. URL invalide)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return 'open'
+            return 'half_open'
+
+
+class HttpClient:
+    """Session requests partagée avec pool borné, keep-alive, reprises et disjoncteurs"""
+
+    def __init__(self, pool_maxsize: int = HTTP_POOL_MAXSIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_base: float = HTTP_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = HTTP_BACKOFF_MAX_SECONDS,
+                 failure_threshold: int = HTTP_CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = HTTP_CIRCUIT_RESET_SECONDS):
+        """
+        Args:
+            pool_maxsize: Nombre maximal de connexions conservées par hôte
+            max_retries: Nombre de nouvelles tentatives après le premier échec
+            backoff_base: Délai de base (s) du backoff exponentiel
+            backoff_max: Délai maximal (s) entre deux tentatives
+            failure_threshold: Échecs consécutifs avant ouverture du disjoncteur
+            reset_timeout: Durée (s) d'ouverture avant une tentative d'essai
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        # Les reprises sont gérées ici (backoff + disjoncteur), pas par urllib3
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize,
+                              max_retries=0, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
+    def _breaker_for(self, host: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Backoff exponentiel avec jitter complet : uniforme dans [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Effectue une requête HTTP en réutilisant les connexions du pool
+
+        Les erreurs réseau et les codes transitoires (429, 5xx de passerelle) sont
+        retentés avec backoff. Les réponses 4xx sont retournées telles quelles.
+        Le disjoncteur compte un échec par appel, une fois les tentatives épuisées ;
+        l'appel d'essai d'un disjoncteur semi-ouvert n'est pas retenté.
+
+        Raises:
+            CircuitOpenError: si l'hôte est en défaut (disjoncteur ouvert)
+            requests.exceptions.RequestException: après épuisement des tentatives
+        """
+        host = urlparse(url).netloc
+        breaker = self._breaker_for(host)
+        mode = breaker.allow_request()
+        if mode is None:
+            raise CircuitOpenError(f"Disjoncteur ouvert pour {host}, appel non tenté")
+        max_retries = 0 if mode == 'trial' else self.max_retries
+
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= max_retries:
+                    breaker.record_failure()
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"[HTTP] {host} : {type(e).__name__}, nouvelle tentative dans {delay:.2f}s")
+            except BaseException:
+                # Erreur non transitoire (URL invalide, etc.) : ni nouvelle tentative, ni échec de l'hôte
+                breaker.release()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    breaker.record_success()
+                    return response
+                if attempt >= max_retries:
+                    breaker.record_failure()
+                    return response
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"[HTTP] {host} : HTTP {response.status_code}, nouvelle tentative dans {delay:.2f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def max_duration(self, timeout: float) -> float:
+        """Durée maximale (s) d'un appel : chaque tentative avec son délai, plus les backoffs"""
+        backoff = sum(min(self.backoff_max, self.backoff_base * (2 ** attempt)) for attempt in range(self.max_retries))
+        return timeout * (self.max_retries + 1) + backoff
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get_circuit_states(self) -> Dict[str, str]:
+        """État du disjoncteur de chaque hôte contacté"""
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.state for host, breaker in breakers.items()}
+
+
+# Instance partagée par l'API météo et l'agent
+http_client = HttpClient()
@@ -0,0 +1,183 @@
+"""
+Métriques du système (latences par étape, compteurs, état des pompes) au format texte Prometheus
+"""
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+import math
+import threading
+import time
+
+# Bornes des histogrammes de durée (secondes) : de la lecture CSV à l'appel LLM
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    """Base commune : nom, aide, étiquettes et verrou"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Étiquettes attendues pour {self.name} : {', '.join(self.labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _label_text(self, key: LabelValues, extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Lignes d'échantillons au format texte Prometheus"""
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.kind}'] + self._samples()
+
+
+class Counter(_Metric):
+    """Compteur croissant"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {} if self.labels else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{self._label_text(key)} {_format_value(value)}' for key, value in values]
+
+
+class Gauge(_Metric):
+    """Valeur instantanée (ex. pompe en marche)"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{self._label_text(key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Répartition de durées par intervalles
+
+    Une observation incrémente un seul intervalle (recherche dichotomique) ;
+    les comptes cumulés attendus par Prometheus ne sont calculés qu'à l'export.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Par jeu d'étiquettes : [comptes par intervalle (+ dépassement), somme]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mesure la durée du bloc (perf_counter) et l'enregistre"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{self._label_text(key, [("le", _format_value(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Ensemble des métriques exportées par /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Export au format texte Prometheus (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Étapes : weather_fetch, sensor_load, review_summary, prompt_build, llm_call, json_parse,
+# csv_persist (lecture de capteurs ou revue écrite sur disque), model_load (chargement Ollama)
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'irrigation_stage_duration_seconds', "Durée des étapes de la prise de décision", ['stage']))
+DECISIONS = REGISTRY.register(Counter(
+    'irrigation_decisions_total', "Décisions prises, par zone et par source (rules, cache, llm)", ['zone', 'source']))
+LLM_FALLBACK_PARSES = REGISTRY.register(Counter(
+    'irrigation_llm_fallback_parses_total', "Réponses LLM non JSON dont la décision a été extraite du texte"))
+LLM_SAFE_DEFAULTS = REGISTRY.register(Counter(
+    'irrigation_llm_safe_defaults_total', "Décisions sécurisées (NE PAS IRRIGUER) après une erreur du LLM"))
+LLM_COLD_LOADS = REGISTRY.register(Counter(
+    'irrigation_llm_cold_loads_total', "Chargements du modèle Ollama depuis le disque (démarrages à froid)"))
+DECISION_TRIGGERS = REGISTRY.register(Counter(
+    'irrigation_decision_triggers_total',
+    "Demandes de décision par zone et par issue (started, skipped : reportée, merged : fusionnée)",
+    ['zone', 'outcome']))
+PUMP_RUNNING = REGISTRY.register(Gauge(
+    'irrigation_pump_running', "Pompe en marche (1) ou arrêtée (0)", ['zone']))
+PUMP_DURATION_MINUTES = REGISTRY.register(Gauge(
+    'irrigation_pump_duration_minutes', "Durée d'irrigation programmée de la pompe", ['zone']))
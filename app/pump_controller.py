@@ -0,0 +1,164 @@
+"""
+Pilotage des pompes : état par zone, commandes sérialisées et verrouillages de sécurité
+"""
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, Dict, Iterable, List, Optional
+import datetime
+import threading
+from app.rule_engine import RESERVOIR_MIN_PERCENT
+
+
+class PumpInterlockError(Exception):
+    """Démarrage refusé par un verrouillage de sécurité (ex. réservoir sous le minimum)"""
+
+
+def interlock_refusal(duration_minutes: int, reservoir_level: Optional[float] = None,
+                      reservoir_min_percent: float = RESERVOIR_MIN_PERCENT) -> Optional[str]:
+    """
+    Raison pour laquelle un démarrage serait refusé, ou None s'il est autorisé
+
+    Args:
+        reservoir_level: Niveau du réservoir (%) au moment de la décision, avant toute irrigation
+    """
+    if duration_minutes <= 0:
+        return f"durée invalide ({duration_minutes} min)"
+    if reservoir_level is not None and reservoir_level < reservoir_min_percent:
+        return f"réservoir à {reservoir_level:.1f} %, sous le minimum de {reservoir_min_percent:.0f} %"
+    return None
+
+
+@dataclass(frozen=True)
+class PumpState:
+    """État d'une pompe à un instant donné (immuable : chaque commande produit un nouvel état)"""
+    zone_id: str
+    running: bool = False
+    started_at: Optional[str] = None
+    stop_at: Optional[str] = None
+    stopped_at: Optional[str] = None
+    duration_minutes: int = 0
+    stop_reason: Optional[str] = None
+    decision_id: Optional[str] = None
+    # Numéro de la marche en cours : un arrêt programmé pour une marche précédente est ignoré
+    run_id: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+# Fonction appelée à chaque transition avec (nouvel état, action, raison)
+PumpListener = Callable[[PumpState, str, Optional[str]], None]
+
+
+class PumpController:
+    """
+    Unique écrivain de l'état des pompes
+
+    Les commandes (start, stop) sont exécutées une à la fois sous un verrou ;
+    chacune remplace l'état de la zone par un nouvel objet immuable. Les lectures
+    (state, states) ne prennent pas de verrou et ne voient jamais un état
+    partiellement modifié.
+
+    Les écouteurs sont appelés sous le verrou, dans l'ordre des transitions : ils
+    doivent rester courts (publication d'événement, mise en file) et ne pas
+    rappeler le contrôleur.
+    """
+
+    def __init__(self, zone_ids: Iterable[str], reservoir_min_percent: float = RESERVOIR_MIN_PERCENT):
+        """
+        Args:
+            zone_ids: Zones équipées d'une pompe
+            reservoir_min_percent: Niveau de réservoir en dessous duquel aucun démarrage n'est autorisé
+        """
+        self.reservoir_min_percent = reservoir_min_percent
+        self._states: Dict[str, PumpState] = {zone_id: PumpState(zone_id) for zone_id in zone_ids}
+        self._lock = threading.Lock()
+        self._listeners: List[PumpListener] = []
+
+    def add_listener(self, listener: PumpListener) -> None:
+        """Abonne une fonction aux transitions ('start', 'stop')"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def state(self, zone_id: str) -> PumpState:
+        """
+        État courant de la pompe d'une zone (lecture sans verrou)
+
+        Raises:
+            KeyError: si la zone est inconnue
+        """
+        return self._states[zone_id]
+
+    def states(self) -> Dict[str, PumpState]:
+        """États courants de toutes les pompes"""
+        return dict(self._states)
+
+    def _notify(self, state: PumpState, action: str, reason: Optional[str] = None) -> None:
+        for listener in self._listeners:
+            listener(state, action, reason)
+
+    def _stop_locked(self, current: PumpState, reason: str) -> PumpState:
+        stopped = replace(current, running=False, stopped_at=datetime.datetime.now().isoformat(), stop_reason=reason)
+        self._states[current.zone_id] = stopped
+        self._notify(stopped, 'stop', reason)
+        return stopped
+
+    def start(self, zone_id: str, duration_minutes: int, decision_id: Optional[str] = None,
+              reservoir_level: Optional[float] = None) -> PumpState:
+        """
+        Démarre la pompe d'une zone (une pompe déjà en marche est d'abord arrêtée)
+
+        Args:
+            duration_minutes: Durée de la marche
+            decision_id: Décision à l'origine du démarrage
+            reservoir_level: Niveau du réservoir (%) au moment de la décision, vérifié avant le démarrage
+
+        Raises:
+            KeyError: si la zone est inconnue
+            PumpInterlockError: si un verrouillage interdit le démarrage (l'état est inchangé)
+
+        Returns:
+            Nouvel état de la pompe
+        """
+        with self._lock:
+            current = self._states[zone_id]
+            refusal = interlock_refusal(duration_minutes, reservoir_level, self.reservoir_min_percent)
+            if refusal is not None:
+                raise PumpInterlockError(f"Démarrage de la pompe de la zone {zone_id} refusé : {refusal}")
+
+            if current.running:
+                current = self._stop_locked(current, 'restart')
+
+            now = datetime.datetime.now()
+            started = PumpState(
+                zone_id=zone_id,
+                running=True,
+                started_at=now.isoformat(),
+                stop_at=(now + datetime.timedelta(minutes=duration_minutes)).isoformat(),
+                duration_minutes=duration_minutes,
+                decision_id=decision_id,
+                run_id=current.run_id + 1
+            )
+            self._states[zone_id] = started
+            self._notify(started, 'start')
+            return started
+
+    def stop(self, zone_id: str, reason: str = 'manual_stop', run_id: Optional[int] = None) -> Optional[PumpState]:
+        """
+        Arrête la pompe d'une zone
+
+        Args:
+            reason: Raison de l'arrêt (manual_stop, auto_stop, decision_no_irrigate...)
+            run_id: Si fourni, n'arrête que cette marche (arrêt programmé d'une marche
+                remplacée depuis : ignoré)
+
+        Raises:
+            KeyError: si la zone est inconnue
+
+        Returns:
+            Nouvel état, ou None si la pompe n'était pas en marche (rien n'est fait)
+        """
+        with self._lock:
+            current = self._states[zone_id]
+            if not current.running or (run_id is not None and run_id != current.run_id):
+                return None
+            return self._stop_locked(current, reason)
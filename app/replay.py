@@ -0,0 +1,313 @@
+"""
+Rejeu d'une politique d'irrigation sur l'historique (analyse « et si »)
+"""
+from itertools import product
+from typing import Callable, Dict, Optional, Sequence
+import logging
+import numpy as np
+import pandas as pd
+from config import CSV_DATA_PATH, SENSOR_CSV_DATA_PATH, REVIEWS_CSV_DATA_PATH
+from app.data_loader import HistoricalDataLoader
+from app.decision_cache import DecisionCache
+from app.review_manager import ReviewManager
+from app.rule_engine import (
+    RESERVOIR_MIN_PERCENT, RESERVOIR_LOW_PERCENT, SOIL_SATURATED_PERCENT, SOIL_CRITICAL_PERCENT,
+    SOIL_VERY_DRY_PERCENT, RAIN_SIGNIFICANT_MM, CRITICAL_DURATION_MIN, CRITICAL_DURATION_MAX
+)
+from app.sensor_data_loader import SENSOR_DEFAULTS, SensorDataLoader
+
+logger = logging.getLogger(__name__)
+
+# Seuils de la politique à règles, valeurs par défaut reprises du prompt système de l'agent IA
+DEFAULT_THRESHOLDS = {
+    'soil_critical': SOIL_CRITICAL_PERCENT,    # < 25 % : irrigation urgente (sauf forte pluie)
+    'soil_dry': 30.0,                          # 25-30 % : sol sec → irriguer
+    'soil_conditional': 40.0,                  # 30-40 % : irriguer si les conditions sont favorables
+    'soil_saturated': SOIL_SATURATED_PERCENT,  # > 70 % : jamais
+    'reservoir_min': RESERVOIR_MIN_PERCENT,    # < 20 % : irrigation impossible
+    'reservoir_low': RESERVOIR_LOW_PERCENT,    # 20-30 % : seulement en alerte critique
+    'rain_max': RAIN_SIGNIFICANT_MM,           # pluie au-delà de laquelle on n'irrigue pas
+    'air_humidity_max': 80.0,                  # humidité de l'air au-delà de laquelle on n'irrigue pas
+    'et_min': 3.0,                             # ET sous laquelle les besoins sont réduits (bande conditionnelle)
+}
+
+# Guide des durées du prompt hors alerte critique
+DRY_DURATION_MINUTES = 35          # 25-35 %
+MODERATE_DURATION_MINUTES = 25     # au-delà de 35 %
+DURATION_BAND_PERCENT = 35.0
+
+# Bilan hydrique de SensorDataLoader.generate_new_sensor_reading, aléas remplacés par leur espérance
+IRRIGATION_GAIN_PER_30_MIN = 16.0         # uniforme(12, 20) points d'humidité
+RESERVOIR_USE_PER_30_MIN = 6.0            # uniforme(4, 8) points de réservoir
+# Durée attribuée aux jours marqués irrigation=1 dans l'historique (durée non enregistrée)
+RECORDED_IRRIGATION_MINUTES = 30
+
+MetricsDict = Dict[str, np.ndarray]
+
+
+class ReplayEngine:
+    """
+    Rejoue des politiques d'irrigation sur la météo historique, en boucle fermée
+
+    Chaque ligne de l'historique est un pas : la politique décide sur l'état
+    simulé (humidité du sol, réservoir), puis le bilan hydrique du simulateur de
+    capteurs fait évoluer cet état avec la météo du jour. Un écart de plus d'un
+    jour entre deux lignes ouvre un nouvel épisode, repris sur la lecture de
+    capteurs de ce jour si elle existe.
+
+    Les politiques sont évaluées ensemble : l'état est un tableau avec une
+    colonne par politique, seule la boucle sur les pas de temps reste en Python.
+    """
+
+    def __init__(self, historical: pd.DataFrame, sensors: Optional[pd.DataFrame] = None,
+                 reviews: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            historical: Historique météo (date, temperature, humidite_air, pluviometrie, irrigation)
+            sensors: Lectures de capteurs (colonnes de SENSOR_COLUMNS), pour l'état initial des épisodes
+            reviews: Revues d'experts (decision, decision_timestamp, stars)
+        """
+        history = historical.copy()
+        history['_date'] = pd.to_datetime(history['date'], errors='coerce')
+        history = history.dropna(subset=['_date']).sort_values('_date', kind='stable').reset_index(drop=True)
+        if len(history) == 0:
+            raise ValueError("Historique vide : rien à rejouer")
+
+        self.dates = history['_date'].dt.strftime('%Y-%m-%d').to_numpy()
+        self.temperature = pd.to_numeric(history['temperature'], errors='coerce').fillna(20.0).to_numpy(float)
+        self.humidity = pd.to_numeric(history['humidite_air'], errors='coerce').fillna(50.0).to_numpy(float)
+        self.rainfall = pd.to_numeric(history['pluviometrie'], errors='coerce').fillna(0.0).to_numpy(float)
+        self.recorded_irrigation = (
+            pd.to_numeric(history['irrigation'], errors='coerce').fillna(0).to_numpy() > 0
+            if 'irrigation' in history.columns else np.zeros(len(history), dtype=bool)
+        )
+        self.evapotranspiration = np.maximum(0.5, (self.temperature / 10.0) * (1 - self.humidity / 100.0) * 2.0)
+
+        gaps = history['_date'].diff().dt.days.fillna(np.inf).to_numpy()
+        self.episode_start = gaps > 1
+        self.initial_states = self._initial_states(sensors)
+        self.review_steps, self.review_irrigate, self.review_approved = self._align_reviews(reviews)
+
+    @classmethod
+    def from_files(cls, historical_csv: str = CSV_DATA_PATH, sensor_csv: str = SENSOR_CSV_DATA_PATH,
+                   reviews_csv: str = REVIEWS_CSV_DATA_PATH) -> 'ReplayEngine':
+        """
+        Construit le moteur depuis les fichiers de données configurés
+
+        Les lectures passent par SensorDataLoader (tampon circulaire compris).
+        """
+        historical = HistoricalDataLoader(historical_csv).data
+        sensors = SensorDataLoader(sensor_csv).get_history()
+        reviews = ReviewManager(reviews_csv).data
+        return cls(historical, sensors, reviews)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _initial_states(self, sensors: Optional[pd.DataFrame]) -> Dict[int, Dict[str, float]]:
+        """Première lecture de capteurs du jour de chaque début d'épisode"""
+        starts = np.flatnonzero(self.episode_start)
+        states = {}
+        if sensors is not None and len(sensors) and 'date' in sensors.columns:
+            readings = sensors.assign(_day=sensors['date'].astype(str).str.slice(0, 10))
+            first_of_day = readings.drop_duplicates(subset='_day', keep='first').set_index('_day')
+            for step in starts:
+                if self.dates[step] in first_of_day.index:
+                    row = first_of_day.loc[self.dates[step]]
+                    states[int(step)] = {
+                        col: float(pd.to_numeric(row.get(col), errors='coerce'))
+                        if pd.notna(pd.to_numeric(row.get(col), errors='coerce')) else SENSOR_DEFAULTS[col]
+                        for col in ('humidite_sol', 'niveau_reservoir', 'temperature_sol')
+                    }
+        if 0 not in states:
+            states[0] = {col: SENSOR_DEFAULTS[col] for col in ('humidite_sol', 'niveau_reservoir', 'temperature_sol')}
+        return states
+
+    def _align_reviews(self, reviews: Optional[pd.DataFrame]):
+        """
+        Associe chaque revue tranchée au pas du même jour
+
+        Une revue à 4-5⭐ approuve la décision prise, une revue à 1-2⭐ la
+        désapprouve ; les revues à 3⭐ ne comptent pas.
+        """
+        empty = (np.empty(0, dtype=int), np.empty(0, dtype=bool), np.empty(0, dtype=bool))
+        if reviews is None or len(reviews) == 0 or 'decision_timestamp' not in reviews.columns:
+            return empty
+        days = reviews['decision_timestamp'].astype(str).str.slice(0, 10)
+        stars = pd.to_numeric(reviews['stars'], errors='coerce')
+        step_of_day = {day: step for step, day in enumerate(self.dates)}
+        steps = days.map(step_of_day)
+        keep = steps.notna() & ((stars >= 4) | (stars <= 2))
+        if not keep.any():
+            return empty
+        irrigate = reviews['decision'].astype(str).str.strip().str.upper() == 'IRRIGUER'
+        return (steps[keep].to_numpy(dtype=int), irrigate[keep].to_numpy(dtype=bool),
+                (stars[keep] >= 4).to_numpy(dtype=bool))
+
+    def _run(self, decide: Callable[[int, Dict[str, np.ndarray]], np.ndarray], n_policies: int) -> MetricsDict:
+        """
+        Boucle de rejeu commune
+
+        Args:
+            decide: Fonction (pas, état) -> durées d'irrigation (minutes, forme (politiques,))
+            n_policies: Nombre de politiques évaluées ensemble
+        """
+        n_steps = len(self)
+        state = {key: np.zeros(n_policies) for key in ('humidite_sol', 'niveau_reservoir', 'temperature_sol')}
+        minutes_total = np.zeros(n_policies)
+        reservoir_used = np.zeros(n_policies)
+        irrigations = np.zeros(n_policies, dtype=int)
+        critical_steps = np.zeros(n_policies, dtype=int)
+        saturated_steps = np.zeros(n_policies, dtype=int)
+        irrigated = np.zeros((n_steps, n_policies), dtype=bool)
+
+        for t in range(n_steps):
+            if t in self.initial_states:
+                for key, value in self.initial_states[t].items():
+                    state[key][:] = value
+            soil, reservoir = state['humidite_sol'], state['niveau_reservoir']
+            critical_steps += soil < SOIL_CRITICAL_PERCENT
+            saturated_steps += soil > SOIL_SATURATED_PERCENT
+
+            minutes = np.asarray(decide(t, state), dtype=float)
+            irrigating = (minutes > 0) & (reservoir > 0)
+            minutes = np.where(irrigating, minutes, 0.0)
+            irrigated[t] = irrigating
+            irrigations += irrigating
+            minutes_total += minutes
+
+            gain = np.where(irrigating, IRRIGATION_GAIN_PER_30_MIN * np.clip(minutes / 30.0, 0.3, 2.0), 0.0)
+            use = np.minimum(RESERVOIR_USE_PER_30_MIN * np.minimum(minutes / 30.0, 2.0), reservoir)
+            reservoir_used += np.where(irrigating, use, 0.0)
+
+            state['humidite_sol'] = np.clip(soil - self.evapotranspiration[t] * 0.5 + self.rainfall[t] + gain, 0.0, 100.0)
+            state['niveau_reservoir'] = np.clip(
+                np.where(irrigating, reservoir - use, reservoir + self.rainfall[t] * 0.5), 0.0, 100.0
+            )
+            state['temperature_sol'] = state['temperature_sol'] * 0.7 + self.temperature[t] * 0.3
+
+        if len(self.review_steps):
+            decided = irrigated[self.review_steps]
+            agrees = (decided == self.review_irrigate[:, None]) == self.review_approved[:, None]
+            agreement = agrees.mean(axis=0)
+        else:
+            agreement = np.full(n_policies, np.nan)
+
+        return {
+            'water_minutes': minutes_total,
+            'reservoir_used_percent': reservoir_used,
+            'irrigations': irrigations,
+            'critical_fraction': critical_steps / n_steps,
+            'saturated_fraction': saturated_steps / n_steps,
+            'expert_agreement': agreement,
+        }
+
+    def _threshold_decisions(self, t: int, state: Dict[str, np.ndarray], thresholds: Dict[str, np.ndarray]) -> np.ndarray:
+        """Règles du prompt de l'agent IA, évaluées pour toutes les politiques d'un coup"""
+        soil, reservoir = state['humidite_sol'], state['niveau_reservoir']
+        rain = self.rainfall[t]
+
+        allowed = (reservoir >= thresholds['reservoir_min']) & (soil <= thresholds['soil_saturated'])
+        critical = allowed & (soil < thresholds['soil_critical']) & (rain <= thresholds['rain_max'])
+        favourable = (allowed & (rain <= thresholds['rain_max']) & (self.humidity[t] <= thresholds['air_humidity_max'])
+                      & (reservoir >= thresholds['reservoir_low']))
+        dry = favourable & (soil < thresholds['soil_dry'])
+        conditional = favourable & (soil < thresholds['soil_conditional']) & (self.evapotranspiration[t] >= thresholds['et_min'])
+
+        # Durée critique de RuleEngine : 45 min à 25 %, 60 min à 15 %, 45 min si le réservoir est faible
+        span = np.maximum(thresholds['soil_critical'] - SOIL_VERY_DRY_PERCENT, 1.0)
+        dryness = np.clip((thresholds['soil_critical'] - soil) / span, 0.0, 1.0)
+        critical_minutes = np.where(
+            reservoir < thresholds['reservoir_low'], CRITICAL_DURATION_MIN,
+            np.round(CRITICAL_DURATION_MIN + dryness * (CRITICAL_DURATION_MAX - CRITICAL_DURATION_MIN))
+        )
+        minutes = np.where(soil < DURATION_BAND_PERCENT, DRY_DURATION_MINUTES, MODERATE_DURATION_MINUTES)
+        return np.where(critical, critical_minutes, np.where(dry | conditional, minutes, 0.0))
+
+    def replay_thresholds(self, **thresholds) -> pd.DataFrame:
+        """
+        Rejoue la politique à règles pour un ou plusieurs jeux de seuils
+
+        Args:
+            **thresholds: Seuils de DEFAULT_THRESHOLDS, scalaires ou tableaux de même
+                longueur (un élément par politique) ; les seuils absents gardent leur défaut
+
+        Returns:
+            DataFrame avec une ligne par politique : seuils puis métriques
+        """
+        unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Seuils inconnus : {', '.join(sorted(unknown))}")
+        values = {name: np.atleast_1d(np.asarray(thresholds.get(name, default), dtype=float))
+                  for name, default in DEFAULT_THRESHOLDS.items()}
+        n_policies = max(len(v) for v in values.values())
+        values = {name: np.broadcast_to(v, (n_policies,)) for name, v in values.items()}
+
+        metrics = self._run(lambda t, state: self._threshold_decisions(t, state, values), n_policies)
+        return pd.DataFrame({**values, **metrics})
+
+    def sweep(self, grid: Dict[str, Sequence[float]]) -> pd.DataFrame:
+        """
+        Évalue toutes les combinaisons de seuils d'une grille
+
+        Args:
+            grid: Seuil -> valeurs à essayer (ex. {'soil_dry': range(25, 41), 'rain_max': [2, 5, 10]})
+
+        Returns:
+            DataFrame avec une ligne par combinaison (voir replay_thresholds)
+        """
+        names = list(grid)
+        combinations = np.array(list(product(*(list(grid[name]) for name in names))), dtype=float)
+        return self.replay_thresholds(**{name: combinations[:, i] for i, name in enumerate(names)})
+
+    def replay_schedule(self, minutes: Sequence[float]) -> Dict:
+        """
+        Rejoue un calendrier d'irrigation fixé (durée en minutes à chaque pas)
+
+        Le calendrier est appliqué tel quel, sauf quand le réservoir simulé est vide.
+        """
+        schedule = np.asarray(minutes, dtype=float)
+        if schedule.shape != (len(self),):
+            raise ValueError(f"Calendrier attendu de {len(self)} pas, reçu {schedule.shape}")
+        metrics = self._run(lambda t, state: np.full(1, schedule[t]), 1)
+        return {name: value[0].item() for name, value in metrics.items()}
+
+    def replay_recorded(self) -> Dict:
+        """Rejoue les irrigations enregistrées dans l'historique (colonne irrigation)"""
+        return self.replay_schedule(np.where(self.recorded_irrigation, RECORDED_IRRIGATION_MINUTES, 0.0))
+
+    def replay_cached_decisions(self, cache: DecisionCache, reviews_summary: str = '', context: str = '') -> Dict:
+        """
+        Rejoue les décisions de l'agent IA déjà en cache
+
+        À chaque pas, l'empreinte de l'état simulé est cherchée dans le cache
+        (mêmes seaux que DecisionEngine) ; sans entrée, la politique à règles par
+        défaut décide. La part de pas servis par le cache est retournée dans
+        'cache_coverage'.
+
+        Args:
+            cache: Cache de décisions à consulter
+            reviews_summary: Résumé des revues utilisé lors des décisions mises en cache
+            context: Contexte de l'empreinte (culture de la zone)
+        """
+        defaults = {name: np.full(1, value) for name, value in DEFAULT_THRESHOLDS.items()}
+        hits = 0
+
+        def decide(t: int, state: Dict[str, np.ndarray]) -> np.ndarray:
+            nonlocal hits
+            sensor_data = {key: float(value[0]) for key, value in state.items()}
+            sensor_data['evapotranspiration'] = float(self.evapotranspiration[t])
+            weather = {'temperature': float(self.temperature[t]), 'humidity': float(self.humidity[t]),
+                       'rainfall': float(self.rainfall[t]), 'rainfall_3h': 0.0}
+            cached = cache.get(DecisionCache.fingerprint(sensor_data, weather, reviews_summary, context))
+            if cached is None:
+                return self._threshold_decisions(t, state, defaults)
+            hits += 1
+            minutes = int(cached.get('duree_minutes', 0) or 0) if cached.get('decision') == 'IRRIGUER' else 0
+            return np.full(1, float(minutes))
+
+        metrics = self._run(decide, 1)
+        result = {name: value[0].item() for name, value in metrics.items()}
+        result['cache_coverage'] = hits / len(self)
+        logger.info(f"[REPLAY] {hits}/{len(self)} pas servis par le cache de décisions")
+        return result
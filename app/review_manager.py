@@ -4,43 +4,197 @@ Gestion des revues d'experts liées aux décisions d'irrigation.
 from __future__ import annotations
 
 import datetime
+import threading
 import uuid
 from pathlib import Path
 from typing import Dict, List, Optional
 
 import pandas as pd
 
+from app.file_lock import FileLock
+from app.metrics import STAGE_SECONDS
+from app.running_stats import RunningStats, WindowedStats, timestamp_seconds
+from app.storage import create_storage
+from app.tracing import span
+from config import REVIEW_COMPACTION_INTERVAL, STATS_WINDOW_DAYS
+
+REVIEW_COLUMNS = [
+    "review_id",
+    "decision_id",
+    "decision",
+    "decision_timestamp",
+    "review_timestamp",
+    "expert_name",
+    "stars",
+    "comment",
+]
+
+# Types des colonnes (fixent le schéma du jeu Parquet, voir app/storage.py)
+REVIEW_SCHEMA = {column: "string" for column in REVIEW_COLUMNS}
+REVIEW_SCHEMA["stars"] = "int"
+
 
 class ReviewManager:
     """Charge, enregistre et résume les revues d'expert."""
 
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, stats_window_days: float = STATS_WINDOW_DAYS,
+                 compaction_interval: int = REVIEW_COMPACTION_INTERVAL):
         self.csv_path = Path(csv_path)
         self.data: Optional[pd.DataFrame] = None
+        # Protège self.data et la file d'attente des revues à écrire
+        self._lock = threading.Lock()
+        # Un seul thread écrit un lot à la fois (group commit)
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict] = []
+        # Erreurs d'écriture des lots, par review_id, remontées à chaque appelant
+        self._failed: Dict[str, Exception] = {}
+        # Revues écrites sur disque mais pas encore fusionnées dans self.data
+        self._tail: List[Dict] = []
+        self._file_lock = FileLock(self.csv_path)
+        # Fichier CSV ou jeu Parquet selon STORAGE_BACKEND
+        self._storage = create_storage(
+            csv_path, REVIEW_COLUMNS, date_column="review_timestamp",
+            read_options={"quotechar": '"', "escapechar": "\\"}, schema=REVIEW_SCHEMA,
+        )
+        # Lots écrits depuis la dernière compaction (0 = jamais)
+        self.compaction_interval = compaction_interval
+        self._appends_since_compaction = 0
+        # Statistiques des notes mises à jour à chaque revue (get_statistics en temps constant)
+        self.stats_window_days = stats_window_days
+        self._stars_stats = RunningStats()
+        self._window_stars_stats: Optional[WindowedStats] = None
+        self._review_count = 0
+        self._last_review_at: Optional[str] = None
         self._ensure_file_exists()
         self.load_data()
 
     def _ensure_file_exists(self) -> None:
-        """Crée le fichier CSV avec l'en-tête s'il n'existe pas."""
-        if not self.csv_path.exists():
+        """Crée le stockage (fichier CSV avec l'en-tête) s'il n'existe pas."""
+        if not self._storage.exists():
             self.csv_path.parent.mkdir(parents=True, exist_ok=True)
-            header = (
-                "review_id,decision_id,decision,decision_timestamp,"
-                "review_timestamp,expert_name,stars,comment\n"
-            )
-            self.csv_path.write_text(header, encoding="utf-8")
+            with self._file_lock:
+                self._storage.initialize()
 
     def load_data(self) -> None:
-        """Charge les données depuis le fichier CSV."""
-        if self.csv_path.exists():
-            self.data = pd.read_csv(self.csv_path, quotechar='"', escapechar='\\')
+        """Charge les données depuis le stockage."""
+        if self._storage.exists():
+            data = self._storage.read()
+            if "review_id" in data.columns:
+                data = data.drop_duplicates(subset="review_id", keep="first").reset_index(drop=True)
+            self.data = data
         else:
             self.data = pd.DataFrame()
+        self._rebuild_stats()
+
+    def _rebuild_stats(self) -> None:
+        """Recalcule les statistiques des notes depuis self.data (au chargement)."""
+        data = self.data
+        self._review_count = int(len(data))
+        self._last_review_at = None
+        if "review_timestamp" in data.columns and len(data) > 0:
+            last = data["review_timestamp"].iloc[-1]
+            self._last_review_at = None if pd.isna(last) else last
+        stars = pd.to_numeric(data["stars"], errors="coerce") if "stars" in data.columns else []
+        self._stars_stats = RunningStats.from_array(stars)
+
+        self._window_stars_stats = None
+        if self.stats_window_days <= 0:
+            return
+        window_seconds = self.stats_window_days * 86400
+        self._window_stars_stats = WindowedStats(window_seconds)
+        if len(data) == 0 or "review_timestamp" not in data.columns or "stars" not in data.columns:
+            return
+        # Seules les revues de la fenêtre finale sont rejouées
+        timestamps = pd.to_datetime(data["review_timestamp"], errors="coerce")
+        latest = timestamps.max()
+        if pd.isna(latest):
+            return
+        mask = timestamps > latest - pd.Timedelta(seconds=window_seconds)
+        window = pd.DataFrame({"ts": timestamps[mask], "stars": stars[mask]}).sort_values("ts", kind="stable")
+        for ts, value in zip(window["ts"], window["stars"]):
+            self._window_stars_stats.add(ts.timestamp(), value)
+
+    def _update_stats(self, review: Dict) -> None:
+        """Intègre une revue écrite aux statistiques en O(1) (appelé sous self._lock)."""
+        self._review_count += 1
+        self._last_review_at = review["review_timestamp"]
+        self._stars_stats.add(review["stars"])
+        if self._window_stars_stats is not None:
+            timestamp = timestamp_seconds(review["review_timestamp"])
+            if timestamp is not None:
+                self._window_stars_stats.add(timestamp, review["stars"])
 
-    def _persist(self) -> None:
-        """Sauvegarde les données actuelles dans le CSV."""
-        if self.data is not None:
-            self.data.to_csv(self.csv_path, index=False)
+    def _flush_pending(self, review_id: str) -> None:
+        """
+        Écrit en une fois toutes les revues en attente (journal en ajout seul).
+
+        Les lignes sont ajoutées en fin de fichier sous verrou de fichier puis
+        synchronisées sur disque. Un thread qui arrive pendant l'écriture d'un
+        lot attend sa fin ; si sa revue y figurait déjà, il n'a rien à écrire
+        (ou reçoit l'erreur du lot si l'écriture a échoué).
+        """
+        with self._flush_lock:
+            with self._lock:
+                error = self._failed.pop(review_id, None)
+                if error is not None:
+                    raise error
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            try:
+                with self._file_lock, STAGE_SECONDS.time(stage='csv_persist'):
+                    self._storage.append(batch)
+            except Exception as e:
+                with self._lock:
+                    for review in batch:
+                        if review["review_id"] != review_id:
+                            self._failed[review["review_id"]] = e
+                raise
+
+            with self._lock:
+                self._tail.extend(batch)
+                for review in batch:
+                    self._update_stats(review)
+
+            self._appends_since_compaction += 1
+            if self.compaction_interval > 0 and self._appends_since_compaction >= self.compaction_interval:
+                self.compact()
+
+    def compact(self) -> None:
+        """
+        Réécrit le stockage de façon atomique (regroupe les fragments Parquet).
+
+        Relit le stockage sous verrou de fichier plutôt que self.data, pour ne
+        pas perdre les revues ajoutées par un autre processus. Appelée sous
+        self._flush_lock, tous les `compaction_interval` lots écrits ; un échec
+        est signalé sans faire échouer la revue déjà enregistrée.
+        """
+        self._appends_since_compaction = 0
+        try:
+            with self._file_lock:
+                data = self._storage.read()
+                if len(data) == 0:
+                    return
+                if "review_id" in data.columns:
+                    data = data.drop_duplicates(subset="review_id", keep="first").reset_index(drop=True)
+                self._storage.rewrite(data)
+        except Exception as e:
+            print(f"[WARNING] Échec de la compaction des revues : {e}")
+            return
+        print(f"[INFO] Fichier de revues compacté : {len(data)} revues")
+
+    def _merge_tail(self) -> None:
+        """Fusionne les revues récemment écrites dans le DataFrame (une seule concaténation)."""
+        with self._lock:
+            if not self._tail:
+                return
+            new_rows = pd.DataFrame(self._tail, columns=REVIEW_COLUMNS)
+            if self.data is None or len(self.data) == 0:
+                self.data = new_rows
+            else:
+                self.data = pd.concat([self.data, new_rows], ignore_index=True)
+            self._tail = []
 
     def add_review(
         self,
@@ -64,28 +218,16 @@ class ReviewManager:
             "comment": comment or "",
         }
 
-        columns = [
-            "review_id",
-            "decision_id",
-            "decision",
-            "decision_timestamp",
-            "review_timestamp",
-            "expert_name",
-            "stars",
-            "comment",
-        ]
-
-        if self.data is None or len(self.data) == 0:
-            self.data = pd.DataFrame(columns=columns)
-
-        new_row = pd.DataFrame([review], columns=columns)
-        self.data = pd.concat([self.data, new_row], ignore_index=True)
-        self._persist()
+        with self._lock:
+            self._pending.append(review)
+        # Retourne seulement une fois la revue écrite sur disque
+        self._flush_pending(review["review_id"])
 
         return review
 
     def get_recent_reviews(self, limit: int = 5) -> List[Dict]:
         """Retourne les dernières revues."""
+        self._merge_tail()
         if self.data is None or len(self.data) == 0:
             return []
 
@@ -93,34 +235,51 @@ class ReviewManager:
         records = recent.to_dict(orient="records")
         return [self._normalize_record(record) for record in records]
 
-    def get_statistics(self) -> Dict:
-        """Statistiques globales sur les revues."""
-        if self.data is None or len(self.data) == 0:
-            return {
-                "total_reviews": 0,
-                "average_stars": None,
-                "last_review_at": None,
-            }
+    def get_reviews_for_decision(self, decision_id: str) -> List[Dict]:
+        """Retourne les revues portant sur une décision."""
+        self._merge_tail()
+        if self.data is None or len(self.data) == 0 or "decision_id" not in self.data.columns:
+            return []
 
-        avg_stars = (
-            float(self.data["stars"].mean())
-            if "stars" in self.data.columns and len(self.data) > 0
-            else None
-        )
-        last_review_at = (
-            self.data["review_timestamp"].iloc[-1]
-            if "review_timestamp" in self.data.columns and len(self.data) > 0
-            else None
-        )
+        matches = self.data[self.data["decision_id"].astype(str) == str(decision_id)]
+        return [self._normalize_record(record) for record in matches.to_dict(orient="records")]
 
-        return {
-            "total_reviews": int(len(self.data)),
-            "average_stars": round(avg_stars, 2) if avg_stars is not None else None,
-            "last_review_at": last_review_at,
-        }
+    def get_statistics(self) -> Dict:
+        """Statistiques globales sur les revues (maintenues à chaque ajout, temps constant)."""
+        with self._lock:
+            if self._review_count == 0:
+                return {
+                    "total_reviews": 0,
+                    "average_stars": None,
+                    "last_review_at": None,
+                }
+
+            avg_stars = self._stars_stats.mean if self._stars_stats.count else None
+            stats = {
+                "total_reviews": self._review_count,
+                "average_stars": round(avg_stars, 2) if avg_stars is not None else None,
+                "last_review_at": self._last_review_at,
+            }
+            if self._window_stars_stats is not None:
+                window = self._window_stars_stats.to_dict()
+                stats["window"] = {
+                    "days": self.stats_window_days,
+                    "reviews": window["count"],
+                    "average_stars": round(window["mean"], 2) if window["mean"] is not None else None,
+                    "min_stars": window["min"],
+                    "max_stars": window["max"],
+                }
+            return stats
 
     def get_summary_for_llm(self, limit: int = 10) -> str:
         """Génère un résumé textuel des revues pour le LLM, focalisé sur les notes."""
+        with span("review_manager.get_summary_for_llm", limit=limit) as attributes:
+            summary = self._build_summary_for_llm(limit)
+            attributes["reviews"] = 0 if self.data is None else len(self.data)
+            return summary
+
+    def _build_summary_for_llm(self, limit: int) -> str:
+        self._merge_tail()
         if self.data is None or len(self.data) == 0:
             return (
                 "REVUES D'EXPERTS\n"
@@ -0,0 +1,98 @@
+"""
+Règles agronomiques déterministes pour les cas d'irrigation sans ambiguïté
+"""
+from typing import Dict, Optional
+
+# Seuils repris des règles du prompt système de l'agent IA
+RESERVOIR_MIN_PERCENT = 20.0      # < 20 % : irrigation impossible
+RESERVOIR_LOW_PERCENT = 30.0      # 20-30 % : niveau faible, durée réduite
+SOIL_SATURATED_PERCENT = 70.0     # > 70 % : sol saturé
+SOIL_CRITICAL_PERCENT = 25.0      # < 25 % : irrigation urgente
+SOIL_VERY_DRY_PERCENT = 15.0      # humidité à partir de laquelle la durée est maximale
+RAIN_SIGNIFICANT_MM = 5.0         # pluie au-delà de laquelle le cas n'est plus tranché
+
+# Guide des durées pour un sol < 25 % : 45 à 60 minutes
+CRITICAL_DURATION_MIN = 45
+CRITICAL_DURATION_MAX = 60
+
+
+def critical_irrigation_duration(humidite_sol: float, niveau_reservoir: float) -> int:
+    """
+    Durée d'irrigation (min) pour un sol en alerte critique
+
+    60 min à partir de 15 % d'humidité, 45 min à 25 %, interpolée entre les deux.
+    Limitée à 45 min si le réservoir est faible.
+    """
+    if niveau_reservoir < RESERVOIR_LOW_PERCENT:
+        return CRITICAL_DURATION_MIN
+    dryness = (SOIL_CRITICAL_PERCENT - humidite_sol) / (SOIL_CRITICAL_PERCENT - SOIL_VERY_DRY_PERCENT)
+    dryness = max(0.0, min(1.0, dryness))
+    return int(round(CRITICAL_DURATION_MIN + dryness * (CRITICAL_DURATION_MAX - CRITICAL_DURATION_MIN)))
+
+
+class RuleEngine:
+    """Décide directement les cas tranchés, laisse les cas limites au LLM"""
+
+    def evaluate(self, sensor_data: Dict, weather: Dict) -> Optional[Dict]:
+        """
+        Applique les règles dures sur l'état courant
+
+        Args:
+            sensor_data: Données de capteurs actuelles (SensorDataLoader.get_current_sensor_data)
+            weather: Données météo actuelles (WeatherAPI.get_current_weather)
+
+        Returns:
+            Décision au format de l'agent IA (decision, duree_minutes, explication)
+            complétée de la règle appliquée ('rule'), ou None si le cas doit être
+            soumis au LLM
+        """
+        if not sensor_data.get('available', False):
+            return None
+
+        humidite_sol = float(sensor_data['humidite_sol'])
+        niveau_reservoir = float(sensor_data['niveau_reservoir'])
+        rainfall = float(weather.get('rainfall', 0.0) or 0.0) + float(weather.get('rainfall_3h', 0.0) or 0.0)
+
+        if niveau_reservoir < RESERVOIR_MIN_PERCENT:
+            return {
+                'decision': 'NE PAS IRRIGUER',
+                'duree_minutes': 0,
+                'explication': (
+                    f"Le niveau du réservoir est critique ({niveau_reservoir:.1f}% < {RESERVOIR_MIN_PERCENT:.0f}%), "
+                    f"l'irrigation est impossible. L'humidité du sol est de {humidite_sol:.1f}%. "
+                    "Remplissez le réservoir avant toute irrigation."
+                ),
+                'rule': 'reservoir_critique'
+            }
+
+        if humidite_sol > SOIL_SATURATED_PERCENT:
+            return {
+                'decision': 'NE PAS IRRIGUER',
+                'duree_minutes': 0,
+                'explication': (
+                    f"Le sol est saturé ({humidite_sol:.1f}% > {SOIL_SATURATED_PERCENT:.0f}%), "
+                    "irriguer augmenterait le risque de pourriture des racines. "
+                    f"Le réservoir est à {niveau_reservoir:.1f}%."
+                ),
+                'rule': 'sol_sature'
+            }
+
+        if humidite_sol < SOIL_CRITICAL_PERCENT and rainfall <= RAIN_SIGNIFICANT_MM:
+            duree = critical_irrigation_duration(humidite_sol, niveau_reservoir)
+            reservoir_note = (
+                " La durée est limitée car le niveau du réservoir est faible."
+                if niveau_reservoir < RESERVOIR_LOW_PERCENT else ""
+            )
+            return {
+                'decision': 'IRRIGUER',
+                'duree_minutes': duree,
+                'explication': (
+                    f"L'humidité du sol est critique ({humidite_sol:.1f}% < {SOIL_CRITICAL_PERCENT:.0f}%), "
+                    f"une irrigation urgente de {duree} minutes est nécessaire. "
+                    f"Le réservoir ({niveau_reservoir:.1f}%) le permet et aucune pluie significative "
+                    f"n'est mesurée.{reservoir_note}"
+                ),
+                'rule': 'sol_critique'
+            }
+
+        return None
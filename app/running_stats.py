@@ -0,0 +1,215 @@
+"""
+Statistiques incrémentales (moyenne, variance de Welford, min/max) mises à jour en O(1)
+"""
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+
+def timestamp_seconds(date_value) -> Optional[float]:
+    """
+    Horodatage (s) d'une date ISO, None si illisible
+
+    Une date sans fuseau est lue en UTC, comme pd.to_datetime(...).timestamp()
+    lors des reconstructions : les ajouts un à un et les recalculs au chargement
+    placent ainsi les valeurs au même endroit de la fenêtre, quel que soit TZ.
+    """
+    try:
+        timestamp = pd.Timestamp(date_value)
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(timestamp) else timestamp.timestamp()
+
+
+def _is_missing(value) -> bool:
+    """Valeur absente ou NaN (ignorée comme le fait pandas)"""
+    if value is None:
+        return True
+    try:
+        return math.isnan(float(value))
+    except (TypeError, ValueError):
+        return True
+
+
+class RunningStats:
+    """Agrégats cumulés sur toutes les valeurs ajoutées"""
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @classmethod
+    def from_array(cls, values) -> 'RunningStats':
+        """Initialise les agrégats en une passe vectorisée (ex. colonne chargée depuis le CSV)"""
+        stats = cls()
+        array = np.asarray(values, dtype=float)
+        array = array[~np.isnan(array)]
+        if array.size:
+            stats.count = int(array.size)
+            stats.mean = float(array.mean())
+            stats._m2 = float(((array - stats.mean) ** 2).sum())
+            stats.min = float(array.min())
+            stats.max = float(array.max())
+        return stats
+
+    def add(self, value) -> None:
+        """Ajoute une valeur (les valeurs absentes ou NaN sont ignorées)"""
+        if _is_missing(value):
+            return
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def remove(self, value) -> bool:
+        """
+        Retire une valeur ajoutée auparavant (ex. lecture écrasée d'un tampon circulaire)
+
+        Returns:
+            False si la valeur retirée était le min ou le max : ceux-ci sont alors
+            à recalculer (from_array sur les valeurs restantes)
+        """
+        if _is_missing(value):
+            return True
+        value = float(value)
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            self.min = self.max = None
+            return True
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (value - self.mean))
+        return value != self.min and value != self.max
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Variance d'échantillon (ddof=1, comme pandas)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else None,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class WindowedStats:
+    """
+    Agrégats sur une fenêtre glissante (ex. 7 derniers jours)
+
+    La fenêtre est relative à l'horodatage le plus récent ajouté, pas à l'heure
+    courante : un historique ancien garde ainsi des statistiques significatives.
+    Min/max sont maintenus par des files monotones, moyenne et variance par
+    Welford avec retrait ; chaque valeur entre et sort une seule fois (O(1) amorti).
+    Chaque valeur porte un numéro d'ordre, qui permet aussi de retirer les
+    valeurs des lectures écrasées d'un tampon circulaire (evict_before).
+    """
+
+    def __init__(self, window_seconds: float):
+        """
+        Args:
+            window_seconds: Largeur de la fenêtre en secondes
+        """
+        self.window_seconds = window_seconds
+        # Entrées (horodatage, valeur, numéro d'ordre)
+        self._values: Deque[Tuple[float, float, int]] = deque()
+        self._min: Deque[Tuple[float, float, int]] = deque()
+        self._max: Deque[Tuple[float, float, int]] = deque()
+        self._latest: Optional[float] = None
+        self._next_seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, timestamp: float, value, seq: Optional[int] = None) -> None:
+        """
+        Ajoute une valeur horodatée (secondes) et retire celles sorties de la fenêtre
+
+        Un horodatage antérieur au plus récent est ramené à celui-ci pour garder
+        les files ordonnées.
+
+        Args:
+            seq: Numéro d'ordre croissant de la valeur (ex. rang de la lecture dans
+                le tampon circulaire) ; par défaut, le suivant du précédent
+        """
+        if _is_missing(value):
+            return
+        value = float(value)
+        if self._latest is not None:
+            timestamp = max(timestamp, self._latest)
+        self._latest = timestamp
+        seq = self._next_seq if seq is None else seq
+        self._next_seq = seq + 1
+
+        entry = (timestamp, value, seq)
+        self._values.append(entry)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append(entry)
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append(entry)
+
+        self._evict(lambda oldest: oldest[0] <= timestamp - self.window_seconds)
+
+    def evict_before(self, seq: int) -> None:
+        """Retire les valeurs de numéro d'ordre inférieur à seq (lectures écrasées)"""
+        self._evict(lambda oldest: oldest[2] < seq)
+
+    def _evict(self, expired) -> None:
+        """Retire les plus anciennes valeurs tant que expired(entrée) est vrai"""
+        while self._values and expired(self._values[0]):
+            _, value, _ = self._values.popleft()
+            if self.count == 1:
+                self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            else:
+                delta = value - self.mean
+                self.count -= 1
+                self.mean -= delta / self.count
+                self._m2 = max(0.0, self._m2 - delta * (value - self.mean))
+        while self._min and expired(self._min[0]):
+            self._min.popleft()
+        while self._max and expired(self._max[0]):
+            self._max.popleft()
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Variance d'échantillon (ddof=1) sur la fenêtre"""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else None,
+            'std': self.std,
+            'min': self._min[0][1] if self._min else None,
+            'max': self._max[0][1] if self._max else None
+        }
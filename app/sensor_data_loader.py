@@ -2,35 +2,146 @@
 Module de chargement et d'analyse des données de capteurs IoT
 """
 import pandas as pd
-from typing import Dict, Optional
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 from pathlib import Path
 import datetime
 import random
+from app.metrics import STAGE_SECONDS
+from app.tracing import span
+from app.running_stats import RunningStats, WindowedStats, timestamp_seconds
+from app.sensor_ring_store import SensorRingStore
+from app.storage import create_storage
+from config import SENSOR_TAIL_BUFFER_SIZE, SENSOR_COMPACTION_INTERVAL, STATS_WINDOW_DAYS, SENSOR_RING_BUFFER_CAPACITY
+
+# Ordre des colonnes du fichier CSV de capteurs
+SENSOR_COLUMNS = ['date', 'humidite_sol', 'temperature_sol', 'niveau_reservoir',
+                  'evapotranspiration', 'profondeur_racines', 'ph_sol', 'conductivite_electrique']
+# Types des colonnes (fixent le schéma du jeu Parquet, voir app/storage.py)
+SENSOR_SCHEMA = {column: 'float' for column in SENSOR_COLUMNS}
+SENSOR_SCHEMA['date'] = 'string'
+
+# Valeurs utilisées quand une grandeur (ou tout l'historique) est absente
+SENSOR_DEFAULTS = {
+    'humidite_sol': 50.0,
+    'temperature_sol': 20.0,
+    'niveau_reservoir': 75.0,
+    'evapotranspiration': 5.0,
+    'profondeur_racines': 30.0,
+    'ph_sol': 6.8,
+    'conductivite_electrique': 1.0,
+}
+
+# Canaux numériques (tout sauf la date)
+SENSOR_CHANNELS = SENSOR_COLUMNS[1:]
+
+# Grandeurs suivies par les statistiques incrémentales
+STATS_COLUMNS = ['humidite_sol', 'temperature_sol', 'niveau_reservoir', 'evapotranspiration']
+
+
+@dataclass(frozen=True)
+class SensorSnapshot:
+    """État courant des capteurs, converti une seule fois depuis la dernière lecture"""
+    __slots__ = ('humidite_sol', 'temperature_sol', 'niveau_reservoir', 'evapotranspiration',
+                 'profondeur_racines', 'ph_sol', 'conductivite_electrique', 'available')
+    humidite_sol: float
+    temperature_sol: float
+    niveau_reservoir: float
+    evapotranspiration: float
+    profondeur_racines: float
+    ph_sol: float
+    conductivite_electrique: float
+    available: bool
+
+    @classmethod
+    def from_row(cls, row) -> 'SensorSnapshot':
+        """Construit l'instantané depuis une lecture (dict du tampon ou ligne pandas)"""
+        return cls(available=True, **{key: float(row.get(key, default)) for key, default in SENSOR_DEFAULTS.items()})
+
+    @classmethod
+    def unavailable(cls) -> 'SensorSnapshot':
+        """Instantané de valeurs par défaut quand aucune lecture n'existe"""
+        return cls(available=False, **SENSOR_DEFAULTS)
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.__slots__}
 
 
 class SensorDataLoader:
     """Charge et analyse les données de capteurs IoT"""
     
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, tail_buffer_size: int = SENSOR_TAIL_BUFFER_SIZE,
+                 compaction_interval: int = SENSOR_COMPACTION_INTERVAL,
+                 stats_window_days: float = STATS_WINDOW_DAYS,
+                 ring_buffer_capacity: int = SENSOR_RING_BUFFER_CAPACITY):
         """
         Initialise le chargeur de données de capteurs
         
         Args:
             csv_path: Chemin vers le fichier CSV contenant les données de capteurs
+            tail_buffer_size: Nombre de lectures gardées en mémoire avant fusion dans le DataFrame
+            compaction_interval: Nombre d'ajouts entre deux compactions du fichier (0 = jamais)
+            stats_window_days: Largeur (jours) des statistiques glissantes (0 = désactivées)
+            ring_buffer_capacity: Si > 0, les lectures sont stockées dans un tampon circulaire
+                mappé en mémoire (fichier .ring à côté du CSV) de cette capacité
         """
         self.csv_path = Path(csv_path)
+        # Fichier CSV ou jeu Parquet selon STORAGE_BACKEND
+        self._storage = create_storage(csv_path, SENSOR_COLUMNS, date_column='date', schema=SENSOR_SCHEMA)
+        self._ring: Optional[SensorRingStore] = None
+        if ring_buffer_capacity > 0:
+            self._ring = self._open_ring(ring_buffer_capacity)
         self.data: Optional[pd.DataFrame] = None
+        # Lectures ajoutées depuis la dernière fusion dans self.data (ordre chronologique)
+        self._tail: List[Dict] = []
+        self.tail_buffer_size = max(1, tail_buffer_size)
+        self.compaction_interval = compaction_interval
+        self._appends_since_compaction = 0
+        # Instantané de la dernière lecture et dérivés, recalculés après un ajout
+        self._snapshot: Optional[SensorSnapshot] = None
+        self._alerts: Optional[List[str]] = None
+        self._summary: Optional[str] = None
+        # Statistiques mises à jour à chaque ajout (get_sensor_statistics en temps constant)
+        self.stats_window_days = stats_window_days
+        self._record_count = 0
+        self._stats: Dict[str, RunningStats] = {}
+        self._window_stats: Dict[str, WindowedStats] = {}
         self.load_data()
     
+    def _open_ring(self, capacity: int) -> SensorRingStore:
+        """Ouvre le tampon circulaire, en y important une fois l'historique existant"""
+        ring = SensorRingStore(str(self.csv_path.with_suffix('.ring')), SENSOR_CHANNELS, capacity)
+        if ring.total_written == 0 and self._storage.exists():
+            history = self._storage.read()
+            timestamps = pd.to_datetime(history['date'], errors='coerce') if 'date' in history.columns else None
+            if timestamps is not None and len(history) > 0:
+                epoch = ((timestamps - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).fillna(0).astype('int64').to_numpy()
+                ring.extend(epoch, {
+                    col: pd.to_numeric(history[col], errors='coerce').to_numpy()
+                    for col in SENSOR_CHANNELS if col in history.columns
+                })
+                print(f"[INFO] {len(ring)} lectures importées dans le tampon circulaire {ring.path}")
+        return ring
+    
     def load_data(self) -> None:
-        """Charge les données depuis le fichier CSV"""
-        if not self.csv_path.exists():
+        """Charge les données depuis le fichier CSV (ou le tampon circulaire)"""
+        self._tail = []
+        self._invalidate_snapshot()
+        if self._ring is not None:
+            # Lecture directe dans le fichier mappé : pas de DataFrame en mémoire
+            self.data = None
+            self._rebuild_stats()
+            return
+        if not self._storage.exists():
             print(f"[WARNING] Le fichier CSV de capteurs n'existe pas : {self.csv_path}")
             print("[INFO] Le système fonctionnera sans données de capteurs")
             self.data = None
+            self._rebuild_stats()
             return
         
-        self.data = pd.read_csv(self.csv_path)
+        self.data = self._storage.read()
+        self._rebuild_stats()
         
         # Vérification des colonnes requises
         required_columns = ['humidite_sol', 'temperature_sol', 'niveau_reservoir']
@@ -38,6 +149,79 @@ class SensorDataLoader:
         if missing_columns:
             print(f"[WARNING] Colonnes manquantes dans le CSV de capteurs : {missing_columns}")
     
+    def _has_data(self) -> bool:
+        """Indique si au moins une lecture est disponible (fichier ou tampon)"""
+        if self._ring is not None:
+            return len(self._ring) > 0
+        return bool(self._tail) or (self.data is not None and len(self.data) > 0)
+    
+    def _latest_row(self):
+        """Retourne la lecture la plus récente (dict du tampon ou ligne pandas)"""
+        if self._ring is not None:
+            # Accès O(1) à l'enregistrement, quelle que soit la longueur de l'historique
+            latest = self._ring.latest()
+            # str() d'un float32 donne sa plus courte représentation décimale (70.4 et non 70.40000153)
+            return {col: float(str(latest[col])) for col in SENSOR_CHANNELS}
+        if self._tail:
+            return self._tail[-1]
+        return self.data.iloc[-1]
+    
+    def _merge_tail(self) -> None:
+        """Fusionne le tampon de lectures récentes dans le DataFrame en une seule concaténation"""
+        if not self._tail:
+            return
+        new_rows = pd.DataFrame(self._tail)
+        if self.data is None or len(self.data) == 0:
+            self.data = new_rows
+        else:
+            self.data = pd.concat([self.data, new_rows], ignore_index=True)
+        self._tail = []
+    
+    def get_history(self) -> Optional[pd.DataFrame]:
+        """
+        Toutes les lectures conservées, dans l'ordre chronologique (colonnes de SENSOR_COLUMNS)
+
+        Lit le tampon circulaire s'il est actif, sinon le DataFrame et les lectures
+        récentes ; None si aucune lecture n'existe. Utilisé par les outils hors
+        ligne (calage, rejeu) pour voir les mêmes lectures que le moteur.
+        """
+        if self._ring is not None:
+            if len(self._ring) == 0:
+                return None
+            # Horodatages lus comme des dates sans fuseau en UTC (voir timestamp_seconds)
+            dates = pd.to_datetime(self._ring.column('timestamp'), unit='s')
+            history = pd.DataFrame({'date': dates.strftime('%Y-%m-%dT%H:%M:%S')})
+            for col in SENSOR_CHANNELS:
+                # str() d'un float32 donne sa plus courte représentation décimale
+                history[col] = self._ring.column(col).astype(str).astype(float)
+            return history
+        self._merge_tail()
+        if self.data is None or len(self.data) == 0:
+            return None
+        return self.data.copy()
+    
+    def _invalidate_snapshot(self) -> None:
+        """Oublie l'instantané courant (nouvelle lecture ou rechargement)"""
+        self._snapshot = None
+        self._alerts = None
+        self._summary = None
+    
+    def get_current_snapshot(self) -> SensorSnapshot:
+        """
+        Retourne l'instantané de la lecture la plus récente
+        
+        La dernière ligne n'est convertie qu'une fois ; l'instantané est réutilisé
+        jusqu'au prochain ajout de lecture.
+        """
+        if self._snapshot is None:
+            if self._has_data():
+                # Prendre la dernière ligne (données les plus récentes)
+                self._snapshot = SensorSnapshot.from_row(self._latest_row())
+            else:
+                # Valeurs par défaut si pas de données
+                self._snapshot = SensorSnapshot.unavailable()
+        return self._snapshot
+    
     def get_current_sensor_data(self) -> Dict:
         """
         Récupère les données de capteurs les plus récentes (simulation d'un capteur en temps réel)
@@ -45,60 +229,158 @@ class SensorDataLoader:
         Returns:
             Dictionnaire contenant les données de capteurs actuelles
         """
-        if self.data is None or len(self.data) == 0:
-            # Retourner des valeurs par défaut si pas de données
-            return {
-                'humidite_sol': 50.0,
-                'temperature_sol': 20.0,
-                'niveau_reservoir': 75.0,
-                'evapotranspiration': 5.0,
-                'profondeur_racines': 30.0,
-                'ph_sol': 6.8,
-                'conductivite_electrique': 1.0,
-                'available': False
-            }
+        return self.get_current_snapshot().to_dict()
+    
+    def _rebuild_stats(self) -> None:
+        """Recalcule les statistiques depuis self.data (chargement ou compaction)"""
+        if self._ring is not None:
+            self._rebuild_stats_from_ring()
+            return
+        self._merge_tail()
+        data = self.data if self.data is not None else pd.DataFrame()
+        self._record_count = len(data)
+        self._stats = {
+            col: RunningStats.from_array(pd.to_numeric(data[col], errors='coerce'))
+            for col in STATS_COLUMNS if col in data.columns
+        }
         
-        # Prendre la dernière ligne (données les plus récentes)
-        latest = self.data.iloc[-1]
+        self._window_stats = {}
+        if self.stats_window_days <= 0:
+            return
+        window_seconds = self.stats_window_days * 86400
+        self._window_stats = {col: WindowedStats(window_seconds) for col in self._stats}
+        if len(data) == 0 or 'date' not in data.columns:
+            return
+        # Seules les lectures de la fenêtre finale sont rejouées
+        timestamps = pd.to_datetime(data['date'], errors='coerce')
+        latest = timestamps.max()
+        if pd.isna(latest):
+            return
+        in_window = data.assign(_ts=timestamps)[timestamps > latest - pd.Timedelta(seconds=window_seconds)]
+        in_window = in_window.sort_values('_ts', kind='stable')
+        for row in in_window.to_dict(orient='records'):
+            timestamp = row['_ts'].timestamp()
+            for col, window in self._window_stats.items():
+                window.add(timestamp, row.get(col))
+    
+    def _rebuild_stats_from_ring(self) -> None:
+        """Recalcule les statistiques à partir des vues sur le tampon circulaire"""
+        self._record_count = len(self._ring)
+        self._stats = {col: RunningStats.from_array(self._ring.column(col)) for col in STATS_COLUMNS}
+        self._window_stats = {}
+        if self.stats_window_days <= 0:
+            return
+        window_seconds = self.stats_window_days * 86400
+        self._window_stats = {col: WindowedStats(window_seconds) for col in STATS_COLUMNS}
+        if self._record_count == 0:
+            return
+        # Seules les lectures de la fenêtre finale sont rejouées
+        timestamps = self._ring.column('timestamp')
+        start = int(np.searchsorted(timestamps, timestamps[-1] - window_seconds, side='right'))
+        columns = {col: self._ring.column(col)[start:] for col in STATS_COLUMNS}
+        # Numéro d'ordre = rang de la lecture depuis la création du tampon (voir _forget_overwritten)
+        first_seq = self._ring.total_written - self._record_count + start
+        for i, timestamp in enumerate(timestamps[start:].tolist()):
+            for col, window in self._window_stats.items():
+                window.add(timestamp, columns[col][i], seq=first_seq + i)
+    
+    def _append_to_ring(self, sensor_reading: Dict) -> None:
+        """Écrit une lecture dans le tampon circulaire et met à jour les statistiques sur son contenu"""
+        timestamp = timestamp_seconds(sensor_reading.get('date'))
+        overwritten = None
+        if len(self._ring) == self._ring.capacity:
+            oldest = self._ring.oldest()
+            overwritten = {col: float(oldest[col]) for col in STATS_COLUMNS}
+        with span('sensor_data_loader.persist', backend='ring'), STAGE_SECONDS.time(stage='csv_persist'):
+            self._ring.append(int(timestamp) if timestamp is not None else 0, sensor_reading)
+        self._invalidate_snapshot()
+        
+        # Valeurs telles que stockées (float32) : les mêmes qu'un recalcul au démarrage
+        stored = self._ring.latest()
+        self._update_stats({col: float(stored[col]) for col in STATS_COLUMNS},
+                           timestamp=float(stored['timestamp']),
+                           seq=self._ring.total_written - 1)
+        if overwritten is not None:
+            self._forget_overwritten(overwritten)
+        self._record_count = len(self._ring)
+    
+    def _forget_overwritten(self, reading: Dict) -> None:
+        """Retire des statistiques la lecture que le tampon plein vient d'écraser"""
+        for col in STATS_COLUMNS:
+            if not self._stats[col].remove(reading[col]):
+                # Min ou max retiré : recalcul vectorisé sur le contenu du tampon
+                self._stats[col] = RunningStats.from_array(self._ring.column(col))
+        first_retained = self._ring.total_written - len(self._ring)
+        for window in self._window_stats.values():
+            window.evict_before(first_retained)
+    
+    def _update_stats(self, sensor_reading: Dict, timestamp: Optional[float] = None,
+                      seq: Optional[int] = None) -> None:
+        """
+        Intègre une nouvelle lecture aux statistiques en O(1)
         
-        return {
-            'humidite_sol': float(latest.get('humidite_sol', 50.0)),
-            'temperature_sol': float(latest.get('temperature_sol', 20.0)),
-            'niveau_reservoir': float(latest.get('niveau_reservoir', 75.0)),
-            'evapotranspiration': float(latest.get('evapotranspiration', 5.0)),
-            'profondeur_racines': float(latest.get('profondeur_racines', 30.0)),
-            'ph_sol': float(latest.get('ph_sol', 6.8)),
-            'conductivite_electrique': float(latest.get('conductivite_electrique', 1.0)),
-            'available': True
-        }
+        Args:
+            timestamp: Horodatage (s) de la lecture, par défaut celui de sa date
+            seq: Rang de la lecture dans le tampon circulaire (fenêtres glissantes)
+        """
+        self._record_count += 1
+        for col in STATS_COLUMNS:
+            if col not in self._stats:
+                self._stats[col] = RunningStats()
+                if self.stats_window_days > 0:
+                    self._window_stats[col] = WindowedStats(self.stats_window_days * 86400)
+            self._stats[col].add(sensor_reading.get(col))
+        
+        if timestamp is None:
+            timestamp = timestamp_seconds(sensor_reading.get('date'))
+        if timestamp is not None:
+            for col, window in self._window_stats.items():
+                window.add(timestamp, sensor_reading.get(col), seq=seq)
     
     def get_sensor_statistics(self) -> Dict:
         """
-        Calcule des statistiques sur les données de capteurs
+        Retourne des statistiques sur les données de capteurs
+        
+        Les agrégats sont maintenus à chaque ajout : le coût ne dépend pas de la
+        taille de l'historique.
         
         Returns:
             Dictionnaire contenant les statistiques
         """
-        if self.data is None or len(self.data) == 0:
+        if self._record_count == 0:
             return {}
         
+        def mean(col):
+            col_stats = self._stats.get(col)
+            return col_stats.mean if col_stats is not None and col_stats.count else 0
+        
+        def bound(col, name):
+            col_stats = self._stats.get(col)
+            return getattr(col_stats, name) if col_stats is not None and col_stats.count else 0
+        
         stats = {
-            'total_records': len(self.data),
-            'avg_humidite_sol': self.data['humidite_sol'].mean() if 'humidite_sol' in self.data.columns else 0,
-            'avg_temperature_sol': self.data['temperature_sol'].mean() if 'temperature_sol' in self.data.columns else 0,
-            'avg_niveau_reservoir': self.data['niveau_reservoir'].mean() if 'niveau_reservoir' in self.data.columns else 0,
+            'total_records': self._record_count,
+            'avg_humidite_sol': mean('humidite_sol'),
+            'avg_temperature_sol': mean('temperature_sol'),
+            'avg_niveau_reservoir': mean('niveau_reservoir'),
             'humidite_sol_range': {
-                'min': self.data['humidite_sol'].min() if 'humidite_sol' in self.data.columns else 0,
-                'max': self.data['humidite_sol'].max() if 'humidite_sol' in self.data.columns else 0
+                'min': bound('humidite_sol', 'min'),
+                'max': bound('humidite_sol', 'max')
             },
             'temperature_sol_range': {
-                'min': self.data['temperature_sol'].min() if 'temperature_sol' in self.data.columns else 0,
-                'max': self.data['temperature_sol'].max() if 'temperature_sol' in self.data.columns else 0
+                'min': bound('temperature_sol', 'min'),
+                'max': bound('temperature_sol', 'max')
             }
         }
         
-        if 'evapotranspiration' in self.data.columns:
-            stats['avg_evapotranspiration'] = self.data['evapotranspiration'].mean()
+        if 'evapotranspiration' in self._stats:
+            stats['avg_evapotranspiration'] = mean('evapotranspiration')
+        
+        if self._window_stats:
+            stats['window'] = {
+                'days': self.stats_window_days,
+                **{col: window.to_dict() for col, window in self._window_stats.items()}
+            }
         
         return stats
     
@@ -109,9 +391,15 @@ class SensorDataLoader:
         Returns:
             Chaîne de caractères décrivant les données de capteurs
         """
-        current_data = self.get_current_sensor_data()
-        
-        if not current_data.get('available', False):
+        with span('sensor_data_loader.get_summary_for_llm', cached=self._summary is not None):
+            if self._summary is None:
+                self._summary = self._build_summary(self.get_current_snapshot())
+            return self._summary
+    
+    @staticmethod
+    def _build_summary(current: SensorSnapshot) -> str:
+        """Met en forme le résumé LLM d'un instantané"""
+        if not current.available:
             return """
 DONNÉES DE CAPTEURS
 ==================
@@ -124,28 +412,28 @@ DONNÉES DE CAPTEURS IoT (TEMPS RÉEL)
 
 📊 ÉTAT ACTUEL DES CAPTEURS :
 
-Humidité du sol : {current_data['humidite_sol']:.1f}%
+Humidité du sol : {current.humidite_sol:.1f}%
   → Seuil critique : < 30% = sol sec (irrigation nécessaire)
   → Seuil optimal : 40-60% = sol bien hydraté
   → Seuil élevé : > 70% = sol saturé (risque de pourriture)
 
-Température du sol : {current_data['temperature_sol']:.1f}°C
+Température du sol : {current.temperature_sol:.1f}°C
   → Impact sur l'absorption d'eau et la croissance des racines
 
-Niveau du réservoir : {current_data['niveau_reservoir']:.1f}%
+Niveau du réservoir : {current.niveau_reservoir:.1f}%
   → < 20% = réservoir critique (irrigation impossible)
   → > 50% = réservoir suffisant
 
-Évapotranspiration : {current_data['evapotranspiration']:.1f} mm/jour
+Évapotranspiration : {current.evapotranspiration:.1f} mm/jour
   → Besoin en eau réel de la culture
 
-Profondeur des racines : {current_data['profondeur_racines']:.1f} cm
+Profondeur des racines : {current.profondeur_racines:.1f} cm
   → Zone d'absorption d'eau
 
-pH du sol : {current_data['ph_sol']:.1f}
+pH du sol : {current.ph_sol:.1f}
   → Optimal : 6.0-7.5 pour la plupart des cultures
 
-Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
+Conductivité électrique : {current.conductivite_electrique:.1f} dS/m
   → Indicateur de salinité du sol
 """
         
@@ -158,31 +446,37 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
         Returns:
             Liste d'alertes (chaînes de caractères)
         """
+        if self._alerts is None:
+            self._alerts = self._build_alerts(self.get_current_snapshot())
+        return list(self._alerts)
+    
+    @staticmethod
+    def _build_alerts(current: SensorSnapshot) -> List[str]:
+        """Calcule les alertes d'un instantané"""
         alerts = []
-        current_data = self.get_current_sensor_data()
         
-        if not current_data.get('available', False):
+        if not current.available:
             return alerts
         
         # Alerte humidité du sol
-        if current_data['humidite_sol'] < 25:
-            alerts.append(f"⚠️ ALERTE CRITIQUE : Humidité du sol très faible ({current_data['humidite_sol']:.1f}%) - Irrigation urgente nécessaire")
-        elif current_data['humidite_sol'] < 30:
-            alerts.append(f"⚠️ ALERTE : Humidité du sol faible ({current_data['humidite_sol']:.1f}%) - Irrigation recommandée")
-        elif current_data['humidite_sol'] > 75:
-            alerts.append(f"⚠️ ALERTE : Sol saturé ({current_data['humidite_sol']:.1f}%) - Risque de pourriture des racines")
+        if current.humidite_sol < 25:
+            alerts.append(f"⚠️ ALERTE CRITIQUE : Humidité du sol très faible ({current.humidite_sol:.1f}%) - Irrigation urgente nécessaire")
+        elif current.humidite_sol < 30:
+            alerts.append(f"⚠️ ALERTE : Humidité du sol faible ({current.humidite_sol:.1f}%) - Irrigation recommandée")
+        elif current.humidite_sol > 75:
+            alerts.append(f"⚠️ ALERTE : Sol saturé ({current.humidite_sol:.1f}%) - Risque de pourriture des racines")
         
         # Alerte niveau réservoir
-        if current_data['niveau_reservoir'] < 20:
-            alerts.append(f"🚨 ALERTE CRITIQUE : Réservoir presque vide ({current_data['niveau_reservoir']:.1f}%) - Irrigation impossible")
-        elif current_data['niveau_reservoir'] < 30:
-            alerts.append(f"⚠️ ALERTE : Niveau du réservoir faible ({current_data['niveau_reservoir']:.1f}%)")
+        if current.niveau_reservoir < 20:
+            alerts.append(f"🚨 ALERTE CRITIQUE : Réservoir presque vide ({current.niveau_reservoir:.1f}%) - Irrigation impossible")
+        elif current.niveau_reservoir < 30:
+            alerts.append(f"⚠️ ALERTE : Niveau du réservoir faible ({current.niveau_reservoir:.1f}%)")
         
         # Alerte température du sol
-        if current_data['temperature_sol'] < 5:
-            alerts.append(f"⚠️ ALERTE : Température du sol très basse ({current_data['temperature_sol']:.1f}°C) - Croissance ralentie")
-        elif current_data['temperature_sol'] > 35:
-            alerts.append(f"⚠️ ALERTE : Température du sol élevée ({current_data['temperature_sol']:.1f}°C) - Stress hydrique possible")
+        if current.temperature_sol < 5:
+            alerts.append(f"⚠️ ALERTE : Température du sol très basse ({current.temperature_sol:.1f}°C) - Croissance ralentie")
+        elif current.temperature_sol > 35:
+            alerts.append(f"⚠️ ALERTE : Température du sol élevée ({current.temperature_sol:.1f}°C) - Stress hydrique possible")
         
         return alerts
     
@@ -199,11 +493,11 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
             Dictionnaire contenant les nouvelles valeurs de capteurs
         """
         # Récupérer les dernières valeurs pour calculer l'évolution
-        previous_data = self.get_current_sensor_data()
+        previous = self.get_current_snapshot()
         
         # Température du sol : proche de la température de l'air mais avec inertie
         temp_air = current_weather.get('temperature', 20.0)
-        temp_sol_prev = previous_data.get('temperature_sol', temp_air)
+        temp_sol_prev = previous.temperature_sol
         # Le sol suit l'air avec un décalage (moyenne pondérée)
         temperature_sol = temp_sol_prev * 0.7 + temp_air * 0.3
         # Ajustement selon la saison (variation jour/nuit simulée)
@@ -216,7 +510,7 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
         evapotranspiration += random.uniform(-0.5, 0.5)
         
         # Humidité du sol : évolution basée sur plusieurs facteurs
-        humidite_sol_prev = previous_data.get('humidite_sol', 50.0)
+        humidite_sol_prev = previous.humidite_sol
         rainfall = current_weather.get('rainfall', 0.0) + current_weather.get('rainfall_3h', 0.0) / 3.0
         
         # Calcul de l'évolution de l'humidité
@@ -244,7 +538,7 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
         humidite_sol = max(0.0, min(100.0, humidite_sol))
         
         # Niveau du réservoir : diminue si irrigation, augmente avec la pluie
-        niveau_reservoir_prev = previous_data.get('niveau_reservoir', 75.0)
+        niveau_reservoir_prev = previous.niveau_reservoir
         if irrigation_decision == "IRRIGUER" and irrigation_duration_minutes > 0:
             consommation = random.uniform(4.0, 8.0) * min(irrigation_duration_minutes / 30.0, 2.0)
             niveau_reservoir = niveau_reservoir_prev - consommation
@@ -256,19 +550,19 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
         niveau_reservoir = max(0.0, min(100.0, niveau_reservoir))
         
         # Profondeur des racines : augmente progressivement (simulation de croissance)
-        profondeur_racines_prev = previous_data.get('profondeur_racines', 30.0)
+        profondeur_racines_prev = previous.profondeur_racines
         # Croissance très lente (0.1-0.3 cm par jour en moyenne)
         profondeur_racines = profondeur_racines_prev + random.uniform(0.0, 0.3)
         # Limiter entre 10 et 60 cm
         profondeur_racines = max(10.0, min(60.0, profondeur_racines))
         
         # pH du sol : reste relativement stable (légère variation)
-        ph_sol_prev = previous_data.get('ph_sol', 6.8)
+        ph_sol_prev = previous.ph_sol
         ph_sol = ph_sol_prev + random.uniform(-0.05, 0.05)
         ph_sol = max(5.5, min(8.0, ph_sol))
         
         # Conductivité électrique : varie légèrement
-        ce_prev = previous_data.get('conductivite_electrique', 1.0)
+        ce_prev = previous.conductivite_electrique
         conductivite_electrique = ce_prev + random.uniform(-0.05, 0.05)
         conductivite_electrique = max(0.1, min(3.0, conductivite_electrique))
         
@@ -285,31 +579,87 @@ Conductivité électrique : {current_data['conductivite_electrique']:.1f} dS/m
     
     def add_sensor_reading(self, sensor_reading: Dict) -> None:
         """
-        Ajoute une nouvelle lecture de capteurs au fichier CSV
+        Ajoute une nouvelle lecture de capteurs à la fin du stockage
+        
+        La lecture est écrite seule (une ligne CSV ou un fragment Parquet, avec
+        fsync) sans réécrire l'historique, puis conservée dans le tampon mémoire. Le coût d'un ajout
+        ne dépend donc pas de la taille du fichier.
         
         Args:
             sensor_reading: Dictionnaire contenant les valeurs de capteurs
         """
         try:
-            # Créer le DataFrame si le fichier n'existe pas
-            if self.data is None or len(self.data) == 0:
-                # Créer un DataFrame vide avec les colonnes nécessaires
-                columns = ['date', 'humidite_sol', 'temperature_sol', 'niveau_reservoir', 
-                          'evapotranspiration', 'profondeur_racines', 'ph_sol', 'conductivite_electrique']
-                self.data = pd.DataFrame(columns=columns)
-            
-            # Créer un nouveau DataFrame avec la nouvelle ligne
-            new_row = pd.DataFrame([sensor_reading])
+            if self._ring is not None:
+                self._append_to_ring(sensor_reading)
+                print(f"[INFO] Nouvelle lecture de capteurs ajoutée : {sensor_reading['date']}")
+                return
             
-            # Ajouter la nouvelle ligne
-            self.data = pd.concat([self.data, new_row], ignore_index=True)
+            with span('sensor_data_loader.persist', backend=type(self._storage).__name__), STAGE_SECONDS.time(stage='csv_persist'):
+                self._storage.append([sensor_reading])
+            self._tail.append(dict(sensor_reading))
+            self._invalidate_snapshot()
+            self._update_stats(sensor_reading)
+            if len(self._tail) >= self.tail_buffer_size:
+                self._merge_tail()
             
-            # Sauvegarder dans le fichier CSV
-            self.data.to_csv(self.csv_path, index=False)
+            self._appends_since_compaction += 1
+            if self.compaction_interval > 0 and self._appends_since_compaction >= self.compaction_interval:
+                self.compact()
             
             print(f"[INFO] Nouvelle lecture de capteurs ajoutée : {sensor_reading['date']}")
             
         except Exception as e:
             print(f"[ERROR] Erreur lors de l'ajout de la lecture de capteurs : {e}")
             # Ne pas lever l'exception pour ne pas bloquer le processus de décision
-
+    
+    def add_sensor_readings(self, readings: pd.DataFrame) -> None:
+        """
+        Ajoute un lot de lectures (ex. historique simulé) en une seule écriture
+        
+        Les statistiques sont recalculées une fois pour tout le lot.
+        
+        Args:
+            readings: Lectures dans l'ordre chronologique, colonnes de SENSOR_COLUMNS
+        """
+        if len(readings) == 0:
+            return
+        readings = readings.reindex(columns=SENSOR_COLUMNS)
+        
+        if self._ring is not None:
+            timestamps = pd.to_datetime(readings['date'], errors='coerce')
+            epoch = ((timestamps - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).fillna(0).astype('int64').to_numpy()
+            self._ring.extend(epoch, {col: readings[col].to_numpy() for col in SENSOR_CHANNELS})
+        else:
+            self._storage.append(readings.to_dict(orient='records'))
+            self._merge_tail()
+            self.data = readings.reset_index(drop=True) if self.data is None or len(self.data) == 0 \
+                else pd.concat([self.data, readings], ignore_index=True)
+        
+        self._invalidate_snapshot()
+        self._rebuild_stats()
+        print(f"[INFO] {len(readings)} lectures de capteurs ajoutées")
+    
+    def compact(self) -> None:
+        """
+        Réécrit le stockage de façon atomique à partir des données en mémoire
+        
+        Supprime les lignes incomplètes laissées par une écriture interrompue et
+        regroupe les fragments Parquet.
+        Appelée périodiquement (tous les `compaction_interval` ajouts).
+        """
+        self._appends_since_compaction = 0
+        if self._ring is not None:
+            # Taille fixe : rien à compacter
+            return
+        self._merge_tail()
+        if self.data is None or len(self.data) == 0:
+            return
+        
+        required_columns = [col for col in ['humidite_sol', 'temperature_sol', 'niveau_reservoir']
+                            if col in self.data.columns]
+        self.data = self.data.dropna(subset=required_columns).reset_index(drop=True)
+        self._invalidate_snapshot()
+        self._rebuild_stats()
+        
+        self._storage.rewrite(self.data)
+        print(f"[INFO] Fichier de capteurs compacté : {len(self.data)} lectures")
@@ -0,0 +1,153 @@
+"""
+Stockage circulaire des lectures de capteurs dans un fichier mappé en mémoire
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SENSRING'
+VERSION = 1
+# En-tête de 64 octets : identification, capacité et nombre total de lectures écrites
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('channels', '<u4'),
+    ('capacity', '<u8'),
+    ('count', '<u8'),
+    ('reserved', 'V32'),
+])
+HEADER_SIZE = HEADER_DTYPE.itemsize
+
+
+class SensorRingStore:
+    """
+    Tampon circulaire de lectures à largeur fixe (horodatage int64 + canaux float32)
+
+    Le fichier est mappé en mémoire : les colonnes sont des vues NumPy sur le
+    fichier (aucune copie), la dernière lecture est accessible en O(1) et la
+    taille ne dépend que de la capacité. Une fois plein, chaque ajout remplace
+    la lecture la plus ancienne.
+    """
+
+    def __init__(self, path: str, channels: List[str], capacity: int):
+        """
+        Args:
+            path: Fichier du tampon (créé s'il n'existe pas)
+            channels: Noms des canaux numériques, dans l'ordre des enregistrements
+            capacity: Nombre de lectures conservées (ignoré si le fichier existe déjà)
+
+        Raises:
+            ValueError: si le fichier existant n'a pas le format attendu
+        """
+        self.path = Path(path)
+        self.channels = list(channels)
+        self.record_dtype = np.dtype([('timestamp', '<i8')] + [(name, '<f4') for name in self.channels])
+
+        if self.path.exists():
+            header = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)
+            if len(header) != 1 or header['magic'][0] != MAGIC or header['version'][0] != VERSION:
+                raise ValueError(f"Fichier de capteurs circulaire invalide : {self.path}")
+            if int(header['channels'][0]) != len(self.channels):
+                raise ValueError(f"Nombre de canaux inattendu dans {self.path}")
+            file_capacity = int(header['capacity'][0])
+            if file_capacity != capacity:
+                logger.warning(f"[SENSORS] Capacité du fichier conservée ({file_capacity}), "
+                               f"différente de la configuration ({capacity})")
+            self.capacity = file_capacity
+            self._mm = np.memmap(self.path, dtype=np.uint8, mode='r+')
+        else:
+            if capacity <= 0:
+                raise ValueError("La capacité du tampon circulaire doit être positive")
+            self.capacity = capacity
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._mm = np.memmap(self.path, dtype=np.uint8, mode='w+',
+                                 shape=(HEADER_SIZE + capacity * self.record_dtype.itemsize,))
+            header = self._mm[:HEADER_SIZE].view(HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['version'] = VERSION
+            header['channels'] = len(self.channels)
+            header['capacity'] = capacity
+            header['count'] = 0
+            self._mm.flush()
+
+        self._header = self._mm[:HEADER_SIZE].view(HEADER_DTYPE)
+        self._records = self._mm[HEADER_SIZE:].view(self.record_dtype)
+
+    @property
+    def total_written(self) -> int:
+        """Nombre de lectures écrites depuis la création (y compris celles écrasées)"""
+        return int(self._header['count'][0])
+
+    def __len__(self) -> int:
+        return min(self.total_written, self.capacity)
+
+    def append(self, timestamp: int, reading: Dict) -> None:
+        """Écrit une lecture à la place de la plus ancienne ; les canaux absents valent NaN"""
+        count = self.total_written
+        record = self._records[count % self.capacity]
+        record['timestamp'] = timestamp
+        for name in self.channels:
+            value = reading.get(name)
+            record[name] = np.nan if value is None or value == '' else float(value)
+        # La lecture est synchronisée avant le compteur : un arrêt brutal ne publie pas de ligne partielle
+        self._mm.flush()
+        self._header['count'] = count + 1
+        self._mm.flush()
+
+    def extend(self, timestamps: np.ndarray, values: Dict[str, np.ndarray]) -> None:
+        """Ajoute un lot de lectures en une écriture vectorisée (ex. import d'un CSV)"""
+        timestamps = np.asarray(timestamps, dtype='<i8')
+        if len(timestamps) > self.capacity:
+            # Seules les `capacity` dernières lectures survivraient
+            start = len(timestamps) - self.capacity
+            timestamps = timestamps[start:]
+            values = {name: np.asarray(column)[start:] for name, column in values.items()}
+        count = self.total_written
+        positions = (count + np.arange(len(timestamps))) % self.capacity
+        self._records['timestamp'][positions] = timestamps
+        for name in self.channels:
+            column = values.get(name)
+            self._records[name][positions] = np.nan if column is None else np.asarray(column, dtype='<f4')
+        self._mm.flush()
+        self._header['count'] = count + len(timestamps)
+        self._mm.flush()
+
+    def latest(self) -> Optional[np.void]:
+        """Dernière lecture (vue sur l'enregistrement), None si le tampon est vide"""
+        count = self.total_written
+        if count == 0:
+            return None
+        return self._records[(count - 1) % self.capacity]
+
+    def oldest(self) -> Optional[np.void]:
+        """Lecture la plus ancienne (remplacée par le prochain ajout une fois plein), None si vide"""
+        count = self.total_written
+        if count == 0:
+            return None
+        return self._records[count % self.capacity if count >= self.capacity else 0]
+
+    def segments(self) -> List[np.ndarray]:
+        """Vues (sans copie) couvrant les lectures dans l'ordre chronologique : une, ou deux après rebouclage"""
+        count = self.total_written
+        if count <= self.capacity:
+            return [self._records[:count]]
+        start = count % self.capacity
+        return [self._records[start:], self._records[:start]]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Colonne chronologique ('timestamp' ou un canal)
+
+        Vue sans copie tant que le tampon n'a pas rebouclé ; concaténation des
+        deux segments ensuite.
+        """
+        parts = [segment[name] for segment in self.segments()]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def close(self) -> None:
+        """Synchronise et libère le mappage"""
+        self._mm.flush()
+        del self._records, self._header, self._mm
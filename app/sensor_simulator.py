@@ -0,0 +1,148 @@
+"""
+Simulation vectorisée de lectures de capteurs (remplissage d'historique, tests de charge)
+"""
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from app.sensor_data_loader import SENSOR_COLUMNS, SENSOR_DEFAULTS
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Grandeurs météo attendues (même sens que WeatherAPI.get_current_weather)
+WEATHER_FIELDS = {'temperature': 20.0, 'humidity': 50.0, 'rainfall': 0.0, 'rainfall_3h': 0.0}
+
+
+class BatchSensorSimulator:
+    """
+    Fait évoluer plusieurs zones sur plusieurs pas de temps en une fois
+
+    Reprend le modèle de SensorDataLoader.generate_new_sensor_reading (mêmes
+    formules, bornes et arrondis), calculé sur des tableaux (pas de temps,
+    zones). Chaque zone tire ses aléas d'un générateur NumPy dérivé de la graine :
+    une zone donne la même série quel que soit le nombre de zones simulées.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: Graine des générateurs (None = non reproductible)
+        """
+        self.seed = seed
+
+    def _generators(self, n_zones: int) -> List[np.random.Generator]:
+        return [np.random.default_rng(child) for child in np.random.SeedSequence(self.seed).spawn(n_zones)]
+
+    def simulate(self, initial_states: List[Dict], weather: Dict[str, ArrayLike],
+                 irrigation_minutes: ArrayLike = 0.0, n_steps: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Simule n_steps lectures pour chaque zone
+
+        Args:
+            initial_states: État de départ de chaque zone (ex. get_current_sensor_data())
+            weather: Série météo par grandeur ('temperature', 'humidity', 'rainfall',
+                'rainfall_3h'), de forme (pas,) commune aux zones ou (pas, zones)
+            irrigation_minutes: Durée d'irrigation à chaque pas, de forme scalaire,
+                (pas,) ou (pas, zones) ; 0 = pas d'irrigation
+            n_steps: Nombre de pas (déduit de la série météo si absent)
+
+        Returns:
+            Dictionnaire canal -> tableau (pas, zones) des valeurs arrondies à 0,1
+        """
+        n_zones = len(initial_states)
+        if n_steps is None:
+            lengths = [len(np.atleast_1d(values)) for values in weather.values() if np.ndim(values) > 0]
+            n_steps = max(lengths) if lengths else 1
+        shape = (n_steps, n_zones)
+
+        def series(values) -> np.ndarray:
+            array = np.asarray(values, dtype=float)
+            if array.ndim == 1:
+                array = array[:, None]
+            return np.broadcast_to(array, shape)
+
+        temp_air = series(weather.get('temperature', WEATHER_FIELDS['temperature']))
+        humidity_air = series(weather.get('humidity', WEATHER_FIELDS['humidity']))
+        rainfall = (series(weather.get('rainfall', WEATHER_FIELDS['rainfall']))
+                    + series(weather.get('rainfall_3h', WEATHER_FIELDS['rainfall_3h'])) / 3.0)
+        minutes = series(irrigation_minutes)
+        irrigating = minutes > 0
+
+        # Aléas tirés en bloc, une colonne par zone
+        noise = {name: np.empty(shape) for name in
+                 ('temp_sol', 'et', 'irrigation_gain', 'humidite', 'consommation', 'racines', 'ph', 'ce')}
+        for zone, rng in enumerate(self._generators(n_zones)):
+            noise['temp_sol'][:, zone] = rng.uniform(-1.0, 1.0, n_steps)
+            noise['et'][:, zone] = rng.uniform(-0.5, 0.5, n_steps)
+            noise['irrigation_gain'][:, zone] = rng.uniform(12.0, 20.0, n_steps)
+            noise['humidite'][:, zone] = rng.uniform(-2.0, 2.0, n_steps)
+            noise['consommation'][:, zone] = rng.uniform(4.0, 8.0, n_steps)
+            noise['racines'][:, zone] = rng.uniform(0.0, 0.3, n_steps)
+            noise['ph'][:, zone] = rng.uniform(-0.05, 0.05, n_steps)
+            noise['ce'][:, zone] = rng.uniform(-0.05, 0.05, n_steps)
+
+        # Grandeurs qui ne dépendent pas de l'état : calculées sur toute la série
+        et_raw = np.maximum(0.5, (temp_air / 10.0) * (1 - humidity_air / 100.0) * 2.0) + noise['et']
+        evapotranspiration = np.round(et_raw, 1)
+        # Comme le modèle scalaire, la perte d'humidité utilise l'ET avant arrondi
+        loss_et = et_raw * 0.5
+        gain_irrigation = np.where(irrigating, noise['irrigation_gain'] * np.clip(minutes / 30.0, 0.3, 2.0), 0.0)
+        consommation = noise['consommation'] * np.minimum(minutes / 30.0, 2.0)
+
+        state = {
+            col: np.array([float(s.get(col, SENSOR_DEFAULTS[col])) for s in initial_states])
+            for col in SENSOR_DEFAULTS
+        }
+        out = {col: np.empty(shape) for col in SENSOR_DEFAULTS}
+        out['evapotranspiration'][:] = evapotranspiration
+
+        # Les grandeurs à inertie dépendent du pas précédent : une itération par pas, vectorisée sur les zones
+        for t in range(n_steps):
+            temperature_sol = state['temperature_sol'] * 0.7 + temp_air[t] * 0.3 + noise['temp_sol'][t]
+            humidite_sol = np.clip(state['humidite_sol'] - loss_et[t] + rainfall[t] + gain_irrigation[t], 0.0, 100.0)
+            humidite_sol = np.clip(humidite_sol + noise['humidite'][t], 0.0, 100.0)
+
+            niveau_reservoir = np.where(irrigating[t], state['niveau_reservoir'] - consommation[t],
+                                        state['niveau_reservoir'] + rainfall[t] * 0.5)
+            niveau_reservoir = np.clip(niveau_reservoir, 0.0, 100.0)
+
+            profondeur_racines = np.clip(state['profondeur_racines'] + noise['racines'][t], 10.0, 60.0)
+            ph_sol = np.clip(state['ph_sol'] + noise['ph'][t], 5.5, 8.0)
+            conductivite = np.clip(state['conductivite_electrique'] + noise['ce'][t], 0.1, 3.0)
+
+            # Comme pour une lecture enregistrée puis relue, le pas suivant part des valeurs arrondies
+            state = {
+                'humidite_sol': np.round(humidite_sol, 1),
+                'temperature_sol': np.round(temperature_sol, 1),
+                'niveau_reservoir': np.round(niveau_reservoir, 1),
+                'evapotranspiration': evapotranspiration[t],
+                'profondeur_racines': np.round(profondeur_racines, 1),
+                'ph_sol': np.round(ph_sol, 1),
+                'conductivite_electrique': np.round(conductivite, 1),
+            }
+            for col, values in state.items():
+                out[col][t] = values
+
+        return out
+
+    def simulate_frames(self, initial_states: List[Dict], weather: Dict[str, ArrayLike],
+                        dates: Sequence, irrigation_minutes: ArrayLike = 0.0) -> List[pd.DataFrame]:
+        """
+        Simule puis met en forme une table de lectures par zone (colonnes du CSV de capteurs)
+
+        Args:
+            dates: Date de chaque pas (chaînes ISO ou horodatages), définit le nombre de pas
+
+        Returns:
+            Liste de DataFrames, dans l'ordre de initial_states, prêts pour add_sensor_readings
+        """
+        dates = pd.Series(pd.to_datetime(list(dates)))
+        result = self.simulate(initial_states, weather, irrigation_minutes, n_steps=len(dates))
+        # Dates au jour près comme generate_new_sensor_reading, avec l'heure pour des pas infra-journaliers
+        has_time = bool((dates != dates.dt.normalize()).any())
+        labels = dates.dt.strftime('%Y-%m-%dT%H:%M:%S' if has_time else '%Y-%m-%d').to_numpy()
+        frames = []
+        for zone in range(len(initial_states)):
+            frame = pd.DataFrame({col: result[col][:, zone] for col in SENSOR_COLUMNS[1:]})
+            frame.insert(0, 'date', labels)
+            frames.append(frame)
+        return frames
@@ -0,0 +1,165 @@
+"""
+Index des conditions historiques pour retrouver les situations passées les plus proches
+"""
+from typing import Dict, List, Optional, Tuple
+import heapq
+import numpy as np
+import pandas as pd
+
+# Colonne historique -> nom du paramètre de requête
+FEATURE_COLUMNS = {
+    'temperature': 'temperature',
+    'humidite_air': 'humidity',
+    'pluviometrie': 'rainfall',
+    'humidite_sol': 'humidite_sol',
+}
+
+
+class KDTree:
+    """
+    Arbre k-d sur des points NumPy (construction O(n log n), requête ~O(log n))
+
+    Les points sont permutés une fois pour que chaque nœud couvre une tranche
+    contiguë ; les feuilles calculent leurs distances de façon vectorisée.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        """
+        Args:
+            points: Tableau (n, d) des coordonnées
+            leaf_size: Nombre maximal de points par feuille
+        """
+        self.points = np.asarray(points, dtype=float)
+        self.leaf_size = max(1, leaf_size)
+        self.indices = np.arange(len(self.points))
+        # Nœud i : (début, fin, dimension de coupe, valeur de coupe, enfant gauche, enfant droit)
+        self._nodes: List[Tuple[int, int, int, float, int, int]] = []
+        if len(self.points):
+            self._build(0, len(self.points))
+
+    def _build(self, start: int, end: int) -> int:
+        node_id = len(self._nodes)
+        self._nodes.append((start, end, -1, 0.0, -1, -1))
+        if end - start <= self.leaf_size:
+            return node_id
+
+        subset = self.points[self.indices[start:end]]
+        dim = int(np.argmax(subset.max(axis=0) - subset.min(axis=0)))
+        mid = (end - start) // 2
+        order = np.argpartition(subset[:, dim], mid)
+        self.indices[start:end] = self.indices[start:end][order]
+        split_value = float(self.points[self.indices[start + mid], dim])
+
+        left = self._build(start, start + mid)
+        right = self._build(start + mid, end)
+        self._nodes[node_id] = (start, end, dim, split_value, left, right)
+        return node_id
+
+    def query(self, point: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retourne les k plus proches voisins (distance euclidienne)
+
+        Returns:
+            (distances, indices) triés du plus proche au plus lointain
+        """
+        point = np.asarray(point, dtype=float)
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=int)
+
+        # Tas max des k meilleurs : (-distance², indice)
+        best: List[Tuple[float, int]] = []
+        stack = [0]
+        while stack:
+            start, end, dim, split_value, left, right = self._nodes[stack.pop()]
+            if dim < 0:
+                ids = self.indices[start:end]
+                distances = ((self.points[ids] - point) ** 2).sum(axis=1)
+                for distance, idx in zip(distances.tolist(), ids.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, idx))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, idx))
+                continue
+
+            diff = point[dim] - split_value
+            near, far = (left, right) if diff < 0 else (right, left)
+            # La branche lointaine n'est explorée que si elle peut contenir un meilleur voisin
+            if len(best) < k or diff * diff < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+
+        best.sort(key=lambda item: -item[0])
+        distances = np.sqrt([-item[0] for item in best])
+        return distances, np.array([item[1] for item in best], dtype=int)
+
+
+class SimilarConditionsIndex:
+    """
+    Plus proches situations historiques sur les conditions normalisées
+
+    Température, humidité de l'air, pluviométrie (et humidité du sol si la
+    colonne existe) sont centrées-réduites avant indexation. Chaque voisin est
+    retourné avec sa décision d'irrigation et la note moyenne des revues
+    d'experts portant sur des décisions du même jour.
+    """
+
+    def __init__(self, data: pd.DataFrame, reviews: Optional[pd.DataFrame] = None, leaf_size: int = 16):
+        """
+        Args:
+            data: Données historiques (colonnes temperature, humidite_air, pluviometrie, irrigation)
+            reviews: Revues d'experts (colonnes decision_timestamp, stars), optionnel
+        """
+        self.feature_columns = [col for col in FEATURE_COLUMNS if col in data.columns]
+        features = data[self.feature_columns].apply(pd.to_numeric, errors='coerce')
+        valid = features.notna().all(axis=1).to_numpy()
+        self.data = data[valid].reset_index(drop=True)
+        values = features[valid].to_numpy(dtype=float)
+
+        self.means = values.mean(axis=0) if len(values) else np.zeros(len(self.feature_columns))
+        scales = values.std(axis=0) if len(values) else np.ones(len(self.feature_columns))
+        self.scales = np.where(scales > 0, scales, 1.0)
+        self.tree = KDTree((values - self.means) / self.scales, leaf_size=leaf_size)
+        self.review_scores = self._review_scores_by_date(reviews)
+
+    @staticmethod
+    def _review_scores_by_date(reviews: Optional[pd.DataFrame]) -> Dict[str, float]:
+        """Note moyenne des revues par jour de décision"""
+        if reviews is None or len(reviews) == 0 or 'decision_timestamp' not in reviews.columns:
+            return {}
+        days = reviews['decision_timestamp'].astype(str).str.slice(0, 10)
+        stars = pd.to_numeric(reviews['stars'], errors='coerce')
+        return stars.groupby(days).mean().dropna().round(2).to_dict()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def nearest(self, temperature: float, humidity: float, rainfall: float,
+                humidite_sol: Optional[float] = None, k: int = 5) -> List[Dict]:
+        """
+        Retourne les k situations historiques les plus proches
+
+        Une grandeur indexée mais absente de la requête prend sa valeur moyenne
+        (elle ne départage alors pas les voisins).
+        """
+        query = {'temperature': temperature, 'humidity': humidity, 'rainfall': rainfall,
+                 'humidite_sol': humidite_sol}
+        point = np.array([
+            query[FEATURE_COLUMNS[col]] if query[FEATURE_COLUMNS[col]] is not None else self.means[i]
+            for i, col in enumerate(self.feature_columns)
+        ], dtype=float)
+        distances, ids = self.tree.query((point - self.means) / self.scales, k=k)
+
+        neighbours = []
+        for distance, idx in zip(distances.tolist(), ids.tolist()):
+            row = self.data.iloc[idx]
+            date = str(row['date'])[:10] if 'date' in self.data.columns else None
+            neighbour = {col: float(row[col]) for col in self.feature_columns}
+            neighbour.update({
+                'date': date,
+                'irrigation': int(row['irrigation']) if 'irrigation' in self.data.columns and pd.notna(row['irrigation']) else None,
+                'review_score': self.review_scores.get(date),
+                'distance': round(distance, 3)
+            })
+            neighbours.append(neighbour)
+        return neighbours
@@ -0,0 +1,360 @@
+"""
+Stockage des tables de données (capteurs, historique, revues) : CSV ou Parquet partitionné
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+import csv
+import io
+import os
+import shutil
+import time
+import uuid
+import logging
+import pandas as pd
+from config import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Colonne de partition des jeux Parquet (mois de la colonne date, ex. "2025-12")
+PARTITION_COLUMN = 'month'
+UNDATED_PARTITION = '0000-00'
+
+# Types de colonne acceptés dans un schéma de table (colonne -> type)
+COLUMN_TYPES = ('string', 'float', 'int')
+
+
+class TableStorage(ABC):
+    """
+    Interface commune des backends de stockage
+
+    Une table est une suite chronologique de lignes avec une colonne date au
+    format ISO (les comparaisons de chaînes suivent l'ordre chronologique).
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, date_column: str = 'date',
+                 schema: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            columns: Colonnes de la table, dans l'ordre d'écriture (None = celles du schéma ou des données)
+            date_column: Colonne utilisée pour le filtrage par date et le partitionnement
+            schema: Type de chaque colonne ('string', 'float' ou 'int'), dans l'ordre d'écriture
+
+        Raises:
+            ValueError: si un type de colonne est inconnu
+        """
+        if schema is not None:
+            unknown = {name: kind for name, kind in schema.items() if kind not in COLUMN_TYPES}
+            if unknown:
+                raise ValueError(f"Types de colonne inconnus : {unknown} (attendu : {', '.join(COLUMN_TYPES)})")
+        self.schema = schema
+        self.columns = columns or (list(schema) if schema is not None else None)
+        self.date_column = date_column
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """Indique si la table contient déjà des données sur disque"""
+
+    @abstractmethod
+    def initialize(self) -> None:
+        """Crée la table vide si elle n'existe pas"""
+
+    @abstractmethod
+    def read(self, columns: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lit la table
+
+        Args:
+            columns: Colonnes à charger (toutes par défaut)
+            start: Date ISO minimale incluse (ex. "2025-01-01")
+            end: Date ISO maximale incluse ; une date seule couvre toute la journée
+        """
+
+    @abstractmethod
+    def append(self, rows: List[Dict]) -> None:
+        """Ajoute des lignes en fin de table, durablement (fsync)"""
+
+    @abstractmethod
+    def rewrite(self, data: pd.DataFrame) -> None:
+        """Remplace tout le contenu de la table de façon atomique"""
+
+    def _row_columns(self, rows: List[Dict]) -> List[str]:
+        return self.columns or list(rows[0].keys())
+
+    def _filter_dates(self, data: pd.DataFrame, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+        """Filtre les lignes sur la colonne date (comparaison de chaînes ISO)"""
+        if (start is None and end is None) or self.date_column not in data.columns:
+            return data
+        dates = data[self.date_column].astype(str)
+        mask = pd.Series(True, index=data.index)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= _end_bound(end)
+        return data[mask]
+
+
+def _end_bound(end: str) -> str:
+    """Borne supérieure incluse : "2025-12-15" couvre aussi "2025-12-15T23:59:59" """
+    return end + '\uffff'
+
+
+class CsvTableStorage(TableStorage):
+    """Table dans un fichier CSV (ajout ligne à ligne, réécriture atomique)"""
+
+    def __init__(self, csv_path: str, columns: Optional[List[str]] = None, date_column: str = 'date',
+                 read_options: Optional[Dict] = None, schema: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            csv_path: Chemin du fichier CSV
+            read_options: Options supplémentaires transmises à pd.read_csv
+        """
+        super().__init__(columns, date_column, schema)
+        self.path = Path(csv_path)
+        self.read_options = read_options or {}
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def initialize(self) -> None:
+        if not self.path.exists() and self.columns:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(",".join(self.columns) + "\n", encoding="utf-8")
+
+    def read(self, columns: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame(columns=columns or self.columns)
+        filtering = start is not None or end is not None
+        usecols = None
+        if columns is not None:
+            wanted = set(columns) | ({self.date_column} if filtering else set())
+            usecols = lambda col: col in wanted
+        data = self._filter_dates(pd.read_csv(self.path, usecols=usecols, **self.read_options), start, end)
+        if columns is not None:
+            data = data[[col for col in columns if col in data.columns]]
+        return data.reset_index(drop=True) if filtering else data
+
+    def append(self, rows: List[Dict]) -> None:
+        """Écrit les lignes en fin de fichier, avec l'en-tête si le fichier est neuf"""
+        if not rows:
+            return
+        columns = self._row_columns(rows)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+
+        is_new_file = not self.path.exists() or self.path.stat().st_size == 0
+        if is_new_file:
+            writer.writerow(columns)
+        elif not self._ends_with_newline():
+            # Dernière ligne tronquée (arrêt brutal pendant une écriture) : on la termine
+            buffer.write('\n')
+        for row in rows:
+            writer.writerow([row.get(col, '') for col in columns])
+
+        with open(self.path, 'a', encoding='utf-8', newline='') as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self) -> bool:
+        """Vérifie le dernier octet du fichier sans le relire entièrement"""
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def rewrite(self, data: pd.DataFrame) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            data.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class ParquetTableStorage(TableStorage):
+    """
+    Table Parquet partitionnée par mois (répertoire month=AAAA-MM/)
+
+    Chaque ajout écrit un petit fragment ; rewrite() les regroupe en un fichier
+    par mois. La lecture ne charge que les colonnes demandées et ignore les
+    partitions hors de l'intervalle de dates.
+
+    Tous les fragments suivent le schéma déclaré de la table : le type d'une
+    colonne ne dépend pas des valeurs du premier fragment (ex. commentaire vide).
+    Sans schéma déclaré, celui du premier fragment est repris.
+    """
+
+    def __init__(self, directory: str, columns: Optional[List[str]] = None, date_column: str = 'date',
+                 schema: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            directory: Répertoire du jeu de données
+        """
+        super().__init__(columns, date_column, schema)
+        # Import différé : pyarrow n'est requis qu'avec STORAGE_BACKEND=parquet
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._ds = pyarrow.dataset
+        self._pq = pyarrow.parquet
+        arrow_types = {'string': pyarrow.string(), 'float': pyarrow.float64(), 'int': pyarrow.int64()}
+        self._arrow_schema = (pyarrow.schema([(name, arrow_types[kind]) for name, kind in schema.items()])
+                              if schema is not None else None)
+        self.directory = Path(directory)
+        self._recover()
+
+    def _recover(self) -> None:
+        """Restaure l'ancien jeu si une réécriture a été interrompue entre les deux renommages"""
+        old_dir = self.directory.with_name(self.directory.name + '.old')
+        if not self.directory.exists() and old_dir.exists():
+            os.replace(old_dir, self.directory)
+
+    def _files(self) -> List[str]:
+        """Fragments dans l'ordre chronologique (mois, puis ordre d'écriture)"""
+        if not self.directory.exists():
+            return []
+        return sorted(str(path) for path in self.directory.glob(f'{PARTITION_COLUMN}=*/*.parquet'))
+
+    def exists(self) -> bool:
+        return bool(self._files())
+
+    def initialize(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def read(self, columns: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        files = self._files()
+        if not files:
+            return pd.DataFrame(columns=columns or self.columns)
+
+        ds = self._ds
+        partitioning = ds.partitioning(self._pa.schema([(PARTITION_COLUMN, self._pa.string())]), flavor='hive')
+        dataset = ds.dataset(files, format='parquet', partitioning=partitioning,
+                             partition_base_dir=str(self.directory))
+
+        # Filtre sur la partition (fichiers ignorés) puis sur la colonne date (statistiques des row groups)
+        expression = None
+        if start is not None:
+            expression = (ds.field(PARTITION_COLUMN) >= start[:7]) & (ds.field(self.date_column) >= start)
+        if end is not None:
+            upper = (ds.field(PARTITION_COLUMN) <= end[:7]) & (ds.field(self.date_column) <= _end_bound(end))
+            expression = upper if expression is None else expression & upper
+
+        names = [name for name in dataset.schema.names if name != PARTITION_COLUMN]
+        if columns is not None:
+            names = [name for name in columns if name in names]
+        return dataset.to_table(columns=names, filter=expression).to_pandas()
+
+    def append(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        data = pd.DataFrame(rows, columns=self._row_columns(rows))
+        schema = self._schema()
+        for month, part in self._partitions(data):
+            self._write_fragment(self.directory, month, part, schema)
+
+    def rewrite(self, data: pd.DataFrame) -> None:
+        """Écrit le nouveau jeu à côté puis l'échange avec l'ancien"""
+        tmp_dir = self.directory.with_name(self.directory.name + '.tmp')
+        old_dir = self.directory.with_name(self.directory.name + '.old')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        schema = self._arrow_schema
+        if schema is None and len(data.columns):
+            schema = self._pa.Schema.from_pandas(data, preserve_index=False)
+        for month, part in self._partitions(data):
+            self._write_fragment(tmp_dir, month, part, schema)
+
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if self.directory.exists():
+            os.replace(self.directory, old_dir)
+        os.replace(tmp_dir, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _schema(self):
+        """Schéma des nouveaux fragments : celui déclaré, sinon celui du jeu existant (None si vide)"""
+        if self._arrow_schema is not None:
+            return self._arrow_schema
+        files = self._files()
+        return self._pq.read_schema(files[0]) if files else None
+
+    def _partitions(self, data: pd.DataFrame):
+        """Découpe les lignes par mois de la colonne date, en conservant leur ordre"""
+        if self.date_column not in data.columns:
+            yield UNDATED_PARTITION, data
+            return
+        months = data[self.date_column].astype(str).str.slice(0, 7)
+        months = months.where(months.str.match(r'^\d{4}-\d{2}$'), UNDATED_PARTITION)
+        for month in months.drop_duplicates():
+            yield month, data[months == month]
+
+    def _write_fragment(self, base_dir: Path, month: str, data: pd.DataFrame, schema) -> None:
+        """Écrit un fragment de façon atomique (fichier caché puis renommage)"""
+        if schema is None:
+            table = self._pa.Table.from_pandas(data, preserve_index=False)
+        else:
+            table = self._pa.Table.from_arrays(
+                [self._column_array(data, field) for field in schema], schema=schema
+            )
+
+        partition_dir = base_dir / f'{PARTITION_COLUMN}={month}'
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        # Noms croissants : l'ordre lexicographique des fragments suit l'ordre d'écriture
+        name = f'part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet'
+        tmp_path = partition_dir / f'.{name}.tmp'
+        with open(tmp_path, 'wb') as f:
+            self._pq.write_table(table, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, partition_dir / name)
+
+    def _column_array(self, data: pd.DataFrame, field):
+        """Colonne convertie au type du schéma (valeurs manquantes -> null, colonne absente -> nulls)"""
+        if field.name not in data.columns:
+            return self._pa.nulls(len(data), field.type)
+        values = data[field.name]
+        if self._pa.types.is_string(field.type) and not pd.api.types.is_string_dtype(values):
+            # Colonne texte lue comme nombres ou entièrement vide (NaN) : valeurs présentes en texte
+            values = values.astype(object).where(values.isna(), values.astype(str))
+        return self._pa.array(values, type=field.type, from_pandas=True)
+
+
+def migrate_to_parquet(source: TableStorage, target: 'ParquetTableStorage') -> int:
+    """Copie une table (ex. CSV existant) dans un jeu Parquet ; retourne le nombre de lignes"""
+    start = time.time()
+    data = source.read()
+    target.rewrite(data)
+    logger.info(f"[STORAGE] {len(data)} lignes migrées vers {target.directory} en {time.time() - start:.2f}s")
+    return len(data)
+
+
+def create_storage(csv_path: str, columns: Optional[List[str]] = None, date_column: str = 'date',
+                   read_options: Optional[Dict] = None, backend: str = STORAGE_BACKEND,
+                   schema: Optional[Dict[str, str]] = None) -> TableStorage:
+    """
+    Crée le stockage d'une table selon le backend configuré
+
+    Avec le backend "parquet", le jeu est placé à côté du CSV (data/x.csv ->
+    data/x.parquet/) ; si ce répertoire n'existe pas encore, le CSV y est migré une fois.
+
+    Args:
+        schema: Type de chaque colonne ('string', 'float', 'int') ; fixe les types du jeu Parquet
+
+    Raises:
+        ValueError: si le backend ou un type de colonne est inconnu
+    """
+    csv_storage = CsvTableStorage(csv_path, columns, date_column, read_options, schema)
+    if backend == 'csv':
+        return csv_storage
+    if backend == 'parquet':
+        parquet_storage = ParquetTableStorage(str(Path(csv_path).with_suffix('.parquet')), columns, date_column,
+                                              schema)
+        if not parquet_storage.directory.exists() and csv_storage.exists():
+            migrate_to_parquet(csv_storage, parquet_storage)
+        return parquet_storage
+    raise ValueError(f"Backend de stockage inconnu : {backend} (attendu : csv ou parquet)")
@@ -0,0 +1,276 @@
+"""
+Traces des décisions : étapes imbriquées (spans) chronométrées et conservées avec la décision
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import copy
+import datetime
+import json
+import re
+import sqlite3
+import threading
+import time
+import logging
+from config import DECISION_TRACE_PATH, DECISION_TRACE_CACHE_SIZE, DECISION_TRACE_MAX_COUNT
+
+logger = logging.getLogger(__name__)
+
+# Paramètres d'URL secrets (clé d'API météo...) masqués dans les messages d'erreur enregistrés
+_SECRET_PARAMS = re.compile(r'((?:appid|api_key|apikey|key|token)=)[^&\s\'"]+', re.IGNORECASE)
+
+TRACE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    trace TEXT NOT NULL
+)
+"""
+
+# Trace et span en cours pour le fil d'exécution ou la tâche asyncio courante
+_current: ContextVar[Optional[Tuple['DecisionTrace', Dict]]] = ContextVar('decision_trace_span', default=None)
+
+
+class DecisionTrace:
+    """
+    Arbre des étapes d'une décision
+
+    La trace est rendue active (activate) autour des appels du moteur ; les
+    composants ouvrent leurs spans avec span(), sans recevoir la trace en
+    paramètre. Hors trace active, span() ne fait rien.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.trace_id: Optional[str] = None
+        self.started_at = datetime.datetime.now().isoformat()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.root = self._new_span(name, attributes, self._origin)
+
+    @staticmethod
+    def _new_span(name: str, attributes: Dict, start: float) -> Dict:
+        return {'name': name, 'start': start, 'end': None, 'attributes': dict(attributes),
+                'error': None, 'children': []}
+
+    @contextmanager
+    def activate(self) -> Iterator['DecisionTrace']:
+        """Rattache les spans ouverts dans le bloc à la racine de la trace"""
+        token = _current.set((self, self.root))
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def _open(self, parent: Dict, name: str, attributes: Dict) -> Dict:
+        child = self._new_span(name, attributes, time.perf_counter())
+        with self._lock:
+            parent['children'].append(child)
+        return child
+
+    def graft(self, spans: List[Dict], **attributes) -> None:
+        """Ajoute sous la racine des spans mesurés dans une autre trace (ex. météo partagée par un cycle)"""
+        with self._lock:
+            for span_data in spans:
+                grafted = copy.deepcopy(span_data)
+                grafted['attributes'].update(attributes)
+                self.root['children'].append(grafted)
+
+    def finish(self, trace_id: str, **attributes) -> None:
+        """Clôt la trace et lui donne l'identifiant de la décision"""
+        self.trace_id = trace_id
+        self.root['attributes'].update(attributes)
+        self.root['end'] = time.perf_counter()
+
+    def _export(self, span_data: Dict) -> Dict:
+        end = span_data['end']
+        exported = {
+            'name': span_data['name'],
+            'start_ms': round((span_data['start'] - self._origin) * 1000, 1),
+            'duration_ms': round((end - span_data['start']) * 1000, 1) if end is not None else None,
+            'attributes': span_data['attributes'],
+        }
+        if span_data['error']:
+            exported['error'] = span_data['error']
+        if span_data['children']:
+            exported['children'] = [self._export(child) for child in span_data['children']]
+        return exported
+
+    def to_dict(self) -> Dict:
+        """Trace sérialisable (durées en millisecondes depuis le début de la trace)"""
+        with self._lock:
+            return {
+                'trace_id': self.trace_id,
+                'started_at': self.started_at,
+                'root': self._export(self.root)
+            }
+
+
+@contextmanager
+def activate(trace: Optional[DecisionTrace]) -> Iterator[Optional[DecisionTrace]]:
+    """Active la trace dans le bloc (sans effet si None)"""
+    if trace is None:
+        yield None
+        return
+    with trace.activate():
+        yield trace
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Dict]:
+    """
+    Chronomètre un bloc comme étape de la trace active
+
+    Returns:
+        Attributs du span, modifiables dans le bloc (ex. attributes['cache'] = 'hit')
+    """
+    current = _current.get()
+    if current is None:
+        yield attributes
+        return
+    trace, parent = current
+    child = trace._open(parent, name, attributes)
+    token = _current.set((trace, child))
+    try:
+        yield child['attributes']
+    except BaseException as e:
+        child['error'] = _SECRET_PARAMS.sub(r'\1***', f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        child['end'] = time.perf_counter()
+        _current.reset(token)
+
+
+def set_attributes(**attributes) -> None:
+    """Complète les attributs du span en cours (sans effet hors trace)"""
+    current = _current.get()
+    if current is not None:
+        current[1]['attributes'].update(attributes)
+
+
+def format_trace(trace: Dict) -> str:
+    """Rendu texte d'une trace : une ligne par span, indentée selon l'imbrication"""
+    lines = [f"Trace {trace.get('trace_id')} ({trace.get('started_at')})"]
+
+    def render(span_data: Dict, depth: int) -> None:
+        duration = span_data.get('duration_ms')
+        duration_text = f"{duration:>10.1f} ms" if duration is not None else "   (non clos)"
+        attributes = ', '.join(f"{key}={value}" for key, value in span_data.get('attributes', {}).items()
+                               if value is not None)
+        line = f"{duration_text}  +{span_data.get('start_ms', 0):.1f} ms  {'  ' * depth}{span_data['name']}"
+        if attributes:
+            line += f"  [{attributes}]"
+        if span_data.get('error'):
+            line += f"  ERREUR: {span_data['error']}"
+        lines.append(line)
+        for child in span_data.get('children', []):
+            render(child, depth + 1)
+
+    render(trace['root'], 0)
+    return '\n'.join(lines) + '\n'
+
+
+class TraceStore:
+    """
+    Traces persistées dans une base SQLite (mode WAL), indexées par identifiant de décision
+
+    Une lecture ne touche que la ligne demandée, quelle que soit la taille de la
+    base ; au-delà de `max_count` traces, les plus anciennes sont supprimées. Les
+    traces récentes sont aussi gardées en mémoire.
+    """
+
+    def __init__(self, path: str = DECISION_TRACE_PATH, cache_size: int = DECISION_TRACE_CACHE_SIZE,
+                 max_count: int = DECISION_TRACE_MAX_COUNT):
+        """
+        Args:
+            path: Fichier de la base SQLite (créé au besoin)
+            cache_size: Nombre de traces gardées en mémoire
+            max_count: Nombre de traces conservées sur disque (0 = toutes)
+        """
+        self.path = Path(path)
+        if self.path.suffix == '.jsonl':
+            # Ancienne configuration (JSON Lines) : la base est créée à côté et reprend le fichier
+            self.path = self.path.with_suffix('.db')
+        self.cache_size = cache_size
+        self.max_count = max_count
+        self._recent: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Une connexion de lecture par thread (les connexions SQLite ne se partagent pas)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        created = not self.path.exists()
+        # Connexion d'écriture, utilisée sous self._lock
+        self._conn = self._connect(check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(TRACE_SCHEMA)
+        legacy_path = self.path.with_suffix('.jsonl')
+        if created and legacy_path.exists():
+            self._import_jsonl(legacy_path)
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=check_same_thread)
+        # En WAL, NORMAL ne synchronise qu'aux checkpoints : une écriture ne coûte pas un fsync
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _import_jsonl(self, legacy_path: Path) -> None:
+        """Reprend une fois les traces de l'ancien fichier JSON Lines (laissé en place)"""
+        rows = []
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        trace = json.loads(line)
+                    except ValueError:
+                        continue
+                    if trace.get('trace_id'):
+                        rows.append((trace['trace_id'], trace.get('started_at'), line.rstrip('\n')))
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO traces (trace_id, started_at, trace) VALUES (?, ?, ?)', rows)
+                self._prune()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"[TRACE] Reprise de {legacy_path} impossible : {e}")
+            return
+        logger.info(f"[TRACE] {len(rows)} traces reprises depuis {legacy_path}")
+
+    def _prune(self) -> None:
+        """Supprime les traces au-delà de max_count (les rowid suivent l'ordre d'écriture)"""
+        if self.max_count > 0:
+            self._conn.execute('DELETE FROM traces WHERE rowid <= (SELECT MAX(rowid) FROM traces) - ?',
+                               (self.max_count,))
+
+    def save(self, trace: Dict) -> None:
+        """Ajoute une trace (clé : trace_id, identifiant de la décision)"""
+        document = json.dumps(trace, ensure_ascii=False, default=str)
+        with self._lock:
+            self._recent[trace['trace_id']] = trace
+            while len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+            try:
+                with self._conn:
+                    self._conn.execute('INSERT OR REPLACE INTO traces (trace_id, started_at, trace) VALUES (?, ?, ?)',
+                                       (trace['trace_id'], trace.get('started_at'), document))
+                    self._prune()
+            except sqlite3.Error as e:
+                logger.warning(f"[TRACE] Impossible de persister la trace {trace['trace_id']} : {e}")
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        """Retourne la trace d'une décision, ou None"""
+        with self._lock:
+            trace = self._recent.get(trace_id)
+        if trace is not None:
+            return trace
+        try:
+            row = self._reader().execute('SELECT trace FROM traces WHERE trace_id = ?', (trace_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"[TRACE] Lecture des traces impossible : {e}")
+            return None
+        return json.loads(row[0]) if row is not None else None
@@ -2,10 +2,14 @@
 Module de récupération des données météorologiques en temps réel
 """
 import requests
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+import threading
 import time
 import logging
-from config import WEATHER_API_KEY, WEATHER_API_URL, LATITUDE, LONGITUDE, CITY_NAME
+from app.http_client import http_client
+from app.tracing import span, set_attributes
+from config import (WEATHER_API_KEY, WEATHER_API_URL, LATITUDE, LONGITUDE, CITY_NAME,
+                    WEATHER_CACHE_TTL_SECONDS, WEATHER_CACHE_STALE_SECONDS)
 
 logger = logging.getLogger(__name__)
 
@@ -13,37 +17,120 @@ logger = logging.getLogger(__name__)
 class WeatherAPI:
     """Récupère les données météorologiques en temps réel"""
     
-    def __init__(self):
-        """Initialise l'API météo"""
+    def __init__(self, cache_ttl: float = WEATHER_CACHE_TTL_SECONDS,
+                 stale_ttl: float = WEATHER_CACHE_STALE_SECONDS):
+        """
+        Initialise l'API météo
+        
+        Args:
+            cache_ttl: Durée (s) pendant laquelle une réponse est considérée fraîche
+            stale_ttl: Durée (s) supplémentaire pendant laquelle une réponse périmée
+                est servie immédiatement pendant un rafraîchissement en arrière-plan
+        """
         self.api_key = WEATHER_API_KEY
         self.api_url = WEATHER_API_URL
         self.latitude = LATITUDE
         self.longitude = LONGITUDE
         self.city_name = CITY_NAME
+        self.cache_ttl = cache_ttl
+        self.stale_ttl = stale_ttl
+        # (lat, lon) -> (instant de récupération time.monotonic(), données météo)
+        self._cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+        self._cache_lock = threading.Lock()
+        self._refreshing: set = set()
     
-    def get_current_weather(self) -> Dict:
+    def get_current_weather(self, latitude: Optional[str] = None, longitude: Optional[str] = None,
+                            use_cache: bool = True) -> Dict:
         """
         Récupère les conditions météorologiques actuelles
         
+        Les réponses sont mises en cache par coordonnées. Une entrée fraîche est
+        retournée sans appel HTTP ; une entrée périmée (dans la fenêtre stale) est
+        retournée immédiatement et rafraîchie en arrière-plan.
+        
+        Args:
+            latitude: Latitude (par défaut celle de la configuration)
+            longitude: Longitude (par défaut celle de la configuration)
+            use_cache: False pour forcer un appel à l'API
+        
         Returns:
             Dictionnaire contenant les données météo formatées
         """
+        key = (str(latitude or self.latitude), str(longitude or self.longitude))
+        with span('weather_api.get_current_weather', latitude=key[0], longitude=key[1]):
+            return self._get_current_weather(key, use_cache)
+    
+    def _get_current_weather(self, key: Tuple[str, str], use_cache: bool) -> Dict:
+        if use_cache:
+            with self._cache_lock:
+                entry = self._cache.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < self.cache_ttl:
+                    set_attributes(cache='fresh', age_seconds=round(age))
+                    logger.info(f"[WEATHER] ✓ Données météo servies depuis le cache (âge: {age:.0f}s)")
+                    return dict(entry[1])
+                if age < self.cache_ttl + self.stale_ttl:
+                    set_attributes(cache='stale', age_seconds=round(age))
+                    logger.info(f"[WEATHER] Données périmées servies (âge: {age:.0f}s), rafraîchissement en arrière-plan")
+                    self._refresh_in_background(key)
+                    return dict(entry[1])
+        
+        set_attributes(cache='miss')
+        weather_data = self._fetch_weather(key)
+        if weather_data is None:
+            # Dernière valeur connue encore exploitable plutôt que des valeurs par défaut
+            with self._cache_lock:
+                entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.cache_ttl + self.stale_ttl:
+                set_attributes(fallback='last_known')
+                return dict(entry[1])
+            set_attributes(fallback='default')
+            return self._get_default_weather()
+        return dict(weather_data)
+    
+    def _refresh_in_background(self, key: Tuple[str, str]) -> None:
+        """Lance un rafraîchissement asynchrone de l'entrée, au plus un par coordonnées"""
+        with self._cache_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def _refresh():
+            try:
+                self._fetch_weather(key)
+            finally:
+                with self._cache_lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=_refresh, name="weather-refresh", daemon=True).start()
+    
+    def _fetch_weather(self, key: Tuple[str, str]) -> Optional[Dict]:
+        """
+        Appelle l'API OpenWeatherMap et met le résultat en cache
+        
+        Returns:
+            Données météo formatées, ou None en cas d'erreur
+        """
         start_time = time.time()
         logger.info("[WEATHER] Récupération des données météo...")
         
         try:
             # Essayer d'abord avec les coordonnées
             params = {
-                'lat': self.latitude,
-                'lon': self.longitude,
+                'lat': key[0],
+                'lon': key[1],
                 'appid': self.api_key,
                 'units': 'metric',
                 'lang': 'fr'
             }
             
-            logger.info(f"[WEATHER] Appel API OpenWeatherMap (timeout: 5s)...")
-            response = requests.get(self.api_url, params=params, timeout=5)
-            response.raise_for_status()
+            logger.info(f"[WEATHER] Appel API OpenWeatherMap (timeout: 5s par tentative, "
+                        f"{http_client.max_duration(5):.0f}s au pire avec les nouvelles tentatives)...")
+            with span('weather_api.http_request', timeout_seconds=5) as attributes:
+                response = http_client.get(self.api_url, params=params, timeout=5)
+                attributes['status_code'] = response.status_code
+                response.raise_for_status()
             data = response.json()
             
             # Formatage des données
@@ -60,6 +147,9 @@ class WeatherAPI:
                 'timestamp': data.get('dt', None)
             }
             
+            with self._cache_lock:
+                self._cache[key] = (time.monotonic(), weather_data)
+            
             duration = time.time() - start_time
             logger.info(f"[WEATHER] ✓ Données météo récupérées en {duration:.2f}s - Temp: {weather_data['temperature']}°C")
             
@@ -68,11 +158,11 @@ class WeatherAPI:
         except requests.exceptions.Timeout:
             duration = time.time() - start_time
             logger.warning(f"[WEATHER] ⚠ Timeout après {duration:.2f}s, utilisation de valeurs par défaut")
-            return self._get_default_weather()
+            return None
         except requests.exceptions.RequestException as e:
             duration = time.time() - start_time
             logger.warning(f"[WEATHER] ⚠ Erreur après {duration:.2f}s: {e}, utilisation de valeurs par défaut")
-            return self._get_default_weather()
+            return None
     
     def _get_default_weather(self) -> Dict:
         """
@@ -94,14 +184,18 @@ class WeatherAPI:
             'timestamp': None
         }
     
-    def get_weather_summary_for_llm(self) -> str:
+    def get_weather_summary_for_llm(self, weather: Optional[Dict] = None) -> str:
         """
         Génère un résumé textuel des conditions météo pour l'agent LLM
         
+        Args:
+            weather: Données météo déjà récupérées (évite un second appel)
+        
         Returns:
             Chaîne de caractères décrivant les conditions actuelles
         """
-        weather = self.get_current_weather()
+        if weather is None:
+            weather = self.get_current_weather()
         
         summary = f"""
 CONDITIONS MÉTÉOROLOGIQUES ACTUELLES
@@ -0,0 +1,131 @@
+"""
+Registre des zones d'irrigation (parcelles avec leurs capteurs, culture et pompe)
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+from config import ZONES_CONFIG_PATH, SENSOR_CSV_DATA_PATH, LATITUDE, LONGITUDE, CITY_NAME
+
+DEFAULT_ZONE_ID = 'default'
+
+
+@dataclass(frozen=True)
+class Zone:
+    """Zone d'irrigation : une source de capteurs, une position, une culture, une pompe"""
+    id: str
+    name: str
+    sensor_csv_path: str
+    latitude: str
+    longitude: str
+    crop: Optional[str] = None
+
+    @property
+    def location(self) -> Tuple[str, str]:
+        """Coordonnées utilisées pour la météo (partagée entre zones voisines)"""
+        return (self.latitude, self.longitude)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'sensor_csv_path': self.sensor_csv_path,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'crop': self.crop
+        }
+
+
+class ZoneRegistry:
+    """Ensemble ordonné des zones ; la première est la zone par défaut"""
+
+    def __init__(self, zones: List[Zone]):
+        if not zones:
+            raise ValueError("Au moins une zone doit être définie")
+        self._zones: Dict[str, Zone] = {}
+        # Un fichier de capteurs par zone : le chargeur d'une zone n'est pas partagé
+        sensor_paths: Dict[Path, str] = {}
+        for zone in zones:
+            if zone.id in self._zones:
+                raise ValueError(f"Identifiant de zone en double : {zone.id}")
+            sensor_path = Path(zone.sensor_csv_path).resolve()
+            if sensor_path in sensor_paths:
+                raise ValueError(f"Fichier de capteurs partagé par les zones {sensor_paths[sensor_path]} "
+                                 f"et {zone.id} : {zone.sensor_csv_path}")
+            sensor_paths[sensor_path] = zone.id
+            self._zones[zone.id] = zone
+        self.default_zone_id = zones[0].id
+
+    @classmethod
+    def load(cls, config_path: str = ZONES_CONFIG_PATH) -> 'ZoneRegistry':
+        """
+        Charge les zones depuis le fichier JSON, ou crée la zone unique par défaut
+
+        Format attendu :
+            {"zones": [{"id": "nord", "name": "Parcelle Nord",
+                        "sensor_csv_path": "data/zones/nord.csv",
+                        "latitude": "45.50", "longitude": "-73.56", "crop": "Blé"}]}
+        Les coordonnées absentes reprennent la configuration globale ; le fichier de
+        capteurs aussi, mais seulement s'il n'y a qu'une zone.
+
+        Raises:
+            ValueError: si plusieurs zones omettent ou partagent un fichier de capteurs
+        """
+        path = Path(config_path)
+        if not path.exists():
+            return cls([Zone(
+                id=DEFAULT_ZONE_ID,
+                name=CITY_NAME,
+                sensor_csv_path=SENSOR_CSV_DATA_PATH,
+                latitude=str(LATITUDE),
+                longitude=str(LONGITUDE)
+            )])
+
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        entries = config.get('zones', [])
+        zones = []
+        for entry in entries:
+            if 'sensor_csv_path' not in entry and len(entries) > 1:
+                raise ValueError(f"sensor_csv_path manquant pour la zone {entry['id']} "
+                                 "(obligatoire quand plusieurs zones sont définies)")
+            zones.append(Zone(
+                id=str(entry['id']),
+                name=entry.get('name', entry['id']),
+                sensor_csv_path=entry.get('sensor_csv_path', SENSOR_CSV_DATA_PATH),
+                latitude=str(entry.get('latitude', LATITUDE)),
+                longitude=str(entry.get('longitude', LONGITUDE)),
+                crop=entry.get('crop')
+            ))
+        return cls(zones)
+
+    def get(self, zone_id: Optional[str] = None) -> Zone:
+        """
+        Retourne la zone demandée (zone par défaut si None)
+
+        Raises:
+            KeyError: si la zone est inconnue
+        """
+        if zone_id is None:
+            zone_id = self.default_zone_id
+        if zone_id not in self._zones:
+            raise KeyError(f"Zone inconnue : {zone_id}")
+        return self._zones[zone_id]
+
+    def locations(self, zone_ids: Optional[List[str]] = None) -> Dict[Tuple[str, str], List[Zone]]:
+        """Regroupe les zones par coordonnées"""
+        groups: Dict[Tuple[str, str], List[Zone]] = {}
+        for zone_id in zone_ids or list(self._zones):
+            zone = self.get(zone_id)
+            groups.setdefault(zone.location, []).append(zone)
+        return groups
+
+    def __contains__(self, zone_id: str) -> bool:
+        return zone_id in self._zones
+
+    def __iter__(self) -> Iterator[Zone]:
+        return iter(self._zones.values())
+
+    def __len__(self) -> int:
+        return len(self._zones)
@@ -12,8 +12,18 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.3"))
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Décisions en lot (make_decisions_batch) : requêtes simultanées et délai par requête
+LLM_BATCH_MAX_CONCURRENCY = int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", "4"))
+LLM_BATCH_ITEM_TIMEOUT_SECONDS = float(os.getenv("LLM_BATCH_ITEM_TIMEOUT_SECONDS", "180"))  # 0 = aucun délai
 
 # Configuration Ollama (pas de timeout strict - priorité à la qualité)
+# Durée de maintien du modèle en mémoire entre deux appels : 'auto' = intervalle des
+# décisions automatiques + marge, sinon une durée Ollama (ex. '30m', '-1' = toujours)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "auto")
+OLLAMA_KEEP_ALIVE_MARGIN_SECONDS = int(os.getenv("OLLAMA_KEEP_ALIVE_MARGIN_SECONDS", "600"))
+OLLAMA_PRELOAD_ON_STARTUP = os.getenv("OLLAMA_PRELOAD_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Préchauffage (génération vide) N secondes avant chaque décision planifiée
+OLLAMA_WARMUP_LEAD_SECONDS = int(os.getenv("OLLAMA_WARMUP_LEAD_SECONDS", "0"))  # 0 = désactivé
 
 # Configuration API Météo
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
@@ -21,6 +31,17 @@ WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/d
 LATITUDE = os.getenv("LATITUDE", "45.5017")
 LONGITUDE = os.getenv("LONGITUDE", "-73.5673")
 CITY_NAME = os.getenv("CITY_NAME", "Montreal")
+# Cache météo : durée de fraîcheur, puis fenêtre où la valeur périmée est servie pendant le rafraîchissement
+WEATHER_CACHE_TTL_SECONDS = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "600"))
+WEATHER_CACHE_STALE_SECONDS = float(os.getenv("WEATHER_CACHE_STALE_SECONDS", "3600"))
+
+# Client HTTP partagé (pool de connexions, reprises, disjoncteur par hôte)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE_SECONDS = float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.5"))
+HTTP_BACKOFF_MAX_SECONDS = float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "8"))
+HTTP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("HTTP_CIRCUIT_FAILURE_THRESHOLD", "5"))  # appels en échec (tentatives épuisées)
+HTTP_CIRCUIT_RESET_SECONDS = float(os.getenv("HTTP_CIRCUIT_RESET_SECONDS", "60"))
 
 # Configuration Système
 AUTO_DECISION_INTERVAL_HOURS = int(os.getenv("AUTO_DECISION_INTERVAL_HOURS", "6"))
@@ -28,6 +49,55 @@ CSV_DATA_PATH = os.getenv("CSV_DATA_PATH", "data/historical_data.csv")
 SENSOR_CSV_DATA_PATH = os.getenv("SENSOR_CSV_DATA_PATH", "data/sensor_data.csv")
 REVIEWS_CSV_DATA_PATH = os.getenv("REVIEWS_CSV_DATA_PATH", "data/reviews.csv")
 
+# Stockage des tables : "csv" ou "parquet" (jeu partitionné par mois à côté du CSV, migré au
+# premier démarrage ; nécessite pyarrow)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv").lower()
+
+# Zones d'irrigation (fichier JSON optionnel ; sinon une zone unique avec la configuration ci-dessus)
+ZONES_CONFIG_PATH = os.getenv("ZONES_CONFIG_PATH", "config/zones.json")
+ZONE_MAX_CONCURRENT_DECISIONS = int(os.getenv("ZONE_MAX_CONCURRENT_DECISIONS", "4"))
+
+# Situations historiques les plus proches (CSV_DATA_PATH) ajoutées au prompt de l'agent IA
+SIMILAR_SITUATIONS_K = int(os.getenv("SIMILAR_SITUATIONS_K", "5"))  # 0 = désactivé
+
+# Règles déterministes appliquées avant l'appel au LLM (cas sans ambiguïté)
+RULE_ENGINE_ENABLED = os.getenv("RULE_ENGINE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Cache des décisions LLM (empreinte quantifiée capteurs + météo + revues)
+DECISION_CACHE_ENABLED = os.getenv("DECISION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+DECISION_CACHE_PATH = os.getenv("DECISION_CACHE_PATH", "data/decision_cache.json")
+DECISION_CACHE_MAX_ENTRIES = int(os.getenv("DECISION_CACHE_MAX_ENTRIES", "256"))
+DECISION_CACHE_TTL_SECONDS = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "43200"))
+
+# Exécution asynchrone des décisions (API /api/decision)
+DECISION_JOB_WORKERS = int(os.getenv("DECISION_JOB_WORKERS", "2"))
+DECISION_JOB_MAX_PENDING = int(os.getenv("DECISION_JOB_MAX_PENDING", "10"))
+DECISION_JOB_HISTORY_SIZE = int(os.getenv("DECISION_JOB_HISTORY_SIZE", "100"))
+
+# Traces des décisions (étapes chronométrées, /api/decision/<id>/trace)
+DECISION_TRACE_ENABLED = os.getenv("DECISION_TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+DECISION_TRACE_PATH = os.getenv("DECISION_TRACE_PATH", "data/decision_traces.db")  # base SQLite
+DECISION_TRACE_CACHE_SIZE = int(os.getenv("DECISION_TRACE_CACHE_SIZE", "200"))  # traces gardées en mémoire
+DECISION_TRACE_MAX_COUNT = int(os.getenv("DECISION_TRACE_MAX_COUNT", "100000"))  # traces gardées sur disque (0 = toutes)
+
+# Historique des décisions (SQLite, /api/decisions)
+DECISION_HISTORY_ENABLED = os.getenv("DECISION_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+DECISION_HISTORY_PATH = os.getenv("DECISION_HISTORY_PATH", "data/decision_history.db")
+
+# Journal des capteurs (ajout en fin de fichier + compaction périodique)
+SENSOR_TAIL_BUFFER_SIZE = int(os.getenv("SENSOR_TAIL_BUFFER_SIZE", "256"))
+SENSOR_COMPACTION_INTERVAL = int(os.getenv("SENSOR_COMPACTION_INTERVAL", "1000"))  # 0 = désactivée
+# Tampon circulaire mappé en mémoire (float32) à la place du CSV : nombre de lectures conservées
+SENSOR_RING_BUFFER_CAPACITY = int(os.getenv("SENSOR_RING_BUFFER_CAPACITY", "0"))  # 0 = désactivé
+# Revues : lots écrits entre deux compactions (regroupe les fragments Parquet)
+REVIEW_COMPACTION_INTERVAL = int(os.getenv("REVIEW_COMPACTION_INTERVAL", "200"))  # 0 = désactivée
+
+# Statistiques glissantes (capteurs et revues) sur les N derniers jours, en plus des cumuls
+STATS_WINDOW_DAYS = float(os.getenv("STATS_WINDOW_DAYS", "7"))  # 0 = désactivées
+
+# Calage du simulateur de capteurs (python -m app.calibration)
+CALIBRATION_WORKERS = int(os.getenv("CALIBRATION_WORKERS", "0"))  # 0 = nombre de cœurs
+
 # Validation
 if LLM_PROVIDER == 'openai' and not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY doit être défini dans le fichier .env pour le provider 'openai'")
@@ -0,0 +1,68 @@
+"""
+Test des décisions en lot : lots successifs contre un serveur Ollama simulé (connexions keep-alive)
+
+Lancement : python -m pytest test_agent_batch.py  (ou python test_agent_batch.py)
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import app.agent as agent_module
+
+DECISION = {"decision": "IRRIGUER", "duree_minutes": 25, "explication": "Sol sec, aucune pluie prévue."}
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Réponses minimales de l'API Ollama (/api/tags, /api/chat) en HTTP/1.1 keep-alive"""
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, body: bytes) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(json.dumps({'models': [{'name': 'llama3:latest'}]}).encode())
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._send_json(json.dumps({
+            'model': 'llama3:latest',
+            'created_at': '2025-01-01T00:00:00Z',
+            'message': {'role': 'assistant', 'content': json.dumps(DECISION, ensure_ascii=False)},
+            'done': True,
+            'done_reason': 'stop',
+            'load_duration': 1000000,
+            'prompt_eval_count': 10,
+            'eval_count': 20
+        }).encode() + b'\n')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_consecutive_batches_reuse_keep_alive_connections(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(agent_module, 'LLM_PROVIDER', 'ollama')
+        monkeypatch.setattr(agent_module, 'OLLAMA_BASE_URL', f'http://127.0.0.1:{server.server_port}')
+        monkeypatch.setattr(agent_module, 'OLLAMA_PRELOAD_ON_STARTUP', False)
+        agent = agent_module.IrrigationAgent()
+        requests = [{'weather_summary': f'Zone {index}'} for index in range(3)]
+
+        # Le 2e lot réutilise les connexions ouvertes par le 1er
+        for _ in range(3):
+            decisions = agent.make_decisions_batch(requests, max_concurrency=3, timeout=10)
+            assert [decision['decision'] for decision in decisions] == ['IRRIGUER'] * 3
+            assert not any(decision.get('safe_default') for decision in decisions)
+            assert [decision['duree_minutes'] for decision in decisions] == [25] * 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
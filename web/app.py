@@ -1,10 +1,20 @@
 """
 Interface web Flask pour le système d'irrigation intelligent
 """
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
+from app.decision_coordinator import DecisionCoordinator
 from app.decision_engine import DecisionEngine
+from app.decision_jobs import DecisionJobManager, JobQueueFullError
+from app.metrics import REGISTRY, PUMP_RUNNING, PUMP_DURATION_MINUTES
+from app.pump_controller import PumpController, PumpInterlockError, PumpState
+from app.tracing import format_trace
+from web.events import EventBroker
+from apscheduler.events import (EVENT_JOB_ADDED, EVENT_JOB_REMOVED, EVENT_JOB_MODIFIED,
+                                EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_ALL_JOBS_REMOVED)
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from config import LLM_PROVIDER, OLLAMA_WARMUP_LEAD_SECONDS
 import datetime
 import json
 
@@ -13,53 +23,126 @@ app.config['SECRET_KEY'] = 'irrigation-ai-secret-key-2024'
 
 # Instance du moteur de décision
 decision_engine = DecisionEngine()
-
-# Stockage de la dernière décision
-last_decision = {
-    'decision': 'NE PAS IRRIGUER',
-    'explication': 'Aucune décision prise pour le moment',
-    'timestamp': None,
-    'metadata': {}
+zone_registry = decision_engine.zone_registry
+
+# Dernière décision de chaque zone (reprise depuis l'historique au démarrage)
+last_decisions = {
+    zone.id: decision_engine.get_last_decision(zone.id) or {
+        'zone_id': zone.id,
+        'decision': 'NE PAS IRRIGUER',
+        'explication': 'Aucune décision prise pour le moment',
+        'timestamp': None,
+        'metadata': {}
+    }
+    for zone in zone_registry
 }
 
-# État de la pompe
-pump_state = {
-    'running': False,
-    'started_at': None,
-    'stop_at': None,
-    'stopped_at': None,
-    'duration_minutes': 0,
-    'stop_reason': None
-}
+# État de la pompe de chaque zone (seul le contrôleur le modifie)
+pump_controller = PumpController(zone.id for zone in zone_registry)
+
+# Diffusion temps réel (SSE) vers le tableau de bord
+event_broker = EventBroker()
 
 # Scheduler pour les décisions automatiques
 scheduler = BackgroundScheduler()
 scheduler.start()
 
 
+def _scheduler_status() -> dict:
+    """État du scheduler et de ses jobs planifiés"""
+    return {
+        'running': scheduler.running,
+        'jobs': [
+            {
+                'id': job.id,
+                'name': job.name,
+                'next_run': job.next_run_time.isoformat() if job.next_run_time else None
+            }
+            for job in scheduler.get_jobs()
+        ],
+        'decisions': decision_coordinator.get_stats()
+    }
+
+
+def _on_scheduler_event(event):
+    """Publie l'état du scheduler à chaque ajout, retrait ou exécution de job"""
+    event_broker.publish('scheduler', _scheduler_status())
+
+
+scheduler.add_listener(
+    _on_scheduler_event,
+    EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_JOB_MODIFIED
+    | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_ALL_JOBS_REMOVED
+)
+
+# Exécution asynchrone des décisions manuelles
+decision_jobs = DecisionJobManager()
+
+
+def _apply_decision(result: dict) -> None:
+    """Enregistre la décision de la zone et pilote sa pompe en conséquence"""
+    zone_id = result['zone_id']
+    last_decisions[zone_id] = result
+    
+    if result['decision'] == 'IRRIGUER' and result.get('duration_minutes', 0) > 0:
+        try:
+            pump_controller.start(zone_id, result['duration_minutes'], decision_id=result.get('id'),
+                                  reservoir_level=result.get('metadata', {}).get('sensors_before', {}).get('niveau_reservoir'))
+        except PumpInterlockError as e:
+            print(f"[PUMP] {e}")
+            decision_engine.record_pump_action(zone_id, 'refused', result.get('id'), reason=str(e))
+    elif result['decision'] == 'NE PAS IRRIGUER':
+        pump_controller.stop(zone_id, 'decision_no_irrigate')
+    
+    event_broker.publish('decision', {**result, 'pump_state': pump_controller.state(zone_id).to_dict()})
+
+
+def _decide_cycle(zone_ids: list, on_zone_decision=None) -> dict:
+    """Cycle de décision sur des zones, chaque décision étant appliquée à la pompe dès qu'elle est prise"""
+    def apply(zone_id: str, result: dict) -> None:
+        _apply_decision(result)
+        if on_zone_decision is not None:
+            on_zone_decision(zone_id, result)
+    
+    return decision_engine.make_cycle_decisions(zone_ids, on_zone_decision=apply)
+
+
+# Une décision à la fois par zone : les demandes reçues pendant une décision
+# (planifiée ou manuelle) sont regroupées en une seule décision suivante
+decision_coordinator = DecisionCoordinator(follow_up=_decide_cycle)
+
+
 def automatic_decision_task():
-    """Tâche automatique pour prendre une décision d'irrigation"""
-    global last_decision, pump_state
+    """Tâche automatique : un cycle de décision pour toutes les zones"""
     try:
-        result = decision_engine.make_irrigation_decision()
-        last_decision = result
-        
-        # Gérer la pompe selon la décision (comme pour la décision manuelle)
-        if result['decision'] == 'IRRIGUER' and result.get('duration_minutes', 0) > 0:
-            start_pump(result['duration_minutes'])
-        elif result['decision'] == 'NE PAS IRRIGUER':
-            if pump_state['running']:
-                _stop_pump_internal('decision_no_irrigate')
+        # Sans attente : une zone encore en cours de décision est reportée, pas empilée
+        results = decision_coordinator.run([zone.id for zone in zone_registry], _decide_cycle,
+                                           trigger='scheduled', wait=False)
         
-        print(f"[AUTO] Décision prise à {datetime.datetime.now()}: {result['decision']}")
+        for zone_id, result in results.items():
+            if 'deferred' in result:
+                print(f"[AUTO] Décision précédente encore en cours pour la zone {zone_id} : "
+                      f"demande {'reportée' if result['deferred'] == 'skipped' else 'fusionnée'}")
+            elif 'error' in result:
+                print(f"[AUTO] Erreur pour la zone {zone_id} : {result['error']}")
+            else:
+                print(f"[AUTO] Décision prise à {datetime.datetime.now()} pour la zone {zone_id}: {result['decision']}")
     except Exception as e:
         print(f"[AUTO] Erreur lors de la prise de décision automatique : {e}")
 
 
+def _unknown_zone(zone_id: str):
+    """Réponse 404 pour une zone inconnue"""
+    return jsonify({
+        'success': False,
+        'error': f'Zone inconnue : {zone_id}'
+    }), 404
+
+
 @app.route('/')
 def index():
     """Page principale de l'interface"""
-    return render_template('index.html')
+    return render_template('index.html', default_zone_id=zone_registry.default_zone_id)
 
 
 @app.route('/api/scheduler/start', methods=['POST'])
@@ -72,15 +155,35 @@ def start_scheduler():
         # Supprimer les jobs existants
         scheduler.remove_all_jobs()
         
+        # Le modèle reste chargé d'une décision planifiée à la suivante
+        decision_engine.agent.set_schedule_interval(interval_hours * 3600)
+        
         # Ajouter le nouveau job
+        first_run = datetime.datetime.now() + datetime.timedelta(hours=interval_hours)
         scheduler.add_job(
             func=automatic_decision_task,
-            trigger=IntervalTrigger(hours=interval_hours),
+            trigger=IntervalTrigger(hours=interval_hours, start_date=first_run),
             id='irrigation_decision',
             name='Décision d\'irrigation automatique',
-            replace_existing=True
+            replace_existing=True,
+            # Exécutions manquées regroupées en une seule ; une seconde instance peut
+            # démarrer pour que le coordinateur compte la demande reportée (elle rend la main aussitôt)
+            coalesce=True,
+            max_instances=2,
+            misfire_grace_time=None
         )
         
+        # Préchauffage du modèle peu avant chaque décision planifiée
+        if LLM_PROVIDER == 'ollama' and OLLAMA_WARMUP_LEAD_SECONDS > 0:
+            scheduler.add_job(
+                func=decision_engine.agent.warm_up,
+                trigger=IntervalTrigger(hours=interval_hours,
+                                        start_date=first_run - datetime.timedelta(seconds=OLLAMA_WARMUP_LEAD_SECONDS)),
+                id='llm_warmup',
+                name='Préchauffage du modèle IA',
+                replace_existing=True
+            )
+        
         return jsonify({
             'success': True,
             'message': f'Scheduler démarré avec un intervalle de {interval_hours} heures'
@@ -111,20 +214,9 @@ def stop_scheduler():
 @app.route('/api/scheduler/status', methods=['GET'])
 def get_scheduler_status():
     """Récupère le statut du scheduler"""
-    jobs = scheduler.get_jobs()
     return jsonify({
         'success': True,
-        'data': {
-            'running': scheduler.running,
-            'jobs': [
-                {
-                    'id': job.id,
-                    'name': job.name,
-                    'next_run': job.next_run_time.isoformat() if job.next_run_time else None
-                }
-                for job in jobs
-            ]
-        }
+        'data': _scheduler_status()
     })
 
 
@@ -194,23 +286,20 @@ def get_recent_reviews():
         }), 500
 
 
-@app.route('/api/pump/stop', methods=['POST'])
-def stop_pump():
-    """Arrête la pompe manuellement"""
-    global pump_state
+def _stop_pump_response(zone_id: str):
+    """Arrête manuellement la pompe d'une zone et construit la réponse"""
     try:
-        if not pump_state['running']:
+        # Vérification et arrêt en une seule commande : pas de course avec un arrêt automatique
+        pump_state = pump_controller.stop(zone_id, 'manual_stop')
+        if pump_state is None:
             return jsonify({
                 'success': False,
                 'error': 'La pompe n\'est pas en marche'
             }), 400
         
-        # Arrêter la pompe
-        _stop_pump_internal('manual_stop')
-        
         return jsonify({
             'success': True,
-            'data': pump_state,
+            'data': pump_state.to_dict(),
             'message': 'Pompe arrêtée avec succès'
         })
     except Exception as e:
@@ -220,82 +309,125 @@ def stop_pump():
         }), 500
 
 
-def _stop_pump_internal(reason: str = 'manual_stop'):
-    """Fonction interne pour arrêter la pompe"""
-    global pump_state
-    pump_state['running'] = False
-    pump_state['stopped_at'] = datetime.datetime.now().isoformat()
-    pump_state['stop_reason'] = reason
+@app.route('/api/pump/stop', methods=['POST'])
+def stop_pump():
+    """Arrête la pompe de la zone par défaut manuellement"""
+    return _stop_pump_response(zone_registry.default_zone_id)
+
+
+def _pump_auto_stop_job_id(zone_id: str) -> str:
+    """Identifiant du job d'arrêt automatique de la pompe d'une zone"""
+    return f'pump_auto_stop_{zone_id}'
+
+
+def _on_pump_transition(pump_state: PumpState, action: str, reason: str = None) -> None:
+    """Diffuse chaque transition de pompe, l'enregistre et (dé)programme l'arrêt automatique"""
+    zone_id = pump_state.zone_id
+    event_broker.publish('pump_state', pump_state.to_dict())
+    decision_engine.record_pump_action(
+        zone_id, action, pump_state.decision_id,
+        duration_minutes=pump_state.duration_minutes if action == 'start' else None, reason=reason
+    )
     
-    # Annuler le job d'arrêt automatique s'il existe
-    try:
-        scheduler.remove_job('pump_auto_stop')
-    except:
-        pass
+    if action == 'start':
+        # L'arrêt programmé ne concerne que cette marche (run_id)
+        scheduler.add_job(
+            func=stop_pump_auto,
+            trigger='date',
+            run_date=datetime.datetime.fromisoformat(pump_state.stop_at),
+            args=[zone_id, pump_state.run_id],
+            id=_pump_auto_stop_job_id(zone_id),
+            replace_existing=True
+        )
+    elif reason != 'auto_stop':
+        # Annuler le job d'arrêt automatique s'il existe
+        try:
+            scheduler.remove_job(_pump_auto_stop_job_id(zone_id))
+        except JobLookupError:
+            pass
+
 
+pump_controller.add_listener(_on_pump_transition)
 
-def start_pump(duration_minutes: int):
-    """Démarre la pompe pour une durée donnée"""
-    global pump_state
+
+def stop_pump_auto(zone_id: str = None, run_id: int = None):
+    """Arrête la pompe d'une zone automatiquement après la durée programmée"""
+    zone_id = zone_id or zone_registry.default_zone_id
+    pump_state = pump_controller.stop(zone_id, 'auto_stop', run_id=run_id)
+    if pump_state is not None:
+        print(f"[PUMP] Pompe de la zone {zone_id} arrêtée automatiquement à {pump_state.stopped_at}")
+
+
+def _run_decision_job(progress, zone_id: str) -> dict:
+    """Décision exécutée dans un job : moteur de décision puis pilotage de la pompe de la zone"""
+    explication_parts = []
     
-    # Arrêter la pompe si elle est déjà en marche
-    if pump_state['running']:
-        _stop_pump_internal('restart')
+    def on_stream_event(event: dict) -> None:
+        # Résultats partiels consultables via GET /api/decision/<job_id> et poussés en SSE
+        if event['type'] == 'explication_delta':
+            explication_parts.append(event['text'])
+            progress.update_partial(explication=''.join(explication_parts))
+        else:
+            progress.update_partial(**{event['type']: event[event['type']]})
+        event_broker.publish('decision_stream', {'job_id': progress.job_id, 'zone_id': zone_id, **event})
     
-    # Démarrer la pompe
-    now = datetime.datetime.now()
-    stop_time = now + datetime.timedelta(minutes=duration_minutes)
+    def decide(zone_ids: list) -> dict:
+        result = decision_engine.make_irrigation_decision(
+            zone_id,
+            progress_callback=progress,
+            stream_callback=on_stream_event
+        )
+        _apply_decision(result)
+        return {zone_id: result}
     
-    pump_state = {
-        'running': True,
-        'started_at': now.isoformat(),
-        'stop_at': stop_time.isoformat(),
-        'stopped_at': None,
-        'duration_minutes': duration_minutes,
-        'stop_reason': None
-    }
+    def on_deferred(zone_id: str, outcome: str) -> None:
+        progress("Décision déjà en cours pour cette zone, en attente de la décision suivante", 5)
     
-    # Programmer l'arrêt automatique
-    scheduler.add_job(
-        func=stop_pump_auto,
-        trigger='date',
-        run_date=stop_time,
-        id='pump_auto_stop',
-        replace_existing=True
-    )
+    result = decision_coordinator.run([zone_id], decide, trigger='manual', on_deferred=on_deferred)[zone_id]
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    
+    # Ajouter l'état de la pompe à la réponse
+    result['pump_state'] = pump_controller.state(zone_id).to_dict()
+    return result
 
 
-def stop_pump_auto():
-    """Arrête la pompe automatiquement après la durée programmée"""
-    global pump_state
-    pump_state['running'] = False
-    pump_state['stopped_at'] = datetime.datetime.now().isoformat()
-    pump_state['stop_reason'] = 'auto_stop'
-    print(f"[PUMP] Pompe arrêtée automatiquement à {pump_state['stopped_at']}")
+def _run_cycle_job(progress, zone_ids: list = None) -> dict:
+    """Cycle de décision exécuté dans un job : toutes les zones demandées"""
+    zone_ids = zone_ids or [zone.id for zone in zone_registry]
+    total = len(zone_ids)
+    done = []
+    
+    def on_zone_decision(zone_id: str, result: dict) -> None:
+        done.append(zone_id)
+        progress(f"Zones décidées : {len(done)}/{total}", int(100 * len(done) / total))
+    
+    results = decision_coordinator.run(
+        zone_ids, lambda free_zone_ids: _decide_cycle(free_zone_ids, on_zone_decision), trigger='cycle'
+    )
+    return {
+        zone_id: ({**result, 'pump_state': pump_controller.state(zone_id).to_dict()} if 'error' not in result else result)
+        for zone_id, result in results.items()
+    }
 
 
-@app.route('/api/decision', methods=['POST'])
-def make_decision():
-    """Endpoint pour déclencher manuellement une décision"""
-    global last_decision, pump_state
+def _submit_decision_job(zone_id: str, data: dict):
+    """Soumet la décision d'une zone en arrière-plan et construit la réponse 202"""
     try:
-        result = decision_engine.make_irrigation_decision()
-        last_decision = result
-        
-        # Gérer la pompe selon la décision
-        if result['decision'] == 'IRRIGUER' and result.get('duration_minutes', 0) > 0:
-            start_pump(result['duration_minutes'])
-        elif result['decision'] == 'NE PAS IRRIGUER':
-            if pump_state['running']:
-                _stop_pump_internal('decision_no_irrigate')
-        
-        # Ajouter l'état de la pompe à la réponse
-        result['pump_state'] = pump_state
+        job = decision_jobs.submit(
+            lambda progress: _run_decision_job(progress, zone_id),
+            key=json.dumps({**data, 'zone_id': zone_id}, sort_keys=True)
+        )
         
         return jsonify({
             'success': True,
-            'data': result
-        })
+            'data': job
+        }), 202
+    except JobQueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -303,38 +435,257 @@ def make_decision():
         }), 500
 
 
-@app.route('/api/decision/last', methods=['GET'])
-def get_last_decision():
-    """Récupère la dernière décision prise"""
+@app.route('/api/decision', methods=['POST'])
+def make_decision():
+    """
+    Endpoint pour déclencher manuellement une décision
+    
+    La décision est exécutée en arrière-plan : la réponse (202) contient l'id du
+    job à suivre via GET /api/decision/<job_id>. Une demande identique à un job
+    encore actif renvoie ce même job. Le corps peut préciser 'zone_id'
+    (zone par défaut sinon).
+    """
+    data = request.get_json(silent=True) or {}
+    zone_id = data.get('zone_id') or zone_registry.default_zone_id
+    if zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    return _submit_decision_job(zone_id, data)
+
+
+@app.route('/api/decision/<job_id>', methods=['GET'])
+def get_decision_job(job_id):
+    """Récupère la progression et le résultat d'un job de décision"""
+    job = decision_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job de décision introuvable'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': job
+    })
+
+
+@app.route('/api/decision/<decision_id>/trace', methods=['GET'])
+def get_decision_trace(decision_id):
+    """
+    Trace d'une décision : étapes imbriquées avec leur durée
+    
+    JSON par défaut ; ?format=text pour un rendu texte indenté.
+    """
+    trace = decision_engine.get_decision_trace(decision_id)
+    if trace is None:
+        return jsonify({
+            'success': False,
+            'error': 'Trace de décision introuvable'
+        }), 404
+    if request.args.get('format') == 'text':
+        return Response(format_trace(trace), content_type='text/plain; charset=utf-8')
+    return jsonify({
+        'success': True,
+        'data': trace
+    })
+
+
+@app.route('/api/decisions', methods=['GET'])
+def list_decisions():
+    """
+    Historique paginé des décisions, de la plus récente à la plus ancienne
+    
+    Filtres optionnels : zone_id, decision, source, start et end (dates ou
+    horodatages ISO, inclus) ; pagination par limit (50 par défaut, 500 au plus)
+    et offset.
+    """
+    zone_id = request.args.get('zone_id')
+    if zone_id and zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    history = decision_engine.get_decision_history(
+        zone_id=zone_id,
+        decision=request.args.get('decision'),
+        source=request.args.get('source'),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        limit=request.args.get('limit', 50, type=int),
+        offset=request.args.get('offset', 0, type=int)
+    )
+    if history is None:
+        return jsonify({
+            'success': False,
+            'error': 'Historique des décisions désactivé'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': history
+    })
+
+
+@app.route('/api/decisions/<decision_id>', methods=['GET'])
+def get_decision_record(decision_id):
+    """Décision enregistrée : entrées, résultat, durées, actions de pompe et revues"""
+    record = decision_engine.get_decision(decision_id)
+    if record is None:
+        return jsonify({
+            'success': False,
+            'error': 'Décision introuvable'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': record
+    })
+
+
+def _last_decision_response(zone_id: str):
+    """Dernière décision d'une zone, avec l'état de sa pompe"""
     # Ajouter l'état de la pompe à la réponse
-    response_data = last_decision.copy()
-    response_data['pump_state'] = pump_state
+    response_data = last_decisions[zone_id].copy()
+    response_data['pump_state'] = pump_controller.state(zone_id).to_dict()
     return jsonify({
         'success': True,
         'data': response_data
     })
 
 
-@app.route('/api/status', methods=['GET'])
-def get_status():
-    """Récupère le statut du système"""
-    status = decision_engine.get_system_status()
+@app.route('/api/decision/last', methods=['GET'])
+def get_last_decision():
+    """Récupère la dernière décision prise pour la zone par défaut"""
+    return _last_decision_response(zone_registry.default_zone_id)
+
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Flux Server-Sent Events : décisions, état de la pompe et du scheduler
+    
+    L'état courant est envoyé dès la connexion, puis chaque changement est poussé.
+    """
+    initial_events = []
+    for zone_id in last_decisions:
+        initial_events.append(('decision', {**last_decisions[zone_id], 'pump_state': pump_controller.state(zone_id).to_dict()}))
+        initial_events.append(('pump_state', pump_controller.state(zone_id).to_dict()))
+    initial_events.append(('scheduler', _scheduler_status()))
+    return Response(
+        stream_with_context(event_broker.stream(initial_events)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _status_response(zone_id: str):
+    """Statut du système pour une zone"""
+    status = decision_engine.get_system_status(zone_id)
     return jsonify({
         'success': True,
         'data': {
             **status,
-            'last_decision': last_decision,
+            'last_decision': last_decisions[zone_id],
             'auto_scheduler_running': scheduler.running,
-            'pump_state': pump_state
+            'pump_state': pump_controller.state(zone_id).to_dict()
+        }
+    })
+
+
+@app.route('/api/status', methods=['GET'])
+def get_status():
+    """Récupère le statut du système (zone par défaut)"""
+    return _status_response(zone_registry.default_zone_id)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose les métriques au format texte Prometheus"""
+    for zone_id, pump_state in pump_controller.states().items():
+        PUMP_RUNNING.set(1 if pump_state.running else 0, zone=zone_id)
+        PUMP_DURATION_MINUTES.set(pump_state.duration_minutes if pump_state.running else 0, zone=zone_id)
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/zones', methods=['GET'])
+def list_zones():
+    """Liste les zones avec leur dernière décision et l'état de leur pompe"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'default_zone_id': zone_registry.default_zone_id,
+            'zones': [
+                {
+                    **zone.to_dict(),
+                    'last_decision': last_decisions[zone.id],
+                    'pump_state': pump_controller.state(zone.id).to_dict()
+                }
+                for zone in zone_registry
+            ]
         }
     })
 
 
+@app.route('/api/zones/cycle', methods=['POST'])
+def run_zone_cycle():
+    """
+    Déclenche un cycle de décision pour plusieurs zones (toutes par défaut)
+    
+    Corps optionnel : {"zone_ids": ["nord", "sud"]}. Le cycle est exécuté en
+    arrière-plan ; le résultat du job est un dictionnaire zone_id -> décision.
+    """
+    data = request.get_json(silent=True) or {}
+    zone_ids = data.get('zone_ids') or None
+    for zone_id in zone_ids or []:
+        if zone_id not in zone_registry:
+            return _unknown_zone(zone_id)
+    try:
+        job = decision_jobs.submit(
+            lambda progress: _run_cycle_job(progress, zone_ids),
+            key=json.dumps({'cycle': sorted(zone_ids) if zone_ids else None})
+        )
+        return jsonify({
+            'success': True,
+            'data': job
+        }), 202
+    except JobQueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+
+
+@app.route('/api/zones/<zone_id>/decision', methods=['POST'])
+def make_zone_decision(zone_id):
+    """Déclenche une décision en arrière-plan pour une zone"""
+    if zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    return _submit_decision_job(zone_id, request.get_json(silent=True) or {})
+
+
+@app.route('/api/zones/<zone_id>/decision/last', methods=['GET'])
+def get_zone_last_decision(zone_id):
+    """Récupère la dernière décision prise pour une zone"""
+    if zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    return _last_decision_response(zone_id)
+
+
+@app.route('/api/zones/<zone_id>/status', methods=['GET'])
+def get_zone_status(zone_id):
+    """Récupère le statut d'une zone"""
+    if zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    return _status_response(zone_id)
+
+
+@app.route('/api/zones/<zone_id>/pump/stop', methods=['POST'])
+def stop_zone_pump(zone_id):
+    """Arrête manuellement la pompe d'une zone"""
+    if zone_id not in zone_registry:
+        return _unknown_zone(zone_id)
+    return _stop_pump_response(zone_id)
+
+
 if __name__ == '__main__':
-    # Prendre une décision initiale au démarrage
+    # Prendre une décision initiale au démarrage (toutes les zones)
     try:
-        result = decision_engine.make_irrigation_decision()
-        last_decision = result
+        for zone_id, result in decision_engine.make_cycle_decisions().items():
+            if 'error' not in result:
+                last_decisions[zone_id] = result
     except Exception as e:
         print(f"Erreur lors de la décision initiale : {e}")
     
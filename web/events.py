@@ -0,0 +1,70 @@
+"""
+Diffusion d'événements temps réel vers le tableau de bord (Server-Sent Events)
+"""
+import json
+import queue
+import threading
+from typing import Dict, Iterator
+
+
+class EventBroker:
+    """Diffuse les événements publiés à tous les abonnés SSE connectés"""
+
+    def __init__(self, max_queue_size: int = 100, heartbeat_seconds: float = 15.0):
+        """
+        Args:
+            max_queue_size: Événements en attente par abonné (les plus anciens sont abandonnés)
+            heartbeat_seconds: Intervalle des commentaires de maintien de connexion
+        """
+        self.max_queue_size = max_queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict) -> None:
+        """Envoie un événement à tous les abonnés sans jamais bloquer l'émetteur"""
+        message = self.format_event(event_type, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Client trop lent : on abandonne l'événement le plus ancien
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    @staticmethod
+    def format_event(event_type: str, data: Dict) -> str:
+        """Formate un événement au format text/event-stream"""
+        return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def stream(self, initial_events=()) -> Iterator[str]:
+        """
+        Générateur de flux SSE pour une connexion cliente
+
+        Args:
+            initial_events: Couples (type, données) envoyés dès la connexion
+        """
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            for event_type, data in initial_events:
+                yield self.format_event(event_type, data)
+            while True:
+                try:
+                    yield subscriber.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)